@@ -0,0 +1,105 @@
+# app/benchmarks/bench_engagement.py
+"""
+Benchmark engagement analytics: loop per tweet (versi lama) vs vectorized.
+
+Jalankan dari folder be/:
+    python -m benchmarks.bench_engagement --sizes 100000 1000000
+"""
+import argparse
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from core.shared import TweetBatch
+from routers.engagement import init_engagement_state, update_engagement_state
+
+
+def make_batch(n: int, seed: int = 42) -> TweetBatch:
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2023-01-01", tz="UTC")
+    offsets = pd.to_timedelta(rng.integers(0, 180 * 24 * 3600, n), unit="s")
+    created_at = (start + offsets).strftime("%a %b %d %H:%M:%S +0000 %Y").to_numpy(dtype=object)
+    texts = np.array([f"tweet {i} #tag{i % 50}" for i in range(n)], dtype=object)
+    return TweetBatch(
+        id_str=np.array([str(10**17 + i) for i in range(n)], dtype=object),
+        full_text=texts,
+        created_at=created_at,
+        username=np.full(n, "bench", dtype=object),
+        favorite_count=rng.zipf(1.8, n).astype(np.int64),
+        retweet_count=rng.zipf(2.0, n).astype(np.int64),
+        reply_count=rng.integers(0, 5, n, dtype=np.int64),
+        quote_count=rng.integers(0, 3, n, dtype=np.int64),
+    )
+
+
+def legacy_update_engagement_state(state: Dict[str, Any], batch: TweetBatch) -> Dict[str, Any]:
+    """
+    Salinan loop lama (pd.to_datetime per tweet + dict per tweet) sebagai pembanding.
+    """
+    top_tweets = []
+    for i in range(len(batch)):
+        engagement = int(
+            batch.favorite_count[i] + batch.retweet_count[i] + batch.reply_count[i] + batch.quote_count[i]
+        )
+        state["total_engagement"] += engagement
+        try:
+            dt = pd.to_datetime(batch.created_at[i], errors="coerce", utc=True)
+        except Exception:
+            dt = None
+        if dt is not None and not pd.isna(dt):
+            date_key = dt.date().isoformat()
+            state["engagement_by_date"][date_key] = state["engagement_by_date"].get(date_key, 0) + engagement
+            state["engagement_by_hour"][dt.hour] += engagement
+        top_tweets.append(
+            {
+                "id_str": batch.id_str[i],
+                "text": batch.full_text[i][:200],
+                "engagement": engagement,
+                "favorite_count": int(batch.favorite_count[i]),
+                "retweet_count": int(batch.retweet_count[i]),
+                "created_at": batch.created_at[i],
+            }
+        )
+    state["total_tweets"] += len(batch)
+    state["top_tweets"] = sorted(top_tweets, key=lambda x: x["engagement"], reverse=True)[:10]
+    return state
+
+
+def run(sizes, skip_legacy_above: int) -> None:
+    for n in sizes:
+        batch = make_batch(n)
+
+        t0 = time.perf_counter()
+        vectorized = update_engagement_state(init_engagement_state(), batch)
+        vec_time = time.perf_counter() - t0
+
+        if n > skip_legacy_above:
+            print(f"n={n:>9,}  vectorized={vec_time:8.3f}s  legacy=skipped")
+            continue
+
+        t0 = time.perf_counter()
+        legacy = legacy_update_engagement_state(init_engagement_state(), batch)
+        legacy_time = time.perf_counter() - t0
+
+        # Loop lama tidak punya digest persentil -> bandingkan key yang sama saja
+        keys = [k for k in legacy if not k.startswith("digest")]
+        assert {k: legacy[k] for k in keys} == {k: vectorized[k] for k in keys}, "output vectorized berbeda dari versi lama"
+        print(
+            f"n={n:>9,}  vectorized={vec_time:8.3f}s  legacy={legacy_time:8.3f}s  "
+            f"speedup={legacy_time / vec_time:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument(
+        "--skip-legacy-above",
+        type=int,
+        default=10_000_000,
+        help="Lewati loop lama untuk ukuran di atas ini (loop lama sangat lambat)",
+    )
+    args = parser.parse_args()
+    run(args.sizes, args.skip_legacy_above)
@@ -0,0 +1,93 @@
+# app/benchmarks/bench_sentiment.py
+"""
+Benchmark scoring sentiment: clean_text lama (7 regex berurutan) vs regex tunggal,
+dan VADER tanpa memo vs dengan memo (teks berulang: retweet / copy-paste).
+
+Jalankan dari folder be/ dengan export CSV asli (kolom full_text):
+    python -m benchmarks.bench_sentiment --csv data/disney.csv data/netflix.csv
+Tanpa --csv dipakai korpus sintetis dengan porsi teks duplikat --dup-ratio.
+"""
+import argparse
+import re
+import string
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from routers.sentiment import clean_text, score_cleaned, score_memo, sentiment_memo_stats, sia
+
+
+def legacy_clean_text(text: str) -> str:
+    """
+    Salinan clean_text lama sebagai pembanding
+    """
+    text = text.lower()
+    text = re.sub(r"http\S+|www\S+", "", text)
+    text = re.sub(r"&amp", "and", text)
+    text = re.sub(r"@\w+", "", text)
+    text = re.sub(r"#\w+", "", text)
+    text = re.sub(r"\d+", "", text)
+    text = text.encode('ascii', 'ignore').decode('ascii')
+    text = text.translate(str.maketrans('', '', string.punctuation))
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def make_corpus(n: int, dup_ratio: float, seed: int = 42) -> List[str]:
+    rng = np.random.default_rng(seed)
+    words = ["love", "hate", "great", "awful", "movie", "park", "show", "ride", "magic", "boring",
+             "best", "worst", "family", "kids", "fun", "sad", "happy", "new", "episode", "ticket"]
+    n_unique = max(1, int(n * (1 - dup_ratio)))
+    unique = []
+    for i in range(n_unique):
+        body = " ".join(rng.choice(words, rng.integers(6, 20)))
+        unique.append(f"@user{i % 997} {body} #tag{i % 50} https://t.co/{i:x} &amp; {i % 100}!")
+    # Duplikat = RT persis dari teks yang sudah ada
+    picks = rng.integers(0, n_unique, n - n_unique)
+    return unique + [unique[i] for i in picks]
+
+
+def load_corpus(path: str) -> List[str]:
+    return pd.read_csv(path, usecols=["full_text"], dtype={"full_text": str})["full_text"].astype(str).tolist()
+
+
+def timed(fn, texts):
+    t0 = time.perf_counter()
+    out = [fn(text) for text in texts]
+    return out, time.perf_counter() - t0
+
+
+def run(name: str, texts: List[str]) -> None:
+    legacy_cleaned, legacy_clean_time = timed(legacy_clean_text, texts)
+    cleaned, clean_time = timed(clean_text, texts)
+    assert cleaned == legacy_cleaned, "clean_text baru berbeda dari versi lama"
+
+    _, vader_time = timed(lambda text: sia.polarity_scores(text)["compound"], cleaned)
+
+    score_memo.clear()
+    _, memo_time = timed(score_cleaned, cleaned)
+    memo = sentiment_memo_stats()
+
+    print(
+        f"{name}: n={len(texts):,}  unique={len(set(cleaned)):,}\n"
+        f"  clean_text  legacy={legacy_clean_time:7.3f}s  single-pass={clean_time:7.3f}s  "
+        f"speedup={legacy_clean_time / clean_time:5.1f}x\n"
+        f"  vader       no-memo={vader_time:7.3f}s  memo={memo_time:7.3f}s  "
+        f"hit_rate={memo['hit_rate']:.2%}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", nargs="*", default=[], help="CSV export tweet (kolom full_text)")
+    parser.add_argument("--size", type=int, default=100_000, help="Jumlah teks korpus sintetis")
+    parser.add_argument("--dup-ratio", type=float, default=0.3, help="Porsi teks duplikat korpus sintetis")
+    args = parser.parse_args()
+
+    if args.csv:
+        for path in args.csv:
+            run(path, load_corpus(path))
+    else:
+        run(f"synthetic(dup={args.dup_ratio})", make_corpus(args.size, args.dup_ratio))
@@ -0,0 +1,95 @@
+# app/benchmarks/bench_sentiment_engine.py
+"""
+Laporan selisih engine sentiment "vectorized" vs VADER asli pada reference set,
+plus waktu eksekusi keduanya.
+
+Jalankan dari folder be/:
+    python -m benchmarks.bench_sentiment_engine --csv data/disney.csv data/netflix.csv
+Tanpa --csv dipakai reference set sintetis yang sengaja penuh negasi, booster,
+idiom dan "but" (kasus yang paling mungkin berbeda).
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from routers.sentiment import clean_text, sia, vectorized_vader
+
+LABELS = ["positive", "neutral", "negative"]
+_MODIFIERS = [
+    "not", "never", "so", "this", "least", "at", "very", "kind", "of", "but", "sort", "just",
+    "enough", "the", "shit", "bomb", "bad", "ass", "yeah", "right", "cut", "mustard", "kiss",
+    "death", "hand", "to", "mouth", "extremely", "hardly", "dont", "isnt", "a", "i",
+]
+
+
+def make_reference_set(n: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    lexicon_words = [word for word in sia.lexicon if word.isalpha()]
+    return [
+        " ".join(
+            rng.choice(_MODIFIERS if rng.random() < 0.6 else lexicon_words)
+            for _ in range(rng.randint(0, 25))
+        )
+        for _ in range(n)
+    ]
+
+
+def label(compound: float) -> str:
+    if compound >= 0.05:
+        return "positive"
+    if compound <= -0.05:
+        return "negative"
+    return "neutral"
+
+
+def report(name: str, texts: List[str], show: int) -> None:
+    t0 = time.perf_counter()
+    reference = np.array([sia.polarity_scores(text)["compound"] for text in texts])
+    vader_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vectorized = vectorized_vader.compound_scores(texts)
+    vectorized_time = time.perf_counter() - t0
+
+    diff = np.abs(reference - vectorized)
+    ref_labels = [label(c) for c in reference.tolist()]
+    vec_labels = [label(c) for c in vectorized.tolist()]
+    confusion = Counter(zip(ref_labels, vec_labels))
+    label_mismatch = sum(count for (a, b), count in confusion.items() if a != b)
+
+    print(f"{name}: n={len(texts):,}")
+    print(
+        f"  time        vader={vader_time:7.3f}s  vectorized={vectorized_time:7.3f}s  "
+        f"speedup={vader_time / max(vectorized_time, 1e-9):6.1f}x"
+    )
+    print(
+        f"  compound    differ(>1e-4)={int((diff > 1e-4).sum()):,}  "
+        f"mean_abs={diff.mean():.6f}  max_abs={diff.max(initial=0.0):.4f}"
+    )
+    print(f"  label       agreement={1 - label_mismatch / max(len(texts), 1):.4%}  mismatches={label_mismatch:,}")
+    print("  confusion   (baris = vader, kolom = vectorized)")
+    print("              " + "".join(f"{b:>10}" for b in LABELS))
+    for a in LABELS:
+        print(f"  {a:>10}  " + "".join(f"{confusion.get((a, b), 0):>10,}" for b in LABELS))
+    for idx in np.flatnonzero(diff > 1e-4)[:show]:
+        print(f"    {texts[idx]!r}: vader={reference[idx]:+.4f} vectorized={vectorized[idx]:+.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", nargs="*", default=[], help="CSV export tweet (kolom full_text)")
+    parser.add_argument("--size", type=int, default=50_000, help="Jumlah teks reference set sintetis")
+    parser.add_argument("--show", type=int, default=5, help="Contoh teks yang berbeda yang ditampilkan")
+    args = parser.parse_args()
+
+    if args.csv:
+        for path in args.csv:
+            frame = pd.read_csv(path, usecols=["full_text"], dtype={"full_text": str})
+            report(path, [clean_text(text) for text in frame["full_text"].astype(str)], args.show)
+    else:
+        report("synthetic reference set", make_reference_set(args.size), args.show)
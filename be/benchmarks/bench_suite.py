@@ -0,0 +1,230 @@
+# app/benchmarks/bench_suite.py
+"""
+Benchmark ingestion end-to-end dengan CSV sintetis (benchmarks/synthetic.py):
+parse CSV, tiap analyzer (update per chunk + finalize), dan pipeline
+/api/upload-csv lengkap (process_csv_upload: analyzer + save model + rollup + tweet store).
+
+Tiap pengukuran jalan di proses baru (spawn) dengan folder models/ kosong,
+jadi peak RSS tidak tercampur pengukuran lain. Hasil (wall time, peak RSS,
+throughput) ditulis ke JSON; --baseline membandingkan dengan run sebelumnya.
+
+Jalankan dari folder be/ (butuh models/global_topic_model.pkl):
+    python -m benchmarks.bench_suite --sizes 10000 100000 1000000
+    python -m benchmarks.bench_suite --sizes 100000 --only upload --baseline benchmarks/results/before.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BE_DIR = Path(__file__).resolve().parents[1]
+if str(BE_DIR) not in sys.path:
+    sys.path.insert(0, str(BE_DIR))
+
+from benchmarks.synthetic import write_csv
+
+ANALYZERS = ["engagement", "sentiment", "topic", "hashtags"]
+BENCHMARKS = ["parse", *ANALYZERS, "upload"]
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _read_batches(csv_path: str, chunk_size: int):
+    import pandas as pd
+
+    from core.shared import TweetBatch
+    from routers.upload import _prepare_chunk
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size, dtype={"id_str": str}):
+        yield TweetBatch.from_dataframe(_prepare_chunk(chunk), default_username="bench")
+
+
+def _run_analyzer(name: str, csv_path: str, chunk_size: int, sentiment_engine: str) -> float:
+    """
+    Waktu update per chunk + finalize 1 analyzer (parse CSV tidak dihitung)
+    """
+    from routers.engagement import finalize_engagement_model, init_engagement_state, update_engagement_state
+    from routers.hashtags import finalize_hashtag_analysis, init_hashtag_state, update_hashtag_state
+    from routers.sentiment import finalize_sentiment_model, init_sentiment_state, update_sentiment_state
+    from routers.topics import finalize_topic_model, init_topic_state, topic_registry, update_topic_state
+
+    snapshot = topic_registry.get() if name == "topic" else None
+    init, update, finalize = {
+        "engagement": (init_engagement_state, update_engagement_state, finalize_engagement_model),
+        "sentiment": (
+            init_sentiment_state,
+            lambda state, batch: update_sentiment_state(state, batch, sentiment_engine),
+            lambda brand_id, name, state: finalize_sentiment_model(brand_id, name, state, sentiment_engine),
+        ),
+        "topic": (
+            init_topic_state,
+            lambda state, batch: update_topic_state(state, batch, snapshot),
+            lambda brand_id, name, state: finalize_topic_model(brand_id, name, state, snapshot),
+        ),
+        "hashtags": (init_hashtag_state, update_hashtag_state, finalize_hashtag_analysis),
+    }[name]
+
+    elapsed = 0.0
+    state = init()
+    for batch in _read_batches(csv_path, chunk_size):
+        start = time.perf_counter()
+        state = update(state, batch)
+        elapsed += time.perf_counter() - start
+    start = time.perf_counter()
+    finalize("bench", "Bench", state)
+    return elapsed + time.perf_counter() - start
+
+
+def _measure(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Dijalankan di proses spawn baru: cwd = folder kerja dengan models/ sendiri
+    """
+    os.chdir(task["workdir"])
+    # Import di sini: core.shared membuat store SQLite relatif ke cwd
+    from routers.upload import UPLOAD_CHUNK_SIZE, process_csv_upload
+
+    chunk_size = task["chunk_size"] or UPLOAD_CHUNK_SIZE
+    start_rss = _peak_rss_mb()
+    name = task["name"]
+    if name == "upload":
+        start = time.perf_counter()
+        with open(task["csv"], "rb") as source:
+            process_csv_upload(
+                source, "bench", "Bench", chunk_size=chunk_size,
+                workers=task["workers"], sentiment_engine=task["sentiment_engine"],
+            )
+        wall = time.perf_counter() - start
+    elif name == "parse":
+        start = time.perf_counter()
+        for _ in _read_batches(task["csv"], chunk_size):
+            pass
+        wall = time.perf_counter() - start
+    else:
+        wall = _run_analyzer(name, task["csv"], chunk_size, task["sentiment_engine"])
+
+    return {"wall_s": round(wall, 4), "peak_rss_mb": round(_peak_rss_mb(), 1), "start_rss_mb": round(start_rss, 1)}
+
+
+def _run_isolated(task: Dict[str, Any], topic_model: Path) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp(prefix="xinsight-bench-"))
+    try:
+        (workdir / "models").mkdir()
+        if topic_model.exists():
+            shutil.copy(topic_model, workdir / "models" / topic_model.name)
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return pool.submit(_measure, {**task, "workdir": str(workdir)}).result()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _print_row(result: Dict[str, Any], baseline: Optional[Dict[Any, Dict[str, Any]]]) -> None:
+    line = (
+        f"{result['name']:<11} rows={result['rows']:>9,}  wall={result['wall_s']:9.3f}s  "
+        f"peak_rss={result['peak_rss_mb']:8.1f}MB  {result['rows_per_s']:>11,.0f} rows/s"
+    )
+    previous = (baseline or {}).get((result["name"], result["rows"], result["workers"]))
+    if previous:
+        line += f"  vs baseline: {previous['wall_s'] / result['wall_s']:5.2f}x speed, " \
+                f"{result['peak_rss_mb'] - previous['peak_rss_mb']:+.1f}MB"
+    print(line, flush=True)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    baseline = None
+    if args.baseline:
+        previous = json.loads(Path(args.baseline).read_text())
+        baseline = {(r["name"], r["rows"], r["workers"]): r for r in previous["results"] if "error" not in r}
+
+    report = {
+        "environment": _environment(),
+        "config": {
+            "sizes": args.sizes, "seed": args.seed, "benchmarks": args.only, "workers": args.workers,
+            "chunk_size": args.chunk_size, "sentiment_engine": args.sentiment_engine, "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    for rows in args.sizes:
+        csv_path = args.data_dir / f"synthetic_{rows}_seed{args.seed}.csv"
+        if not csv_path.exists():
+            print(f"generate {csv_path} ...", flush=True)
+            write_csv(csv_path, rows, args.seed)
+        for name in args.only:
+            task = {
+                "name": name, "csv": str(csv_path.resolve()), "chunk_size": args.chunk_size,
+                "workers": args.workers if name == "upload" else 0, "sentiment_engine": args.sentiment_engine,
+            }
+            try:
+                runs = [_run_isolated(task, args.topic_model) for _ in range(args.repeat)]
+            except Exception as e:
+                # Mis. global topic model belum ada -> catat, lanjut benchmark lain
+                report["results"].append({"name": name, "rows": rows, "workers": task["workers"], "error": repr(e)})
+                print(f"{name:<11} rows={rows:>9,}  GAGAL: {e!r}", flush=True)
+                continue
+            # Ambil run tercepat dari --repeat (noise dari proses lain)
+            best = min(runs, key=lambda r: r["wall_s"])
+            result = {
+                "name": name,
+                "rows": rows,
+                "workers": task["workers"],
+                **best,
+                "rows_per_s": round(rows / best["wall_s"], 1) if best["wall_s"] > 0 else None,
+                "runs_wall_s": [r["wall_s"] for r in runs],
+            }
+            report["results"].append(result)
+            _print_row(result, baseline)
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2))
+    print(f"hasil: {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1, help="Ulangi tiap pengukuran, simpan yang tercepat")
+    parser.add_argument("--workers", type=int, default=0, help="?workers= untuk benchmark upload")
+    parser.add_argument("--chunk-size", type=int, default=0, help="0 = UPLOAD_CHUNK_SIZE")
+    parser.add_argument("--sentiment-engine", choices=["vader", "vectorized"], default="vader")
+    parser.add_argument("--data-dir", type=Path, default=BE_DIR / "benchmarks" / "data",
+                        help="Cache CSV sintetis (dibuat sekali per ukuran + seed)")
+    parser.add_argument("--topic-model", type=Path, default=BE_DIR / "models" / "global_topic_model.pkl")
+    parser.add_argument("--out", type=Path,
+                        default=BE_DIR / "benchmarks" / "results" / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    parser.add_argument("--baseline", type=Path, help="JSON hasil run sebelumnya untuk perbandingan")
+    run(parser.parse_args())
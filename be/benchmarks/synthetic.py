@@ -0,0 +1,159 @@
+# app/benchmarks/synthetic.py
+"""
+Generator CSV tweet sintetis untuk benchmark (kolom sama dengan export yang di-upload).
+
+- Teks: campuran kata positif / negatif / netral, panjang bervariasi, URL, &amp;, angka
+- Hashtag & mention: 0-3 per tweet, popularitas zipf (sedikit tag/user sangat sering)
+- Retweet: sebagian teks adalah "RT @user: <teks lain>" (duplikat, seperti data asli)
+- created_at: format Twitter ("Wed Mar 22 16:10:00 +0000 2023"), ramai di jam tertentu
+- favorite / retweet / reply / quote: heavy-tailed (pareto), beberapa tweet viral
+
+Deterministik per (seed, n): file yang sama untuk run yang bisa dibandingkan.
+
+Jalankan dari folder be/:
+    python -m benchmarks.synthetic --rows 100000 --out data/synthetic_100k.csv
+"""
+import argparse
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+POSITIVE_WORDS = [
+    "love", "great", "amazing", "best", "happy", "fun", "awesome", "beautiful", "magic", "perfect",
+    "excited", "enjoy", "brilliant", "favorite", "wonderful", "good", "nice", "cool", "thanks", "lol",
+]
+NEGATIVE_WORDS = [
+    "hate", "awful", "worst", "boring", "sad", "bad", "terrible", "disappointed", "angry", "annoying",
+    "expensive", "cancel", "broken", "slow", "waste", "ugh", "never", "not", "horrible", "crying",
+]
+NEUTRAL_WORDS = [
+    "movie", "park", "show", "ride", "episode", "season", "ticket", "family", "kids", "night",
+    "stream", "watch", "trailer", "new", "today", "weekend", "series", "app", "subscription", "price",
+    "the", "a", "this", "is", "so", "my", "and", "with", "just", "really", "very", "at", "to", "we",
+]
+TAG_WORDS = [
+    "Disney", "Netflix", "Marvel", "StarWars", "Pixar", "Stranger", "NowWatching", "Streaming",
+    "Movie", "Family", "Series", "Weekend", "Trailer", "Premiere", "Binge", "Animation",
+]
+
+CSV_COLUMNS = [
+    "id_str", "username", "full_text", "created_at",
+    "favorite_count", "retweet_count", "reply_count", "quote_count",
+]
+TWITTER_DATE_FORMAT = "%a %b %d %H:%M:%S +0000 %Y"
+
+# Bobot per jam (UTC): sepi dini hari, ramai sore - malam
+_HOUR_WEIGHTS = np.array([3, 2, 2, 1, 1, 1, 2, 3, 4, 5, 5, 6, 6, 6, 7, 7, 8, 9, 10, 10, 9, 7, 5, 4], dtype=float)
+_VOCAB = np.array(POSITIVE_WORDS + NEGATIVE_WORDS + NEUTRAL_WORDS, dtype=object)
+# Kata netral 2x lebih sering dari kata bersentimen
+_VOCAB_WEIGHTS = np.concatenate([
+    np.ones(len(POSITIVE_WORDS)), np.ones(len(NEGATIVE_WORDS)), np.full(len(NEUTRAL_WORDS), 2.0),
+])
+_VOCAB_WEIGHTS /= _VOCAB_WEIGHTS.sum()
+
+
+def _zipf_index(rng: np.random.Generator, size: int, n_items: int, a: float = 1.3) -> np.ndarray:
+    # zipf dipotong ke n_items (nilai di atasnya diputar ulang ke rentang)
+    return (rng.zipf(a, size) - 1) % n_items
+
+
+def _hashtag_pool(n_tags: int) -> np.ndarray:
+    base = [f"#{word}" for word in TAG_WORDS]
+    return np.array(base + [f"#{TAG_WORDS[i % len(TAG_WORDS)]}{i}" for i in range(n_tags - len(base))], dtype=object)
+
+
+def generate_chunk(
+    start: int,
+    n: int,
+    seed: int = 42,
+    days: int = 90,
+    n_tags: int = 2_000,
+    n_users: int = 50_000,
+    rt_ratio: float = 0.15,
+) -> pd.DataFrame:
+    """
+    Baris start..start+n. Tiap chunk punya RNG sendiri (seed, start) -> chunk bisa
+    dibuat terpisah dan hasilnya tetap sama dengan membuat seluruh file sekaligus.
+    """
+    rng = np.random.default_rng([seed, start])
+    tags = _hashtag_pool(n_tags)
+
+    lengths = np.clip(rng.lognormal(2.3, 0.5, n).astype(int), 3, 40)
+    words = rng.choice(_VOCAB, size=int(lengths.sum()), p=_VOCAB_WEIGHTS)
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    n_hashtags = rng.choice([0, 1, 2, 3], size=n, p=[0.35, 0.35, 0.2, 0.1])
+    hashtag_ids = _zipf_index(rng, int(n_hashtags.sum()), n_tags)
+    tag_bounds = np.concatenate([[0], np.cumsum(n_hashtags)])
+    n_mentions = rng.choice([0, 1, 2], size=n, p=[0.6, 0.3, 0.1])
+    mention_ids = _zipf_index(rng, int(n_mentions.sum()), n_users, a=1.2)
+    mention_bounds = np.concatenate([[0], np.cumsum(n_mentions)])
+    has_url = rng.random(n) < 0.25
+    has_amp = rng.random(n) < 0.05
+
+    texts: List[str] = []
+    for i in range(n):
+        parts = [f"@user{m}" for m in mention_ids[mention_bounds[i]:mention_bounds[i + 1]]]
+        parts.extend(words[bounds[i]:bounds[i + 1]])
+        if has_amp[i]:
+            parts.append("&amp;")
+        parts.extend(tags[hashtag_ids[tag_bounds[i]:tag_bounds[i + 1]]])
+        if has_url[i]:
+            parts.append(f"https://t.co/{(start + i) * 2654435761 % 16**10:010x}")
+        texts.append(" ".join(parts))
+
+    # Retweet: salin teks tweet lain di chunk yang sama
+    is_rt = np.flatnonzero(rng.random(n) < rt_ratio)
+    sources = rng.integers(0, n, len(is_rt))
+    rt_users = _zipf_index(rng, len(is_rt), n_users, a=1.2)
+    for i, source, user in zip(is_rt.tolist(), sources.tolist(), rt_users.tolist()):
+        texts[i] = f"RT @user{user}: {texts[source]}"
+
+    start_ts = pd.Timestamp("2023-01-01", tz="UTC").value // 10**9
+    day = rng.integers(0, days, n)
+    hour = rng.choice(24, size=n, p=_HOUR_WEIGHTS / _HOUR_WEIGHTS.sum())
+    seconds = start_ts + day * 86400 + hour * 3600 + rng.integers(0, 3600, n)
+    created_at = pd.to_datetime(seconds, unit="s").strftime(TWITTER_DATE_FORMAT)
+
+    # Engagement heavy-tailed: "viralitas" pareto, tiap metrik turunan darinya
+    virality = rng.pareto(1.3, n) + 1
+    favorite = np.floor(virality * rng.lognormal(1.0, 0.8, n)).astype(np.int64)
+    retweet = np.floor(favorite * rng.beta(2, 8, n)).astype(np.int64)
+    reply = np.floor(virality * rng.exponential(0.8, n)).astype(np.int64)
+    quote = np.floor(retweet * rng.beta(1, 15, n)).astype(np.int64)
+
+    return pd.DataFrame({
+        "id_str": [str(1_600_000_000_000_000_000 + start + i) for i in range(n)],
+        "username": [f"user{u}" for u in _zipf_index(rng, n, n_users, a=1.1)],
+        "full_text": texts,
+        "created_at": created_at,
+        "favorite_count": favorite,
+        "retweet_count": retweet,
+        "reply_count": reply,
+        "quote_count": quote,
+    }, columns=CSV_COLUMNS)
+
+
+def write_csv(path: Path, rows: int, seed: int = 42, chunk_rows: int = 100_000) -> Path:
+    """
+    Tulis CSV per chunk (memori tetap kecil untuk jutaan baris)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        for start in range(0, rows, chunk_rows):
+            chunk = generate_chunk(start, min(chunk_rows, rows - start), seed)
+            chunk.to_csv(f, index=False, header=start == 0)
+    tmp_path.replace(path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+    print(write_csv(args.out, args.rows, args.seed))
@@ -0,0 +1,152 @@
+# app/core/brand_state.py
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+import pickle
+import sqlite3
+import threading
+import uuid
+
+
+class BrandStateStore:
+    """
+    State agregat analyzer per brand (hasil update_*_state) + id_str yang sudah
+    pernah dianalisis. Dipakai upload mode append: state lama di-merge dengan
+    tweet baru saja, jadi biaya upload ikut jumlah tweet baru, bukan total histori.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._brand_locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS analyzer_state (
+                    brand_id TEXT NOT NULL,
+                    analyzer TEXT NOT NULL,
+                    state BLOB NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (brand_id, analyzer)
+                );
+                CREATE TABLE IF NOT EXISTS seen_tweets (
+                    brand_id TEXT NOT NULL,
+                    id_str TEXT NOT NULL,
+                    PRIMARY KEY (brand_id, id_str)
+                ) WITHOUT ROWID;
+                -- id upload yang sedang berjalan, dipindah ke seen_tweets saat commit
+                CREATE TABLE IF NOT EXISTS staged_tweets (
+                    upload_key TEXT NOT NULL,
+                    id_str TEXT NOT NULL,
+                    PRIMARY KEY (upload_key, id_str)
+                ) WITHOUT ROWID;
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def lock(self, brand_id: str) -> Iterator[None]:
+        """
+        1 upload per brand dalam satu waktu (load state -> merge -> commit)
+        """
+        with self._locks_lock:
+            brand_lock = self._brand_locks.setdefault(brand_id, threading.Lock())
+        with brand_lock:
+            yield
+
+    def load_states(self, brand_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        analyzer -> state, atau None kalau brand belum punya state tersimpan
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT analyzer, state FROM analyzer_state WHERE brand_id = ?", (brand_id,)
+            ).fetchall()
+        if not rows:
+            return None
+        return {analyzer: pickle.loads(state) for analyzer, state in rows}
+
+    def has_state(self, brand_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM analyzer_state WHERE brand_id = ? LIMIT 1", (brand_id,)).fetchone()
+        return row is not None
+
+    @staticmethod
+    def new_upload_key() -> str:
+        return uuid.uuid4().hex
+
+    def seen_ids(self, brand_id: str, ids: Iterable[str], upload_key: Optional[str] = None) -> Set[str]:
+        """
+        Subset dari ids yang sudah pernah dianalisis, di upload sebelumnya atau
+        (upload_key) di chunk sebelumnya upload ini. Lookup per id lewat primary key.
+        """
+        with self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE incoming (id_str TEXT PRIMARY KEY)")
+            conn.executemany("INSERT OR IGNORE INTO incoming (id_str) VALUES (?)", ((i,) for i in ids))
+            rows = conn.execute(
+                """
+                SELECT incoming.id_str FROM incoming
+                JOIN seen_tweets ON seen_tweets.brand_id = ? AND seen_tweets.id_str = incoming.id_str
+                UNION
+                SELECT incoming.id_str FROM incoming
+                JOIN staged_tweets ON staged_tweets.upload_key = ? AND staged_tweets.id_str = incoming.id_str
+                """,
+                (brand_id, upload_key),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def stage_ids(self, upload_key: str, ids: Iterable[str]) -> None:
+        """
+        Simpan id 1 chunk di staging (disk, bukan set di memori selama upload)
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO staged_tweets (upload_key, id_str) VALUES (?, ?)",
+                ((upload_key, i) for i in ids),
+            )
+
+    def discard(self, upload_key: str) -> None:
+        """
+        Upload gagal -> buang id yang sudah di-stage (no-op setelah commit)
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM staged_tweets WHERE upload_key = ?", (upload_key,))
+
+    def commit(
+        self,
+        brand_id: str,
+        states: Dict[str, Dict[str, Any]],
+        upload_key: str,
+        replace: bool = False,
+    ) -> None:
+        """
+        Simpan state + pindahkan id yang di-stage upload_key ke seen_tweets dalam 1 transaksi.
+        replace=True (upload biasa) -> histori id brand diganti isi upload ini.
+        """
+        updated_at = datetime.now().isoformat()
+        with self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM seen_tweets WHERE brand_id = ?", (brand_id,))
+            conn.execute(
+                "INSERT OR IGNORE INTO seen_tweets (brand_id, id_str) "
+                "SELECT ?, id_str FROM staged_tweets WHERE upload_key = ?",
+                (brand_id, upload_key),
+            )
+            conn.execute("DELETE FROM staged_tweets WHERE upload_key = ?", (upload_key,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO analyzer_state (brand_id, analyzer, state, updated_at) VALUES (?, ?, ?, ?)",
+                [
+                    (brand_id, analyzer, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), updated_at)
+                    for analyzer, state in states.items()
+                ],
+            )
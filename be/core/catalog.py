@@ -0,0 +1,233 @@
+# app/core/catalog.py
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+import json
+import os
+import re
+import threading
+
+from core.comparison import summarize_model
+from core.model_store import atomic_write
+
+MODEL_FILE_PATTERN = re.compile(r"(.+?)_(engagement|sentiment|topic|hashtags)_model\.pkl")
+
+
+def _model_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Metadata kecil dari 1 model: brand_name, created_at, total_tweets
+    """
+    meta = data.get("meta", {}) if isinstance(data.get("meta"), dict) else {}
+    payload = data.get("data")
+    total_tweets = payload.get("total_tweets") if isinstance(payload, dict) else None
+    return {
+        "brand_name": data.get("brand_name") or meta.get("brand_name"),
+        "created_at": data.get("created_at"),
+        "total_tweets": total_tweets,
+    }
+
+
+class BrandCatalog:
+    """
+    Manifest brand (models/catalog.json) yang di-update setiap save_model.
+    /api/brands dan /api/list-models dibaca dari sini tanpa unpickle model apa pun.
+    File .pkl yang muncul/hilang di luar save_model disinkronkan saat dibaca
+    (model di backend sqlite hanya berubah lewat save_model).
+    """
+
+    def __init__(self, path: Path, loader: Callable[[Path], Any]):
+        self.path = path
+        self.models_dir = path.parent
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._file_version = None
+
+    # ---------- persistence ----------
+    def _stat_version(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _load(self) -> Dict[str, Any]:
+        # Re-read kalau file diubah proses lain (mis. worker uvicorn lain)
+        version = self._stat_version()
+        if self._data is not None and version == self._file_version:
+            return self._data
+        if version is None:
+            self._data = {"brands": {}, "other_files": {}}
+        else:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        self._file_version = version
+        return self._data
+
+    def _write(self) -> None:
+        atomic_write(
+            self.path, lambda f: json.dump(self._data, f, ensure_ascii=False, indent=1), mode="w", encoding="utf-8"
+        )
+        self._file_version = self._stat_version()
+
+    # ---------- update ----------
+    def _put(
+        self,
+        brand_id: str,
+        model_type: str,
+        data: Dict[str, Any],
+        path: str,
+        size_bytes: int,
+        store: str = "pickle",
+    ) -> None:
+        catalog = self._load()
+        summary = _model_summary(data)
+        brand = catalog["brands"].setdefault(
+            brand_id,
+            {"brand_id": brand_id, "brand_name": None, "total_tweets": 0, "created_at": None, "models": {}},
+        )
+        if summary["brand_name"]:
+            brand["brand_name"] = summary["brand_name"]
+        if model_type == "engagement" and summary["total_tweets"] is not None:
+            brand["total_tweets"] = summary["total_tweets"]
+        if summary["created_at"] and (brand["created_at"] is None or summary["created_at"] > brand["created_at"]):
+            brand["created_at"] = summary["created_at"]
+        brand["models"][model_type] = {
+            # Backend sqlite tidak punya file per model -> nama logis
+            "filename": Path(path).name if store == "pickle" else f"{brand_id}_{model_type}_model",
+            "path": path,
+            "store": store,
+            "size_bytes": size_bytes,
+            "created_at": summary["created_at"],
+            "total_tweets": summary["total_tweets"],
+            # Angka ringkas untuk /api/brands/comparison (lihat core/comparison.py)
+            "summary": summarize_model(model_type, data),
+        }
+        brand["updated_at"] = datetime.now().isoformat()
+
+    def record(
+        self,
+        brand_id: str,
+        model_type: str,
+        data: Dict[str, Any],
+        path: str,
+        size_bytes: int,
+        store: str = "pickle",
+    ) -> None:
+        """
+        Dipanggil save_model setelah model ditulis ke model store
+        """
+        with self._lock:
+            self._put(brand_id, model_type, data, path, size_bytes, store)
+            catalog = self._load()
+            if store == "pickle":
+                catalog["other_files"].pop(Path(path).name, None)
+            self._write()
+
+    def update_summaries(self, summaries: Dict[Tuple[str, str], Dict[str, Any]]) -> None:
+        """
+        Backfill ringkasan perbandingan untuk entry catalog lama (1x tulis)
+        """
+        with self._lock:
+            catalog = self._load()
+            for (brand_id, model_type), summary in summaries.items():
+                model = catalog["brands"].get(brand_id, {}).get("models", {}).get(model_type)
+                if model is not None:
+                    model["summary"] = summary
+            self._write()
+
+    def version(self):
+        """
+        Versi file catalog.json terakhir dibaca / ditulis (berubah setiap save_model)
+        """
+        with self._lock:
+            return self._file_version
+
+    @staticmethod
+    def _stored_elsewhere(catalog: Dict[str, Any], brand_id: str, model_type: str) -> bool:
+        model = catalog["brands"].get(brand_id, {}).get("models", {}).get(model_type)
+        return model is not None and model.get("store", "pickle") != "pickle"
+
+    def sync(self) -> Dict[str, Any]:
+        """
+        Samakan manifest dengan isi folder (cuma listing + stat).
+        File baru di-index sekali (unpickle), file yang hilang dihapus dari manifest.
+        """
+        with self._lock:
+            catalog = self._load()
+            on_disk = {p.name: p for p in self.models_dir.glob("*.pkl")}
+            known = {
+                m["filename"]
+                for b in catalog["brands"].values()
+                for m in b["models"].values()
+                if m.get("store", "pickle") == "pickle"
+            } | set(catalog["other_files"])
+            changed = False
+
+            for name in sorted(set(on_disk) - known):
+                changed = True
+                path = on_disk[name]
+                match = MODEL_FILE_PATTERN.fullmatch(name)
+                if match and self._stored_elsewhere(catalog, match.group(1), match.group(2)):
+                    # .pkl lama yang sudah dimigrasi ke sqlite -> bukan sumber data lagi
+                    match = None
+                data = None
+                if match:
+                    try:
+                        data = self._loader(path)
+                    except Exception:
+                        data = None
+                if match and isinstance(data, dict):
+                    self._put(match.group(1), match.group(2), data, str(path), path.stat().st_size)
+                else:
+                    # Bukan model brand (mis. global_topic_model.pkl)
+                    catalog["other_files"][name] = {"size_bytes": path.stat().st_size}
+
+            for brand_id, brand in list(catalog["brands"].items()):
+                for model_type, model in list(brand["models"].items()):
+                    if model.get("store", "pickle") == "pickle" and model["filename"] not in on_disk:
+                        del brand["models"][model_type]
+                        changed = True
+                if not brand["models"]:
+                    del catalog["brands"][brand_id]
+            for name in list(catalog["other_files"]):
+                if name not in on_disk:
+                    del catalog["other_files"][name]
+                    changed = True
+
+            if changed:
+                self._write()
+            return catalog
+
+    def model_created_at(self, brand_id: str, model_type: str) -> Optional[str]:
+        """
+        created_at model dari manifest (tanpa sync folder, cukup stat catalog.json)
+        """
+        with self._lock:
+            model = self._load()["brands"].get(brand_id, {}).get("models", {}).get(model_type)
+        return model.get("created_at") if model else None
+
+    def brands(self) -> Dict[str, Dict[str, Any]]:
+        return self.sync()["brands"]
+
+    def model_files(self) -> Dict[str, Dict[str, Any]]:
+        """
+        filename -> {path, store, size_bytes} untuk semua model brand + file .pkl lain
+        """
+        catalog = self.sync()
+        files = {
+            m["filename"]: {
+                "path": m.get("path", str(self.models_dir / m["filename"])),
+                "store": m.get("store", "pickle"),
+                "size_bytes": m["size_bytes"],
+            }
+            for b in catalog["brands"].values()
+            for m in b["models"].values()
+        }
+        files.update(
+            {
+                name: {"path": str(self.models_dir / name), "store": "pickle", "size_bytes": f["size_bytes"]}
+                for name, f in catalog["other_files"].items()
+            }
+        )
+        return files
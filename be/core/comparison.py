@@ -0,0 +1,224 @@
+# app/core/comparison.py
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import threading
+
+import numpy as np
+
+# Jumlah topik / hashtag teratas per brand yang disimpan di ringkasan catalog
+COMPARISON_TOP_TOPICS = 5
+COMPARISON_TOP_HASHTAGS = 10
+
+# metric -> (model_type, key di ringkasan model)
+COMPARISON_METRICS: Dict[str, Tuple[str, str]] = {
+    "followers": ("engagement", "followers"),
+    "total_tweets": ("engagement", "total_tweets"),
+    "total_engagement": ("engagement", "total_engagement"),
+    "avg_engagement": ("engagement", "avg_engagement"),
+    "engagement_rate": ("engagement", "engagement_rate"),
+    "positive_pct": ("sentiment", "positive_pct"),
+    "neutral_pct": ("sentiment", "neutral_pct"),
+    "negative_pct": ("sentiment", "negative_pct"),
+    "average_compound_score": ("sentiment", "average_compound_score"),
+    "unique_hashtags": ("hashtags", "unique_hashtags"),
+}
+# Rank 1 = nilai tertinggi, kecuali metric ini (rank 1 = terendah)
+LOWER_IS_BETTER = {"negative_pct"}
+# Metric berupa hitungan -> int di response (tabel internal float64 supaya bisa NaN)
+COUNT_METRICS = {"followers", "total_tweets", "total_engagement", "unique_hashtags"}
+
+
+def summarize_model(model_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ringkasan kecil 1 model untuk tabel perbandingan (disimpan di catalog.json
+    setiap save_model, jadi perbandingan tidak perlu load model sama sekali).
+    """
+    payload = data.get("data")
+    if model_type == "engagement" and isinstance(payload, dict):
+        keys = ["followers", "total_tweets", "total_engagement", "avg_engagement", "engagement_rate"]
+        return {key: payload[key] for key in keys if key in payload}
+    if model_type == "sentiment" and isinstance(payload, dict):
+        keys = ["positive_pct", "neutral_pct", "negative_pct", "average_compound_score"]
+        return {key: payload[key] for key in keys if key in payload}
+    if model_type == "topic" and isinstance(payload, dict):
+        topics = sorted(payload.get("topics", []), key=lambda t: t.get("tweet_count", 0), reverse=True)
+        return {
+            "top_topics": [
+                {"label": t.get("label"), "tweet_count": t.get("tweet_count", 0)}
+                for t in topics[:COMPARISON_TOP_TOPICS]
+            ]
+        }
+    if model_type == "hashtags" and isinstance(payload, list):
+        # data sudah urut count DESC
+        return {
+            "unique_hashtags": data.get("meta", {}).get("unique_hashtags", len(payload)),
+            "top_hashtags": [
+                {"hashtag": h["hashtag"], "count": h["count"]} for h in payload[:COMPARISON_TOP_HASHTAGS]
+            ],
+        }
+    return {}
+
+
+class ComparisonTable:
+    """
+    Tabel kolom (metric x brand, float64, NaN = model belum ada) dari ringkasan catalog.
+    Perbandingan subset brand = slicing + argsort numpy, tanpa loop per brand per metric.
+    """
+
+    def __init__(self, brands: Dict[str, Dict[str, Any]], default_followers: Optional[Dict[str, int]] = None):
+        self.brand_ids = sorted(brands)
+        self.index = {brand_id: i for i, brand_id in enumerate(self.brand_ids)}
+        self.metric_names = list(COMPARISON_METRICS)
+        self.metric_index = {name: i for i, name in enumerate(self.metric_names)}
+        self.values = np.full((len(self.metric_names), len(self.brand_ids)), np.nan)
+        self.brand_names: List[Optional[str]] = []
+        self.top_topics: List[List[Dict[str, Any]]] = []
+        self.top_hashtags: List[List[Dict[str, Any]]] = []
+
+        for col, brand_id in enumerate(self.brand_ids):
+            brand = brands[brand_id]
+            summaries = {
+                model_type: model.get("summary") or {} for model_type, model in brand.get("models", {}).items()
+            }
+            for row, (model_type, key) in enumerate(COMPARISON_METRICS.values()):
+                value = summaries.get(model_type, {}).get(key)
+                if value is not None:
+                    self.values[row, col] = value
+            self.brand_names.append(brand.get("brand_name"))
+            self.top_topics.append(summaries.get("topic", {}).get("top_topics", []))
+            self.top_hashtags.append(summaries.get("hashtags", {}).get("top_hashtags", []))
+
+        # Model engagement lama tanpa followers -> angka default per brand
+        followers = self.values[self.metric_index["followers"]]
+        for brand_id, count in (default_followers or {}).items():
+            col = self.index.get(brand_id)
+            if col is not None and np.isnan(followers[col]):
+                followers[col] = count
+
+    def compare(
+        self,
+        brand_ids: Sequence[str],
+        metrics: Sequence[str],
+        baseline: Optional[str] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Nilai, rank (1 = terbaik di subset), selisih vs baseline (brand atau rata-rata
+        subset) per metric. brand_ids / metrics sudah divalidasi pemanggil.
+        """
+        cols = np.array([self.index[brand_id] for brand_id in brand_ids], dtype=np.intp)
+        rows = np.array([self.metric_index[name] for name in metrics], dtype=np.intp)
+        values = self.values[np.ix_(rows, cols)]
+        missing = np.isnan(values)
+
+        # Rank per metric: urut DESC (ASC untuk LOWER_IS_BETTER), NaN selalu terakhir
+        sign = np.array([1.0 if name in LOWER_IS_BETTER else -1.0 for name in metrics])[:, None]
+        keys = np.where(missing, np.inf, values * sign)
+        order = np.argsort(keys, axis=1, kind="stable")
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, len(cols) + 1)[None, :], axis=1)
+
+        if baseline is not None:
+            base = values[:, list(brand_ids).index(baseline)]
+        else:
+            # Rata-rata subset tanpa NaN (brand yang belum punya model tidak ikut)
+            counts = (~missing).sum(axis=1)
+            base = np.where(counts > 0, np.nansum(values, axis=1) / np.maximum(counts, 1), np.nan)
+        delta = values - base[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta_pct = np.where(base[:, None] != 0, delta / np.abs(base[:, None]) * 100, np.nan)
+
+        # Urutan baris output: sesuai request, atau rank di metric sort
+        positions = np.arange(len(cols))
+        if sort is not None:
+            positions = order[list(metrics).index(sort)]
+        if limit is not None:
+            positions = positions[:limit]
+
+        def column(matrix: np.ndarray, digits: Optional[int] = None) -> List[List[Any]]:
+            # 1x tolist() per matriks, NaN -> None
+            rounded = np.round(matrix, digits) if digits is not None else matrix
+            return [[None if v != v else v for v in row] for row in rounded.tolist()]
+
+        values_out, delta_out, pct_out = column(values), column(delta, 4), column(delta_pct, 2)
+        for i, name in enumerate(metrics):
+            if name in COUNT_METRICS:
+                values_out[i] = [None if v is None else int(v) for v in values_out[i]]
+        ranks_out = np.where(missing, 0, ranks).tolist()
+
+        brands = []
+        for pos in positions.tolist():
+            col = int(cols[pos])
+            brands.append({
+                "brand_id": self.brand_ids[col],
+                "brand_name": self.brand_names[col],
+                "metrics": {name: values_out[i][pos] for i, name in enumerate(metrics)},
+                "rank": {name: ranks_out[i][pos] or None for i, name in enumerate(metrics)},
+                "delta": {name: delta_out[i][pos] for i, name in enumerate(metrics)},
+                "delta_pct": {name: pct_out[i][pos] for i, name in enumerate(metrics)},
+                "top_topics": self.top_topics[col],
+                "top_hashtags": self.top_hashtags[col],
+            })
+
+        leaders = {
+            name: (brand_ids[order[i, 0]] if len(cols) and not missing[i, order[i, 0]] else None)
+            for i, name in enumerate(metrics)
+        }
+        # Hashtag yang masuk top list >= 2 brand di subset
+        shared = Counter(h["hashtag"] for col in cols.tolist() for h in self.top_hashtags[col])
+        return {
+            "baseline": baseline or "mean",
+            "baseline_values": dict(zip(metrics, column(base[None, :], 4)[0])),
+            "leaders": leaders,
+            "shared_hashtags": [
+                {"hashtag": tag, "brands": count} for tag, count in shared.most_common(COMPARISON_TOP_HASHTAGS) if count > 1
+            ],
+            "brands": brands,
+        }
+
+
+class ComparisonIndex:
+    """
+    ComparisonTable yang dibangun ulang hanya kalau catalog.json berubah (save_model).
+    Brand dari catalog lama tanpa ringkasan di-backfill sekali lewat loader(brand_id, model_type).
+    """
+
+    def __init__(
+        self,
+        catalog,
+        loader: Callable[[str, str], Dict[str, Any]],
+        default_followers: Optional[Dict[str, int]] = None,
+    ):
+        self.catalog = catalog
+        self._loader = loader
+        self._default_followers = default_followers
+        self._lock = threading.Lock()
+        self._table: Optional[ComparisonTable] = None
+        self._version = None
+
+    def _backfill(self, brands: Dict[str, Dict[str, Any]]) -> bool:
+        summaries = {}
+        for brand_id, brand in brands.items():
+            for model_type, model in brand.get("models", {}).items():
+                if "summary" in model:
+                    continue
+                try:
+                    summaries[(brand_id, model_type)] = summarize_model(model_type, self._loader(brand_id, model_type))
+                except Exception:
+                    # Model rusak / hilang -> catat ringkasan kosong, tidak dicoba terus
+                    summaries[(brand_id, model_type)] = {}
+        if summaries:
+            self.catalog.update_summaries(summaries)
+        return bool(summaries)
+
+    def table(self) -> ComparisonTable:
+        with self._lock:
+            brands = self.catalog.brands()
+            if self._backfill(brands):
+                brands = self.catalog.brands()
+            version = self.catalog.version()
+            if self._table is None or version != self._version:
+                self._table = ComparisonTable(brands, self._default_followers)
+                self._version = version
+            return self._table
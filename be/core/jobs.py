@@ -0,0 +1,169 @@
+# app/core/jobs.py
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from fastapi import HTTPException
+import threading
+import time
+import uuid
+
+from core.metrics import STAGE_ROWS, STAGE_SECONDS, registry
+
+# Jumlah upload yang dianalisis bersamaan di background
+JOB_WORKERS = 2
+# Job yang sudah selesai disimpan di memori, yang paling lama dibuang duluan
+MAX_FINISHED_JOBS = 100
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="upload-job")
+_jobs: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def create_job(kind: str, stages: List[str], meta: Optional[Dict[str, Any]] = None) -> str:
+    job_id = uuid.uuid4().hex
+    job = {
+        "job_id": job_id,
+        "kind": kind,
+        "state": "queued",
+        "progress": 0.0,
+        "meta": dict(meta or {}),
+        "stages": {
+            name: {"state": "pending", "rows": 0, "duration_s": 0.0}
+            for name in stages
+        },
+        "created_at": datetime.now().isoformat(),
+        "started_at": None,
+        "finished_at": None,
+        "duration_s": None,
+        "result": None,
+        "error": None,
+    }
+    with _lock:
+        _jobs[job_id] = job
+        _evict_finished_jobs()
+    return job_id
+
+
+def _evict_finished_jobs() -> None:
+    finished = [j for j in _jobs.values() if j["state"] in ("done", "failed")]
+    if len(finished) <= MAX_FINISHED_JOBS:
+        return
+    finished.sort(key=lambda j: j["finished_at"])
+    for job in finished[: len(finished) - MAX_FINISHED_JOBS]:
+        _jobs.pop(job["job_id"], None)
+
+
+def _snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot = dict(job)
+    snapshot["stages"] = {name: dict(stage) for name, stage in job["stages"].items()}
+    return snapshot
+
+
+def get_job(job_id: str) -> Dict[str, Any]:
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' tidak ditemukan")
+        return _snapshot(job)
+
+
+def list_jobs() -> List[Dict[str, Any]]:
+    with _lock:
+        jobs = [_snapshot(j) for j in _jobs.values()]
+    return sorted(jobs, key=lambda j: j["created_at"], reverse=True)
+
+
+def set_progress(job_id: Optional[str], progress: float) -> None:
+    if job_id is None:
+        return
+    with _lock:
+        if job_id in _jobs:
+            _jobs[job_id]["progress"] = round(min(max(progress, 0.0), 1.0), 4)
+
+
+@contextmanager
+def track_stage(job_id: Optional[str], stage: str, rows: int = 0, metric_stage: Optional[str] = None):
+    """
+    Catat durasi + jumlah baris untuk 1 stage. Stage yang dipanggil berulang
+    (per chunk) dijumlahkan. Yield dict counter, jadi jumlah baris bisa diisi
+    setelah diketahui (counters["rows"] = n). Durasi selalu masuk /metrics
+    (label metric_stage kalau diisi, mis. finalize dipisah dari update per chunk);
+    job_id None -> tidak dicatat di job.
+    """
+    counters = {"rows": rows}
+    entry = None
+    if job_id is not None:
+        with _lock:
+            entry = _jobs[job_id]["stages"].setdefault(stage, {"state": "pending", "rows": 0, "duration_s": 0.0})
+            entry["state"] = "running"
+    start = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=metric_stage or stage)
+        STAGE_ROWS.inc(counters["rows"], stage=metric_stage or stage)
+        if entry is not None:
+            with _lock:
+                entry["duration_s"] = round(entry["duration_s"] + elapsed, 4)
+                entry["rows"] += counters["rows"]
+
+
+def record_stage(job_id: Optional[str], stage: str, rows: int, duration_s: float) -> None:
+    """
+    Tambahkan durasi yang diukur di tempat lain (mis. di worker proses) ke 1 stage
+    """
+    STAGE_SECONDS.observe(duration_s, stage=stage)
+    STAGE_ROWS.inc(rows, stage=stage)
+    if job_id is None:
+        return
+    with _lock:
+        entry = _jobs[job_id]["stages"].setdefault(stage, {"state": "pending", "rows": 0, "duration_s": 0.0})
+        entry["state"] = "running"
+        entry["duration_s"] = round(entry["duration_s"] + duration_s, 4)
+        entry["rows"] += rows
+
+
+def complete_stage(job_id: Optional[str], stage: str) -> None:
+    if job_id is None:
+        return
+    with _lock:
+        _jobs[job_id]["stages"][stage]["state"] = "done"
+
+
+def _run_job(job_id: str, fn: Callable[..., Any], args, kwargs) -> None:
+    with _lock:
+        job = _jobs[job_id]
+        job["state"] = "running"
+        job["started_at"] = datetime.now().isoformat()
+    start = time.perf_counter()
+    try:
+        result = fn(*args, job_id=job_id, **kwargs)
+        update = {"state": "done", "progress": 1.0, "result": result}
+    except Exception as e:
+        update = {"state": "failed", "error": getattr(e, "detail", None) or str(e)}
+
+    update["finished_at"] = datetime.now().isoformat()
+    update["duration_s"] = round(time.perf_counter() - start, 4)
+    with _lock:
+        job.update(update)
+
+
+def _job_metrics():
+    with _lock:
+        states = [job["state"] for job in _jobs.values()]
+    return [(
+        "xinsight_jobs", "gauge", "Job upload di memori per state",
+        [({"state": state}, states.count(state)) for state in ("queued", "running", "done", "failed")],
+    )]
+
+
+registry.register_collector(_job_metrics)
+
+
+def submit_job(job_id: str, fn: Callable[..., Any], *args, **kwargs) -> None:
+    """
+    Jalankan fn(*args, job_id=job_id, **kwargs) di worker pool.
+    """
+    _executor.submit(_run_job, job_id, fn, args, kwargs)
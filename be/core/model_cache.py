@@ -0,0 +1,99 @@
+# app/core/model_cache.py
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+import threading
+
+# Budget memori cache model (perkiraan = ukuran file .pkl di disk)
+MODEL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ModelCache:
+    """
+    Cache LRU untuk model yang sudah di-load dari model store.
+    Entry dianggap basi kalau versinya berubah (mtime/size/inode file .pkl, atau
+    nomor versi di SQLite), atau di-invalidate oleh save_model.
+    Object yang dikembalikan dipakai bersama -> pemanggil tidak boleh mengubahnya.
+    """
+
+    def __init__(self, max_bytes: int = MODEL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # key -> (versi, ukuran, object)
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, ...], int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str, version: Tuple[int, ...], size: int, loader: Callable[[], Any]) -> Any:
+        """
+        Ambil model dari cache; kalau miss/basi, panggil loader() lalu simpan.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                self._drop(key)
+                self.invalidations += 1
+            self.misses += 1
+
+        value = loader()
+
+        if size <= self.max_bytes:
+            with self._lock:
+                if key in self._entries:
+                    self._drop(key)
+                self._entries[key] = (version, size, value)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    oldest = next(iter(self._entries))
+                    self._drop(oldest)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def metrics(self) -> List[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]:
+        """
+        Collector untuk GET /metrics (lihat core/metrics.py)
+        """
+        stats = self.stats()
+        return [
+            ("xinsight_model_cache_hits_total", "counter", "Load model yang dilayani dari cache", [({}, stats["hits"])]),
+            ("xinsight_model_cache_misses_total", "counter", "Load model yang membaca model store", [({}, stats["misses"])]),
+            ("xinsight_model_cache_evictions_total", "counter", "Entry dibuang karena budget memori", [({}, stats["evictions"])]),
+            ("xinsight_model_cache_invalidations_total", "counter", "Entry basi / di-invalidate save_model", [({}, stats["invalidations"])]),
+            ("xinsight_model_cache_entries", "gauge", "Jumlah model di cache", [({}, stats["entries"])]),
+            ("xinsight_model_cache_bytes", "gauge", "Perkiraan ukuran cache (byte)", [({}, stats["bytes"])]),
+        ]
@@ -0,0 +1,236 @@
+# app/core/model_store.py
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import json
+import os
+import pickle
+import sqlite3
+import tempfile
+
+# Backend penyimpanan model brand: "pickle" (1 file .pkl per model) atau "sqlite"
+MODEL_STORE_BACKEND = os.environ.get("MODEL_STORE_BACKEND", "pickle")
+
+
+def _current_umask() -> int:
+    # umask hanya bisa dibaca dengan mengubahnya -> cukup sekali saat import
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Permission file hasil atomic_write = sama dengan open(path, "w") biasa
+_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def atomic_write(path: Path, write: Callable[[IO], Any], mode: str = "wb", encoding: Optional[str] = None) -> None:
+    """
+    Tulis ke file sementara di folder yang sama, fsync, lalu os.replace -> pembaca
+    tidak pernah lihat file setengah jadi. mkstemp membuat file 0600, jadi permission
+    dikembalikan ke default umask sebelum replace (backup / service lain tetap bisa baca).
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            os.fchmod(f.fileno(), _FILE_MODE)
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def pick_fields(model: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Ambil sebagian field dari model. Field bertingkat pakai titik, mis. "data.top_tweets".
+    Field yang tidak ada dilewati (pemanggil pakai .get dengan default).
+    """
+    result: Dict[str, Any] = {}
+    for field in fields:
+        head, _, rest = field.partition(".")
+        if head not in model:
+            continue
+        if rest and isinstance(model[head], dict):
+            if rest in model[head]:
+                result.setdefault(head, {})[rest] = model[head][rest]
+        else:
+            result[head] = model[head]
+    return result
+
+
+class PickleModelStore:
+    """
+    Format lama: seluruh dict model di-pickle ke models/{brand}_{type}_model.pkl
+    """
+
+    name = "pickle"
+
+    def __init__(self, models_dir: Path):
+        self.models_dir = models_dir
+
+    def path(self, brand_id: str, model_type: str) -> Path:
+        return self.models_dir / f"{brand_id}_{model_type}_model.pkl"
+
+    def version(self, brand_id: str, model_type: str) -> Tuple[str, Tuple[int, ...], int]:
+        """
+        (cache key, versi, ukuran byte). FileNotFoundError kalau model tidak ada.
+        """
+        path = self.path(brand_id, model_type)
+        stat = os.stat(path)
+        # save() menulis lewat os.replace -> inode ikut berubah
+        return str(path), (stat.st_mtime_ns, stat.st_size, stat.st_ino), stat.st_size
+
+    def save(self, brand_id: str, model_type: str, data: Dict[str, Any]) -> Tuple[Path, int]:
+        model_path = self.path(brand_id, model_type)
+        atomic_write(model_path, lambda f: pickle.dump(data, f))
+        return model_path, model_path.stat().st_size
+
+    def load(self, brand_id: str, model_type: str) -> Dict[str, Any]:
+        with open(self.path(brand_id, model_type), "rb") as f:
+            return pickle.load(f)
+
+    def load_fields(self, brand_id: str, model_type: str, fields: List[str]) -> Dict[str, Any]:
+        return pick_fields(self.load(brand_id, model_type), fields)
+
+
+def _json_default(value: Any) -> Any:
+    # numpy scalar / array -> tipe Python biasa
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SQLiteModelStore:
+    """
+    Model disimpan per bagian (part) di SQLite sebagai JSON:
+    - field top-level selain "data" -> part "brand_name", "created_at", ...
+    - kalau "data" berupa dict -> 1 part per key, mis. "data.trend", "data.top_tweets"
+    - kalau "data" berupa list (hashtags) -> 1 part "data"
+    Endpoint bisa membaca part yang dibutuhkan saja, dan tidak ada unpickle.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS models (
+                    brand_id TEXT NOT NULL,
+                    model_type TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    PRIMARY KEY (brand_id, model_type)
+                );
+                CREATE TABLE IF NOT EXISTS model_parts (
+                    brand_id TEXT NOT NULL,
+                    model_type TEXT NOT NULL,
+                    part TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (brand_id, model_type, part)
+                );
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 1 koneksi per operasi -> aman dipakai dari thread mana pun
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def version(self, brand_id: str, model_type: str) -> Tuple[str, Tuple[int, ...], int]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, size_bytes FROM models WHERE brand_id = ? AND model_type = ?",
+                (brand_id, model_type),
+            ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{brand_id}/{model_type}")
+        return f"{self.db_path}#{brand_id}/{model_type}", (row[0],), row[1]
+
+    @staticmethod
+    def _split_parts(data: Dict[str, Any]) -> List[Tuple[str, str]]:
+        parts = []
+        for key, value in data.items():
+            if key == "data" and isinstance(value, dict):
+                for sub_key, sub_value in value.items():
+                    parts.append((f"data.{sub_key}", json.dumps(sub_value, default=_json_default)))
+            else:
+                parts.append((key, json.dumps(value, default=_json_default)))
+        return parts
+
+    def save(self, brand_id: str, model_type: str, data: Dict[str, Any]) -> Tuple[Path, int]:
+        parts = self._split_parts(data)
+        size_bytes = sum(len(value) for _, value in parts)
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM model_parts WHERE brand_id = ? AND model_type = ?", (brand_id, model_type)
+            )
+            conn.executemany(
+                "INSERT INTO model_parts (brand_id, model_type, part, value) VALUES (?, ?, ?, ?)",
+                [(brand_id, model_type, part, value) for part, value in parts],
+            )
+            conn.execute(
+                """
+                INSERT INTO models (brand_id, model_type, version, size_bytes) VALUES (?, ?, 1, ?)
+                ON CONFLICT (brand_id, model_type)
+                DO UPDATE SET version = version + 1, size_bytes = excluded.size_bytes
+                """,
+                (brand_id, model_type, size_bytes),
+            )
+        return self.db_path, size_bytes
+
+    @staticmethod
+    def _assemble(rows: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        model: Dict[str, Any] = {}
+        for part, value in rows:
+            head, _, rest = part.partition(".")
+            if rest:
+                model.setdefault(head, {})[rest] = json.loads(value)
+            else:
+                model[head] = json.loads(value)
+        return model
+
+    def load(self, brand_id: str, model_type: str) -> Dict[str, Any]:
+        self.version(brand_id, model_type)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT part, value FROM model_parts WHERE brand_id = ? AND model_type = ? ORDER BY rowid",
+                (brand_id, model_type),
+            ).fetchall()
+        return self._assemble(rows)
+
+    def load_fields(self, brand_id: str, model_type: str, fields: List[str]) -> Dict[str, Any]:
+        self.version(brand_id, model_type)
+        # "data" penuh (hashtags) tersimpan sebagai 1 part, field "data.x" sebagai part sendiri
+        wanted = set(fields)
+        placeholders = ", ".join("?" for _ in wanted)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT part, value FROM model_parts WHERE brand_id = ? AND model_type = ? "
+                f"AND (part IN ({placeholders}) OR (? AND part LIKE 'data.%')) ORDER BY rowid",
+                (brand_id, model_type, *wanted, "data" in wanted),
+            ).fetchall()
+            if any(f.startswith("data.") for f in wanted) and not any(p.startswith("data.") for p, _ in rows):
+                # data bukan dict -> ambil part "data" utuh lalu pilih field di memori
+                rows += conn.execute(
+                    "SELECT part, value FROM model_parts WHERE brand_id = ? AND model_type = ? AND part = 'data'",
+                    (brand_id, model_type),
+                ).fetchall()
+        return pick_fields(self._assemble(rows), fields)
+
+
+def create_model_store(backend: str, models_dir: Path):
+    if backend == "sqlite":
+        return SQLiteModelStore(models_dir / "models.db")
+    if backend == "pickle":
+        return PickleModelStore(models_dir)
+    raise ValueError(f"Unknown MODEL_STORE_BACKEND '{backend}' (pilih 'pickle' atau 'sqlite')")
@@ -0,0 +1,210 @@
+# app/core/response_cache.py
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import gzip
+import hashlib
+import threading
+
+from fastapi.responses import Response
+
+from core.responses import json_dumps
+
+try:
+    import brotli
+except ImportError:  # opsional, tanpa brotli -> gzip saja
+    brotli = None
+
+# Budget memori body JSON (+ versi terkompresi) yang disimpan
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Body lebih kecil dari ini tidak dikompres (overhead header > hemat)
+RESPONSE_COMPRESS_MIN_BYTES = 1024
+# Browser / dashboard boleh simpan, tapi wajib revalidasi (If-None-Match -> 304)
+RESPONSE_CACHE_CONTROL = "no-cache"
+
+
+@dataclass
+class CachedResponse:
+    version: Tuple[Any, ...]
+    body: bytes
+    # encoding ("gzip" / "br") -> body terkompresi, dibuat saat pertama diminta
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(b) for b in self.encoded.values())
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # created_at model = datetime.now() lokal tanpa timezone
+        value = value.astimezone()
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Perbandingan weak (RFC 9110): W/ diabaikan, "*" cocok dengan apa pun
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+def _not_modified_since(header: str, last_modified: Optional[str]) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+
+
+def _pick_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class ResponseCache:
+    """
+    Body JSON yang sudah di-serialize (dan dikompres) per (model, endpoint, variant).
+    Entry valid selama versi model di model store sama; save_model meng-invalidate
+    semua entry model itu. ETag = hash (model, versi, variant), jadi request
+    berulang tanpa perubahan dijawab 304 tanpa load / serialize model sama sekali.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+    def _store(self, key: Tuple[str, str], entry: CachedResponse) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, model_key: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == model_key]:
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _entry(self, model_key: str, variant: str, version: Tuple[Any, ...], build: Callable[[], Any]) -> CachedResponse:
+        key = (model_key, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = CachedResponse(version=version, body=json_dumps(build()))
+        self._store(key, entry)
+        return entry
+
+    def _encoded(self, key: Tuple[str, str], entry: CachedResponse, encoding: str) -> bytes:
+        body = entry.encoded.get(encoding)
+        if body is None:
+            body = brotli.compress(entry.body, quality=5) if encoding == "br" else gzip.compress(entry.body, 6)
+            with self._lock:
+                if encoding not in entry.encoded:
+                    entry.encoded[encoding] = body
+                    # Entry yang sudah terbuang dari cache tidak dihitung lagi
+                    if self._entries.get(key) is entry:
+                        self._bytes += len(body)
+        return body
+
+    def respond(
+        self,
+        headers,
+        model_key: str,
+        variant: str,
+        version: Tuple[Any, ...],
+        build: Callable[[], Any],
+        last_modified: Callable[[], Optional[datetime]] = lambda: None,
+    ) -> Response:
+        """
+        Response untuk 1 request GET: 304 kalau If-None-Match / If-Modified-Since
+        cocok, selain itu body dari cache (build() hanya dipanggil saat miss).
+        last_modified() harus murah (stat / manifest), dipanggil setiap request.
+        """
+        digest = hashlib.blake2b(repr((model_key, version, variant)).encode("utf-8"), digest_size=12).hexdigest()
+        # Weak: body gzip / br / identity dianggap setara
+        etag = f'W/"{digest}"'
+        modified = http_date(last_modified())
+        cache_headers = {"ETag": etag, "Cache-Control": RESPONSE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if modified:
+            cache_headers["Last-Modified"] = modified
+
+        if_none_match = headers.get("if-none-match")
+        if (if_none_match is not None and _etag_matches(if_none_match, etag)) or (
+            if_none_match is None and _not_modified_since(headers.get("if-modified-since", ""), modified)
+        ):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=cache_headers)
+
+        entry = self._entry(model_key, variant, version, build)
+        body = entry.body
+        encoding = _pick_encoding(headers.get("accept-encoding", "")) if len(body) >= RESPONSE_COMPRESS_MIN_BYTES else None
+        if encoding is not None:
+            body = self._encoded((model_key, variant), entry, encoding)
+            cache_headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=cache_headers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def metrics(self) -> List[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]:
+        """
+        Collector untuk GET /metrics (lihat core/metrics.py)
+        """
+        stats = self.stats()
+        return [
+            ("xinsight_response_cache_hits_total", "counter", "Body GET model dari cache", [({}, stats["hits"])]),
+            ("xinsight_response_cache_misses_total", "counter", "Body GET model yang di-build ulang", [({}, stats["misses"])]),
+            ("xinsight_response_not_modified_total", "counter", "GET model dijawab 304", [({}, stats["not_modified"])]),
+            ("xinsight_response_cache_bytes", "gauge", "Ukuran body (+ terkompresi) di cache", [({}, stats["bytes"])]),
+        ]
@@ -0,0 +1,113 @@
+# app/core/responses.py
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from core.tweet_store import decode_cursor, encode_cursor
+
+try:
+    import orjson
+except ImportError:  # opsional, tanpa orjson -> json stdlib
+    orjson = None
+
+# Batas limit= untuk list hashtag (/hashtags, /load-model, echo upload)
+HASHTAGS_PAGE_MAX = 5_000
+
+
+def _default(value: Any) -> Any:
+    # Tipe yang tidak dikenal orjson / json (jsonable_encoder tidak lagi dipakai di jalur ini)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} tidak bisa di-serialize ke JSON")
+
+
+def json_dumps(content: Any) -> bytes:
+    """
+    JSON compact (UTF-8). orjson kalau terpasang (~5-10x lebih cepat), selain itu json stdlib
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Default response class app (main.py). Endpoint dengan payload besar me-return
+    FastJSONResponse langsung supaya jsonable_encoder FastAPI ikut dilewati.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    "a,b.c" -> ["a", "b.c"]; None = semua field. fields= kosong -> [] (tidak ada field)
+    """
+    if fields is None:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def select_fields(payload: Any, fields: Sequence[str]) -> Any:
+    """
+    Sparse fieldset: field bertingkat pakai titik (mis. "data.top_tweets"), list of dict
+    dipilih per item (mis. "data.hashtag" untuk model hashtags). Field yang tidak ada dilewati.
+    """
+    if isinstance(payload, list):
+        return [select_fields(item, fields) if isinstance(item, dict) else item for item in payload]
+
+    grouped: Dict[str, List[str]] = {}
+    for field in fields:
+        head, _, rest = field.partition(".")
+        grouped.setdefault(head, []).append(rest)
+
+    result = {}
+    for head, rests in grouped.items():
+        if head not in payload:
+            continue
+        value = payload[head]
+        # "data" + "data.x" -> data utuh
+        if "" in rests or not isinstance(value, (dict, list)):
+            result[head] = value
+        else:
+            result[head] = select_fields(value, rests)
+    return result
+
+
+def paginate(
+    items: List[Dict[str, Any]], limit: Optional[int], cursor: Optional[str], key: str
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    1 halaman dari list yang sudah terurut (mis. hashtag per count DESC) + next_cursor.
+    Cursor = (offset, key item terakhir): kalau model berubah di antara 2 halaman,
+    posisi dicari ulang lewat key; item yang sudah hilang -> 400.
+    """
+    start = 0
+    if cursor is not None:
+        try:
+            offset, last_key = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if 0 < offset <= len(items) and items[offset - 1].get(key) == last_key:
+            start = offset
+        else:
+            start = next((i + 1 for i, item in enumerate(items) if item.get(key) == last_key), None)
+            if start is None:
+                raise HTTPException(status_code=400, detail="cursor tidak valid untuk data saat ini")
+
+    end = len(items) if limit is None else min(start + limit, len(items))
+    next_cursor = encode_cursor(end, items[end - 1][key]) if end < len(items) else None
+    return items[start:end], next_cursor
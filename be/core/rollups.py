@@ -0,0 +1,182 @@
+# app/core/rollups.py
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# Measure yang dijumlah per sel cube (compound disimpan x10000 sebagai integer)
+ROLLUP_MEASURES = [
+    "tweets", "engagement", "favorite_count", "retweet_count", "reply_count", "quote_count", "compound_sum_e4",
+]
+ROLLUP_DIMENSIONS = ["sentiment", "topic"]
+GRANULARITIES = ["hour", "day", "week", "month"]
+
+# Senin 1970-01-05 00:00 UTC -> awal minggu (ISO) untuk bucket "week"
+_FIRST_MONDAY = 4 * 86400
+
+# Ekspresi SQL awal bucket dari kolom bucket_ts (epoch detik UTC)
+_BUCKET_SQL = {
+    "hour": "bucket_ts",
+    "day": "bucket_ts - bucket_ts % 86400",
+    "week": f"bucket_ts - (bucket_ts - {_FIRST_MONDAY}) % 604800",
+    "month": "CAST(strftime('%s', bucket_ts, 'unixepoch', 'start of month') AS INTEGER)",
+}
+
+RollupKey = Tuple[int, str, int]
+
+
+def init_rollup() -> Dict[RollupKey, List[int]]:
+    """
+    Cube per jam: (jam UTC, sentiment, topic) -> nilai ROLLUP_MEASURES
+    """
+    return {}
+
+
+def update_rollup(
+    cube: Dict[RollupKey, List[int]],
+    batch,
+    created_ts: np.ndarray,
+    compound: np.ndarray,
+    topic_ids: np.ndarray,
+) -> Dict[RollupKey, List[int]]:
+    """
+    Tambahkan 1 chunk ke cube. created_ts = epoch detik UTC (0 = tanggal tidak valid, dilewati).
+    """
+    valid = created_ts > 0
+    if not valid.any():
+        return cube
+
+    compound_e4 = np.rint(np.asarray(compound) * 10000).astype(np.int64)
+    sentiment = np.where(compound_e4 >= 500, "positive", np.where(compound_e4 <= -500, "negative", "neutral"))
+    frame = pd.DataFrame({
+        "hour": created_ts[valid] - created_ts[valid] % 3600,
+        "sentiment": sentiment[valid],
+        "topic": np.asarray(topic_ids)[valid].astype(np.int64),
+        "tweets": 1,
+        "engagement": batch.engagement[valid],
+        "favorite_count": batch.favorite_count[valid],
+        "retweet_count": batch.retweet_count[valid],
+        "reply_count": batch.reply_count[valid],
+        "quote_count": batch.quote_count[valid],
+        "compound_sum_e4": compound_e4[valid],
+    })
+    grouped = frame.groupby(["hour", "sentiment", "topic"], sort=False)[ROLLUP_MEASURES].sum()
+    for (hour, label, topic), values in zip(grouped.index.tolist(), grouped.to_numpy().tolist()):
+        key = (int(hour), label, int(topic))
+        current = cube.get(key)
+        if current is None:
+            cube[key] = [int(v) for v in values]
+        else:
+            cube[key] = [a + int(b) for a, b in zip(current, values)]
+    return cube
+
+
+class RollupStore:
+    """
+    Cube agregat per brand di SQLite, 2 level: per jam dan per hari (UTC).
+    Query rentang + granularity menjumlah sel cube (GROUP BY bucket), tidak
+    pernah membaca tweet lagi. Level harian dipakai kalau rentang rata ke hari.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        columns = ", ".join(f"{m} INTEGER NOT NULL" for m in ROLLUP_MEASURES)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for table in ("rollup_hourly", "rollup_daily"):
+                conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        brand_id TEXT NOT NULL,
+                        bucket_ts INTEGER NOT NULL,
+                        sentiment TEXT NOT NULL,
+                        topic INTEGER NOT NULL,
+                        {columns},
+                        PRIMARY KEY (brand_id, bucket_ts, sentiment, topic)
+                    ) WITHOUT ROWID
+                    """
+                )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def commit(self, brand_id: str, cube: Dict[RollupKey, List[int]], replace: bool = False) -> None:
+        """
+        replace=True (upload biasa) -> cube brand diganti; append -> dijumlah ke sel yang ada
+        """
+        daily: Dict[RollupKey, List[int]] = {}
+        for (hour, label, topic), values in cube.items():
+            key = (hour - hour % 86400, label, topic)
+            current = daily.get(key)
+            daily[key] = list(values) if current is None else [a + b for a, b in zip(current, values)]
+
+        placeholders = ", ".join("?" * (len(ROLLUP_MEASURES) + 4))
+        upsert = ", ".join(f"{m} = {m} + excluded.{m}" for m in ROLLUP_MEASURES)
+        with self._connect() as conn:
+            for table, rows in (("rollup_hourly", cube), ("rollup_daily", daily)):
+                if replace:
+                    conn.execute(f"DELETE FROM {table} WHERE brand_id = ?", (brand_id,))
+                conn.executemany(
+                    f"INSERT INTO {table} (brand_id, bucket_ts, sentiment, topic, {', '.join(ROLLUP_MEASURES)}) "
+                    f"VALUES ({placeholders}) "
+                    f"ON CONFLICT (brand_id, bucket_ts, sentiment, topic) DO UPDATE SET {upsert}",
+                    ((brand_id, *key, *values) for key, values in rows.items()),
+                )
+
+    def query(
+        self,
+        brand_id: str,
+        start_ts: Optional[int],
+        end_ts: Optional[int],
+        granularity: str = "day",
+        dimensions: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Deret waktu [start_ts, end_ts) per bucket (+ dimensi), bucket kosong tidak dikembalikan
+        """
+        dimensions = dimensions or []
+        aligned = all(ts is None or ts % 86400 == 0 for ts in (start_ts, end_ts))
+        table = "rollup_daily" if granularity != "hour" and aligned else "rollup_hourly"
+
+        where = ["brand_id = ?"]
+        params: List[Any] = [brand_id]
+        if start_ts is not None:
+            where.append("bucket_ts >= ?")
+            params.append(start_ts)
+        if end_ts is not None:
+            where.append("bucket_ts < ?")
+            params.append(end_ts)
+
+        group = ["bucket", *dimensions]
+        sql = (
+            f"SELECT {_BUCKET_SQL[granularity]} AS bucket, "
+            f"{''.join(d + ', ' for d in dimensions)}"
+            f"{', '.join(f'SUM({m})' for m in ROLLUP_MEASURES)} "
+            f"FROM {table} WHERE {' AND '.join(where)} "
+            f"GROUP BY {', '.join(group)} ORDER BY {', '.join(group)}"
+        )
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        series = []
+        for row in rows:
+            bucket, dims, values = row[0], row[1:1 + len(dimensions)], dict(zip(ROLLUP_MEASURES, row[1 + len(dimensions):]))
+            point = {"bucket": datetime.fromtimestamp(bucket, tz=timezone.utc).isoformat()}
+            point.update(zip(dimensions, dims))
+            tweets = values["tweets"]
+            compound_sum_e4 = values.pop("compound_sum_e4")
+            point.update(values)
+            point["avg_engagement"] = round(values["engagement"] / tweets, 2) if tweets else 0
+            point["avg_compound"] = round(compound_sum_e4 / 10000 / tweets, 4) if tweets else 0
+            series.append(point)
+        return series
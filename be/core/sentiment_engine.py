@@ -0,0 +1,190 @@
+# app/core/sentiment_engine.py
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Kata yang dicek VADER lewat perbandingan string langsung
+_CONTEXT_WORDS = ["never", "so", "this", "least", "at", "very", "kind", "of", "but"]
+
+
+class VectorizedVader:
+    """
+    Skor VADER untuk satu batch teks sekaligus (teks sudah lewat clean_text:
+    huruf kecil, tanpa tanda baca -> tidak ada efek ALL CAPS / "!" / "?").
+
+    Lexicon + booster + kata negasi + idiom di-compile jadi 1 vocabulary. Batch
+    di-tokenize jadi matriks sparse (dokumen x posisi token); valence dasar, booster,
+    negasi, idiom, "least", "kind of" dan "but" dihitung dengan operasi array untuk
+    semua token, lalu dijumlah per dokumen dan dinormalisasi seperti compound VADER.
+    Selisih dengan VADER tinggal pembulatan float (lihat benchmarks/bench_sentiment_engine.py).
+    """
+
+    def __init__(self, analyzer):
+        constants = analyzer.constants
+        lexicon = analyzer.lexicon
+        phrases = [*constants.SPECIAL_CASE_IDIOMS, *(k for k in constants.BOOSTER_DICT if " " in k)]
+        words = list(dict.fromkeys(
+            [*lexicon, *constants.BOOSTER_DICT, *constants.NEGATE, *_CONTEXT_WORDS,
+             *(word for phrase in phrases for word in phrase.split())]
+        ))
+        self.vocabulary = pd.Index(words)
+        size = len(words) + 1  # + 1 id untuk token di luar vocabulary
+        self.oov_id = len(words)
+
+        self.valence = np.zeros(size)
+        self.in_lexicon = np.zeros(size, dtype=bool)
+        self.booster = np.zeros(size)
+        self.negate = np.zeros(size, dtype=bool)
+        for word, value in lexicon.items():
+            idx = self.vocabulary.get_loc(word)
+            self.valence[idx] = value
+            self.in_lexicon[idx] = True
+        for word, value in constants.BOOSTER_DICT.items():
+            self.booster[self.vocabulary.get_loc(word)] = value
+        for word in constants.NEGATE:
+            self.negate[self.vocabulary.get_loc(word)] = True
+        self.word_id = {word: self.vocabulary.get_loc(word) for word in _CONTEXT_WORDS}
+        self.n_scalar = constants.N_SCALAR
+        self.b_decr = constants.B_DECR
+
+        # Idiom & booster 2 kata ("kind of") -> key integer dari id token
+        self.idiom_keys = {2: [], 3: []}
+        self.idiom_values = {2: [], 3: []}
+        for phrase, value in constants.SPECIAL_CASE_IDIOMS.items():
+            parts = [self.vocabulary.get_loc(word) for word in phrase.split()]
+            self.idiom_keys[len(parts)].append(self._key(*parts))
+            self.idiom_values[len(parts)].append(float(value))
+        self.idiom_index = {n: pd.Index(keys) for n, keys in self.idiom_keys.items()}
+        self.idiom_values = {n: np.array(values) for n, values in self.idiom_values.items()}
+        self.booster_bigrams = np.array([
+            self._key(*(self.vocabulary.get_loc(word) for word in phrase.split()))
+            for phrase in constants.BOOSTER_DICT if " " in phrase
+        ])
+
+    def _key(self, *token_ids):
+        key = 0
+        for token_id in token_ids:
+            key = key * (self.oov_id + 1) + token_id
+        return key
+
+    def _idioms(self, valence, ids, prev1, prev2, prev3, next1, next2):
+        """
+        _idioms_check VADER: urutan n-gram di sekitar token, match pertama menang,
+        lalu n-gram ke depan bisa menimpa
+        """
+        valence = valence.copy()
+        matched = np.zeros(len(ids), dtype=bool)
+        for seq in ((prev1, ids), (prev2, prev1, ids), (prev2, prev1), (prev3, prev2, prev1), (prev3, prev2)):
+            pos = self.idiom_index[len(seq)].get_indexer(self._key(*seq))
+            hit = (pos >= 0) & ~matched
+            valence[hit] = self.idiom_values[len(seq)][pos[hit]]
+            matched |= hit
+        for seq in ((ids, next1), (ids, next1, next2)):
+            pos = self.idiom_index[len(seq)].get_indexer(self._key(*seq))
+            hit = pos >= 0
+            valence[hit] = self.idiom_values[len(seq)][pos[hit]]
+
+        bigram = np.isin(self._key(prev3, prev2), self.booster_bigrams) | np.isin(
+            self._key(prev2, prev1), self.booster_bigrams
+        )
+        return np.where(bigram, valence + self.b_decr, valence)
+
+    def tokenize(self, texts: List[str]) -> sparse.csr_matrix:
+        """
+        CSR dokumen x posisi: indptr = batas dokumen, data = id vocabulary token.
+        Token 1 huruf dibuang seperti SentiText.
+        """
+        tokens = [[word for word in text.split() if len(word) > 1] for text in texts]
+        lengths = np.fromiter((len(doc) for doc in tokens), dtype=np.int64, count=len(tokens))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        flat = [word for doc in tokens for word in doc]
+        ids = self.vocabulary.get_indexer(flat) if flat else np.zeros(0, dtype=np.int64)
+        ids = np.where(ids < 0, self.oov_id, ids)
+        positions = np.arange(len(flat)) - np.repeat(indptr[:-1], lengths)
+        width = int(lengths.max()) if len(lengths) else 0
+        return sparse.csr_matrix((ids, positions, indptr), shape=(len(texts), width))
+
+    def compound_scores(self, texts: List[str]) -> np.ndarray:
+        matrix = self.tokenize(texts)
+        ids = matrix.data
+        n_tokens = len(ids)
+        if n_tokens == 0:
+            return np.zeros(len(texts))
+
+        doc = np.repeat(np.arange(len(texts)), np.diff(matrix.indptr))
+        pos = matrix.indices
+
+        def prev(k: int):
+            # id token k posisi sebelumnya (oov kalau lewat awal dokumen)
+            shifted = np.full(n_tokens, self.oov_id)
+            shifted[k:] = ids[:-k] if k else ids
+            return np.where(pos >= k, shifted, self.oov_id)
+
+        def is_word(token_ids, word):
+            return token_ids == self.word_id[word]
+
+        def following(k: int):
+            shifted = np.full(n_tokens, self.oov_id)
+            shifted[:-k] = ids[k:]
+            same_doc = np.zeros(n_tokens, dtype=bool)
+            same_doc[:-k] = doc[k:] == doc[:-k]
+            return np.where(same_doc, shifted, self.oov_id)
+
+        prev1, prev2, prev3 = prev(1), prev(2), prev(3)
+        next1, next2 = following(1), following(2)
+
+        valence = self.valence[ids].copy()
+        for start_i, (before, scale) in enumerate(((prev1, 1.0), (prev2, 0.95), (prev3, 0.9))):
+            active = (pos > start_i) & ~self.in_lexicon[before]
+            scalar = self.booster[before] * scale
+            scalar = np.where(valence < 0, -scalar, scalar)
+            valence = np.where(active, valence + scalar, valence)
+
+            negated = self.negate[before]
+            if start_i == 0:
+                factor = np.where(negated, self.n_scalar, 1.0)
+            elif start_i == 1:
+                never_so = is_word(prev2, "never") & (is_word(prev1, "so") | is_word(prev1, "this"))
+                factor = np.where(never_so, 1.5, np.where(negated, self.n_scalar, 1.0))
+            else:
+                never_so = (is_word(prev3, "never") & (is_word(prev2, "so") | is_word(prev2, "this"))) | (
+                    is_word(prev1, "so") | is_word(prev1, "this")
+                )
+                factor = np.where(never_so, 1.25, np.where(negated, self.n_scalar, 1.0))
+            valence = np.where(active, valence * factor, valence)
+            if start_i == 2:
+                idioms = self._idioms(valence, ids, prev1, prev2, prev3, next1, next2)
+                valence = np.where(active, idioms, valence)
+
+        least = (pos > 0) & is_word(prev1, "least") & ~self.in_lexicon[prev1]
+        least &= ~((pos > 1) & (is_word(prev2, "at") | is_word(prev2, "very")))
+        valence = np.where(least, valence * self.n_scalar, valence)
+
+        # Kata bukan lexicon, booster, dan "kind" sebelum "of" -> 0
+        skip = ~self.in_lexicon[ids] | (self.booster[ids] != 0) | (is_word(ids, "kind") & is_word(next1, "of"))
+        valence[skip] = 0.0
+
+        # VADER memakai posisi kemunculan pertama untuk token yang berulang
+        _, first, inverse = np.unique(doc * (len(self.valence)) + ids, return_index=True, return_inverse=True)
+        valence = valence[first[inverse.ravel()]]
+
+        # "but": sebelum x0.5, sesudah x1.5 (posisi "but" pertama)
+        is_but = is_word(ids, "but")
+        but_pos = np.full(len(texts), np.iinfo(np.int64).max)
+        np.minimum.at(but_pos, doc[is_but], pos[is_but])
+        has_but = but_pos[doc] != np.iinfo(np.int64).max
+        valence = np.where(has_but & (pos < but_pos[doc]), valence * 0.5, valence)
+        valence = np.where(has_but & (pos > but_pos[doc]), valence * 1.5, valence)
+
+        per_token = sparse.csr_matrix((valence, matrix.indices, matrix.indptr), shape=matrix.shape)
+        sums = np.asarray(per_token.sum(axis=1)).ravel()
+        return np.round(sums / np.sqrt(sums * sums + 15), 4)
+
+    def score(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        (label, compound) per teks, ambang sama dengan get_sentiment_vader
+        """
+        compounds = self.compound_scores(texts)
+        labels = np.where(compounds >= 0.05, "positive", np.where(compounds <= -0.05, "negative", "neutral"))
+        return list(zip(labels.tolist(), compounds.tolist()))
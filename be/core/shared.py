@@ -1,11 +1,25 @@
 # app/core/shared.py
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Union
+from datetime import datetime, timezone
+from dataclasses import dataclass, fields
 from pathlib import Path
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+import numpy as np
+import pandas as pd
 import pickle
 import re
 
+from core.brand_state import BrandStateStore
+from core.catalog import BrandCatalog
+from core.metrics import MODEL_STORE_BYTES, MODEL_STORE_SECONDS, registry
+from core.model_cache import ModelCache
+from core.model_store import MODEL_STORE_BACKEND, create_model_store, pick_fields
+from core.response_cache import ResponseCache
+from core.rollups import RollupStore
+from core.tweet_store import TweetStore
+
 class TweetData(BaseModel):
     id_str: str
     full_text: str
@@ -16,10 +30,235 @@ class TweetData(BaseModel):
     reply_count: Optional[int] = 0
     quote_count: Optional[int] = 0
 
+
+COUNT_COLUMNS = ["favorite_count", "retweet_count", "reply_count", "quote_count"]
+
+
+@dataclass
+class TweetBatch:
+    """
+    Kumpulan tweet dalam bentuk kolom (NumPy), dipakai semua analyzer.
+    TweetData (pydantic) hanya untuk validasi di batas API.
+    """
+    id_str: np.ndarray
+    full_text: np.ndarray
+    created_at: np.ndarray
+    username: np.ndarray
+    favorite_count: np.ndarray
+    retweet_count: np.ndarray
+    reply_count: np.ndarray
+    quote_count: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.id_str)
+
+    def slice(self, start: int, stop: int) -> "TweetBatch":
+        return TweetBatch(**{f.name: getattr(self, f.name)[start:stop] for f in fields(self)})
+
+    def take(self, indices: np.ndarray) -> "TweetBatch":
+        return TweetBatch(**{f.name: getattr(self, f.name)[indices] for f in fields(self)})
+
+    def split(self, n_shards: int) -> List["TweetBatch"]:
+        """
+        Pecah jadi n_shards potongan berurutan (urutan tweet tetap)
+        """
+        bounds = np.linspace(0, len(self), max(n_shards, 1) + 1).astype(int)
+        return [self.slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+    @property
+    def engagement(self) -> np.ndarray:
+        return self.favorite_count + self.retweet_count + self.reply_count + self.quote_count
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, default_username: str = "") -> "TweetBatch":
+        """
+        Kolom teks jadi str (NaN -> "nan", sama seperti str(row[...])), kolom count jadi int64.
+        """
+        def text_column(name: str) -> np.ndarray:
+            return np.array([str(v) for v in df[name].tolist()], dtype=object)
+
+        if "username" in df.columns:
+            username = text_column("username")
+        else:
+            username = np.full(len(df), str(default_username), dtype=object)
+
+        counts = {
+            col: df[col].to_numpy(dtype=np.int64) if col in df.columns else np.zeros(len(df), dtype=np.int64)
+            for col in COUNT_COLUMNS
+        }
+        return cls(
+            id_str=text_column("id_str"),
+            full_text=text_column("full_text"),
+            created_at=text_column("created_at"),
+            username=username,
+            **counts,
+        )
+
+    @classmethod
+    def from_tweets(cls, tweets: List[TweetData]) -> "TweetBatch":
+        return cls(
+            id_str=np.array([t.id_str for t in tweets], dtype=object),
+            full_text=np.array([t.full_text for t in tweets], dtype=object),
+            created_at=np.array([t.created_at for t in tweets], dtype=object),
+            username=np.array([t.username for t in tweets], dtype=object),
+            favorite_count=np.array([t.favorite_count for t in tweets], dtype=np.int64),
+            retweet_count=np.array([t.retweet_count for t in tweets], dtype=np.int64),
+            reply_count=np.array([t.reply_count or 0 for t in tweets], dtype=np.int64),
+            quote_count=np.array([t.quote_count or 0 for t in tweets], dtype=np.int64),
+        )
+
+    def to_tweets(self) -> List[TweetData]:
+        return [
+            TweetData(
+                id_str=id_str,
+                full_text=full_text,
+                created_at=created_at,
+                username=username,
+                favorite_count=favorite_count,
+                retweet_count=retweet_count,
+                reply_count=reply_count,
+                quote_count=quote_count,
+            )
+            for id_str, full_text, created_at, username, favorite_count, retweet_count, reply_count, quote_count in zip(
+                self.id_str.tolist(),
+                self.full_text.tolist(),
+                self.created_at.tolist(),
+                self.username.tolist(),
+                self.favorite_count.tolist(),
+                self.retweet_count.tolist(),
+                self.reply_count.tolist(),
+                self.quote_count.tolist(),
+            )
+        ]
+
+
+TweetsInput = Union[TweetBatch, List[TweetData]]
+
+# Format created_at bawaan export Twitter, contoh: "Wed Oct 10 20:19:24 +0000 2018"
+TWITTER_DATE_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+
+_MONTH_KEYS = np.array(
+    [(ord(m[0]) << 16) | (ord(m[1]) << 8) | ord(m[2])
+     for m in ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]]
+)
+_MONTH_ORDER = np.argsort(_MONTH_KEYS)
+_MONTH_KEYS_SORTED = _MONTH_KEYS[_MONTH_ORDER]
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def _parse_twitter_dates(values: np.ndarray):
+    """
+    Fast path format Twitter tanpa strptime: baca digit langsung dari kode karakter.
+    Return (mask baris yang cocok format, epoch detik UTC).
+    """
+    n = len(values)
+    chars = np.asarray(values).astype("U31")
+    codes = chars.view(np.uint32).reshape(n, 31).astype(np.int64)
+
+    ok = np.char.str_len(chars) == 30
+    for pos, ch in ((3, " "), (7, " "), (10, " "), (13, ":"), (16, ":"), (19, " "), (25, " ")):
+        ok &= codes[:, pos] == ord(ch)
+    ok &= (codes[:, 20] == ord("+")) | (codes[:, 20] == ord("-"))
+
+    digit_pos = [8, 9, 11, 12, 14, 15, 17, 18, 21, 22, 23, 24, 26, 27, 28, 29]
+    digits = codes[:, digit_pos] - ord("0")
+    ok &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+
+    month_key = (codes[:, 4] << 16) | (codes[:, 5] << 8) | codes[:, 6]
+    month_pos = np.clip(np.searchsorted(_MONTH_KEYS_SORTED, month_key), 0, 11)
+    ok &= _MONTH_KEYS_SORTED[month_pos] == month_key
+    month = _MONTH_ORDER[month_pos] + 1
+
+    def number(*cols):
+        out = np.zeros(n, dtype=np.int64)
+        for c in cols:
+            out = out * 10 + digits[:, c]
+        return out
+
+    day, hour, minute, second = number(0, 1), number(2, 3), number(4, 5), number(6, 7)
+    tz_minutes = number(8, 9) * 60 + number(10, 11)
+    year = number(12, 13, 14, 15)
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days_in_month = _DAYS_IN_MONTH[month - 1] + ((month == 2) & leap)
+    ok &= (day >= 1) & (day <= days_in_month) & (hour < 24) & (minute < 60) & (second < 60)
+    ok &= (number(8, 9) < 24) & (number(10, 11) < 60)
+
+    # days_from_civil (proleptic Gregorian) -> jumlah hari sejak 1970-01-01
+    y = year - (month <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    epoch_days = era * 146097 + doe - 719468
+
+    sign = np.where(codes[:, 20] == ord("-"), -1, 1)
+    seconds = epoch_days * 86400 + hour * 3600 + minute * 60 + second - sign * tz_minutes * 60
+    return ok, seconds
+
+
+def parse_created_at(values) -> pd.Series:
+    """
+    Parse kolom created_at sekaligus (UTC). Fast path format Twitter, lalu ISO8601,
+    sisanya di-parse satu per satu seperti pd.to_datetime(..., errors="coerce").
+    """
+    raw = pd.Series(np.asarray(values, dtype=object))
+    parsed = pd.Series(pd.NaT, index=raw.index, dtype="datetime64[ns, UTC]")
+    if len(raw) == 0:
+        return parsed
+
+    ok, seconds = _parse_twitter_dates(raw.to_numpy())
+    if ok.any():
+        parsed[ok] = pd.to_datetime(seconds[ok], unit="s", utc=True)
+
+    pending = ~ok & raw.notna().to_numpy()
+    if pending.any():
+        parsed[pending] = pd.to_datetime(raw[pending], format="ISO8601", errors="coerce", utc=True)
+        pending &= parsed.isna().to_numpy()
+
+    for idx in np.flatnonzero(pending):
+        try:
+            parsed.iat[idx] = pd.to_datetime(raw.iat[idx], errors="coerce", utc=True)
+        except Exception:
+            pass
+    return parsed
+
+
+def as_tweet_batch(tweets: TweetsInput) -> TweetBatch:
+    """
+    Analyzer menerima TweetBatch atau List[TweetData] (kompatibilitas lama)
+    """
+    if isinstance(tweets, TweetBatch):
+        return tweets
+    return TweetBatch.from_tweets(list(tweets))
+
 MODELS_DIR = Path("models")
 MODELS_DIR.mkdir(exist_ok=True)
 
 
+def _unpickle(path: Path) -> Any:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+# Tempat simpan model brand: .pkl (default) atau SQLite (lihat core/model_store.py)
+model_store = create_model_store(MODEL_STORE_BACKEND, MODELS_DIR)
+# Cache hasil load model untuk semua GET endpoint (lihat core/model_cache.py)
+model_cache = ModelCache()
+registry.register_collector(model_cache.metrics)
+# Body JSON siap kirim (+ gzip/br) untuk GET model brand, dengan ETag (lihat core/response_cache.py)
+response_cache = ResponseCache()
+registry.register_collector(response_cache.metrics)
+# Manifest brand, di-update setiap save_model (lihat core/catalog.py)
+brand_catalog = BrandCatalog(MODELS_DIR / "catalog.json", _unpickle)
+# State analyzer + id tweet per brand untuk upload append (lihat core/brand_state.py)
+brand_state = BrandStateStore(MODELS_DIR / "brand_state.db")
+# Hasil analisis per tweet untuk drill-down (lihat core/tweet_store.py)
+tweet_store = TweetStore(MODELS_DIR / "tweets.db")
+# Cube agregat per jam/hari untuk query deret waktu (lihat core/rollups.py)
+rollup_store = RollupStore(MODELS_DIR / "rollups.db")
+
+
 def slugify_brand(brand_name: str) -> str:
     """Convert human brand name -> safe id for filenames & URLs"""
     brand = brand_name.strip().lower()
@@ -42,21 +281,83 @@ def extract_brand_from_filename(filename: str) -> Dict[str, str]:
 
 def save_model(brand_id: str, model_type: str, data: Dict[str, Any]) -> Path:
     """
-    Simpan model ke .pkl
+    Simpan model ke model store (.pkl atau SQLite)
     model_type: "engagement", "sentiment", "topic"
     """
-    model_path = MODELS_DIR / f"{brand_id}_{model_type}_model.pkl"
-    with open(model_path, "wb") as f:
-        pickle.dump(data, f)
+    with MODEL_STORE_SECONDS.time(op="save", model_type=model_type, backend=model_store.name):
+        model_path, size_bytes = model_store.save(brand_id, model_type, data)
+    MODEL_STORE_BYTES.inc(size_bytes, model_type=model_type, backend=model_store.name)
+    cache_key, _, _ = model_store.version(brand_id, model_type)
+    model_cache.invalidate(cache_key)
+    response_cache.invalidate(cache_key)
+    brand_catalog.record(brand_id, model_type, data, cache_key, size_bytes, model_store.name)
     return model_path
 
 
+def _model_not_found(brand_id: str, model_type: str) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail=f"Model {model_type} untuk brand '{brand_id}' tidak ditemukan"
+    )
+
+
 def load_model(brand_id: str, model_type: str) -> Dict[str, Any]:
-    model_path = MODELS_DIR / f"{brand_id}_{model_type}_model.pkl"
-    if not model_path.exists():
-        raise HTTPException(
-            status_code=404,
-            detail=f"Model {model_type} untuk brand '{brand_id}' tidak ditemukan"
-        )
-    with open(model_path, "rb") as f:
-        return pickle.load(f)
\ No newline at end of file
+    """
+    Load model lewat model_cache. Hasilnya dipakai bersama antar request,
+    jadi jangan diubah langsung (copy dulu kalau perlu menambah field).
+    """
+    def load_from_store() -> Dict[str, Any]:
+        # Hanya saat cache miss -> durasi baca disk / SQLite + unpickle
+        with MODEL_STORE_SECONDS.time(op="load", model_type=model_type, backend=model_store.name):
+            return model_store.load(brand_id, model_type)
+
+    try:
+        key, version, size = model_store.version(brand_id, model_type)
+        return model_cache.get(key, version, size, load_from_store)
+    except FileNotFoundError:
+        raise _model_not_found(brand_id, model_type)
+
+
+def load_model_fields(brand_id: str, model_type: str, fields: List[str]) -> Dict[str, Any]:
+    """
+    Load sebagian field model saja, mis. ["brand_name", "data.top_tweets"].
+    Backend sqlite hanya membaca part yang diminta; backend pickle memakai
+    model lengkap dari cache.
+    """
+    if model_store.name == "pickle":
+        return pick_fields(load_model(brand_id, model_type), fields)
+    try:
+        with MODEL_STORE_SECONDS.time(op="load_fields", model_type=model_type, backend=model_store.name):
+            return model_store.load_fields(brand_id, model_type, fields)
+    except FileNotFoundError:
+        raise _model_not_found(brand_id, model_type)
+
+
+def _model_last_modified(brand_id: str, model_type: str, version) -> Optional[datetime]:
+    # .pkl -> mtime file (bagian dari versi); sqlite -> created_at model dari manifest
+    if model_store.name == "pickle":
+        return datetime.fromtimestamp(version[0] / 1e9, tz=timezone.utc)
+    created_at = brand_catalog.model_created_at(brand_id, model_type)
+    return datetime.fromisoformat(created_at) if created_at else None
+
+
+def model_response(
+    request: Request, brand_id: str, model_type: str, build: Callable[[], Any], variant: str = ""
+) -> Response:
+    """
+    GET model brand dengan ETag / Last-Modified + 304, body dari response_cache.
+    build() menyusun payload (load_model dsb.) dan hanya dipanggil saat cache miss;
+    variant membedakan endpoint / query yang memakai model yang sama.
+    """
+    try:
+        key, version, size = model_store.version(brand_id, model_type)
+    except FileNotFoundError:
+        raise _model_not_found(brand_id, model_type)
+    return response_cache.respond(
+        request.headers,
+        key,
+        variant,
+        (*version, size),
+        build,
+        lambda: _model_last_modified(brand_id, model_type, version),
+    )
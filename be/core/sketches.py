@@ -0,0 +1,255 @@
+# app/core/sketches.py
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import heapq
+import math
+
+import numpy as np
+
+# Perkiraan byte per entry SpaceSaving (key str + count + error + weight di dict Python)
+SPACE_SAVING_ENTRY_BYTES = 160
+
+
+def stable_hashes(items: Iterable[str]) -> np.ndarray:
+    """
+    Hash 64-bit yang sama di semua proses (hash() Python diacak per proses,
+    jadi sketch dari worker spawn tidak bisa di-merge kalau memakainya)
+    """
+    digests = b"".join(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest() for item in items)
+    return np.frombuffer(digests, dtype=np.uint64)
+
+
+class CountMinSketch:
+    """
+    Count-Min: estimate(x) >= jumlah asli, dan <= jumlah asli + epsilon * total
+    dengan peluang 1 - delta. Memori tetap depth x width int64.
+    Dua sketch dengan ukuran sama di-merge dengan menjumlah tabel.
+    """
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon: float, delta: float) -> "CountMinSketch":
+        return cls(width=math.ceil(math.e / epsilon), depth=math.ceil(math.log(1 / delta)))
+
+    @property
+    def epsilon(self) -> float:
+        return math.e / self.width
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    def _cells(self, items: List[str]) -> np.ndarray:
+        # Double hashing: h1 + i * h2 untuk baris ke-i
+        hashes = stable_hashes(items)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, items: List[str], counts: Optional[np.ndarray] = None) -> None:
+        if not items:
+            return
+        counts = np.ones(len(items), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        flat = self._cells(items) + (np.arange(self.depth) * self.width)[:, None]
+        self.table += np.bincount(
+            flat.ravel(), weights=np.tile(counts, self.depth), minlength=self.depth * self.width
+        ).astype(np.int64).reshape(self.depth, self.width)
+        self.total += int(counts.sum())
+
+    def estimate(self, items: List[str]) -> np.ndarray:
+        if not items:
+            return np.zeros(0, dtype=np.int64)
+        cells = self._cells(items)
+        return self.table[np.arange(self.depth)[:, None], cells].min(axis=0)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Ukuran Count-Min sketch berbeda, tidak bisa di-merge")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+
+class SpaceSaving:
+    """
+    Space-Saving (versi mergeable): maksimal `capacity` item. count >= jumlah asli
+    dan count - error <= jumlah asli; error <= total / capacity. Item di luar
+    ringkasan diperkirakan `min_count()`. `weights` = jumlah tambahan per item
+    (mis. engagement) selama item ada di ringkasan (batas bawah).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.weights: Dict[str, int] = {}
+        self.total = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.capacity * SPACE_SAVING_ENTRY_BYTES
+
+    def min_count(self) -> int:
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def _merge(
+        self,
+        counts: Dict[str, int],
+        errors: Dict[str, int],
+        weights: Dict[str, int],
+        other_min: int,
+        other_total: int,
+    ) -> "SpaceSaving":
+        self_min = self.min_count()
+        merged = []
+        for item in self.counts.keys() | counts.keys():
+            if item in self.counts:
+                count, error = self.counts[item], self.errors[item]
+            else:
+                count, error = self_min, self_min
+            if item in counts:
+                count, error = count + counts[item], error + errors.get(item, 0)
+            else:
+                count, error = count + other_min, error + other_min
+            merged.append((count, item, error, self.weights.get(item, 0) + weights.get(item, 0)))
+
+        # Simpan capacity item terbesar (tie -> urut key, supaya hasil deterministik)
+        if len(merged) > self.capacity:
+            merged = heapq.nsmallest(self.capacity, merged, key=lambda e: (-e[0], e[1]))
+        self.counts = {item: count for count, item, _, _ in merged}
+        self.errors = {item: error for _, item, error, _ in merged}
+        self.weights = {item: weight for _, item, _, weight in merged}
+        self.total += other_total
+        return self
+
+    def update(self, counts: Dict[str, int], weights: Optional[Dict[str, int]] = None) -> "SpaceSaving":
+        """
+        Tambahkan jumlah exact 1 chunk (mis. Counter tag chunk ini)
+        """
+        return self._merge(counts, {}, weights or {}, 0, sum(counts.values()))
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        return self._merge(other.counts, other.errors, other.weights, other.min_count(), other.total)
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int, int, int]]:
+        """
+        (item, count, error, weight) urut count DESC
+        """
+        entries = sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        if n is not None:
+            entries = entries[:n]
+        return [(item, count, self.errors[item], self.weights.get(item, 0)) for item, count in entries]
+
+    def error_bound(self) -> float:
+        return self.total / self.capacity if self.capacity else 0.0
+
+
+class KllSketch:
+    """
+    KLL quantile sketch: level h menyimpan item dengan bobot 2^h, kapasitas level
+    turun geometris (x 2/3) dari level teratas -> memori ~ 3k item untuk n berapa pun.
+    Error rank kira-kira 1.7 / k (k=200 -> < 1%). Selama n <= k hasilnya exact.
+    Dua sketch di-merge dengan menggabung level yang sama lalu compact lagi.
+    """
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.n = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        # Offset compaction bergantian per level (deterministik, bias saling menghapus)
+        self._offsets: List[int] = [0]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.levels)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        # Lazy: compact hanya saat total item > total kapasitas, level terendah yang penuh dulu
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            level = next(h for h in range(len(self.levels)) if len(self.levels[h]) >= self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+                self._offsets.append(0)
+            items = np.sort(self.levels[level])
+            # Jumlah item ganjil -> 1 item tetap di level ini
+            keep, items = items[:len(items) % 2], items[len(items) % 2:]
+            offset = self._offsets[level]
+            self._offsets[level] ^= 1
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset::2]])
+
+    def update(self, values: np.ndarray) -> "KllSketch":
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "KllSketch") -> "KllSketch":
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+            self._offsets.append(0)
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, qs: List[float]) -> List[Optional[float]]:
+        """
+        Item terkecil dengan bobot kumulatif >= q x n (sama dengan
+        np.quantile(..., method="inverted_cdf") selama belum ada compaction)
+        """
+        if self.n == 0:
+            return [None] * len(qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        ranks = np.clip(np.ceil(np.asarray(qs, dtype=np.float64) * cumulative[-1]), 1, cumulative[-1])
+        result = items[np.minimum(np.searchsorted(cumulative, ranks), len(items) - 1)]
+        # q=0 / q=1 -> min / max exact
+        return [
+            self.min if q <= 0 else self.max if q >= 1 else float(value)
+            for q, value in zip(qs, result.tolist())
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "n": self.n,
+            "min": self.min,
+            "max": self.max,
+            "levels": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KllSketch":
+        sketch = cls(data["k"])
+        sketch.n, sketch.min, sketch.max = data["n"], data["min"], data["max"]
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in data["levels"]] or sketch.levels
+        sketch._offsets = [0] * len(sketch.levels)
+        return sketch
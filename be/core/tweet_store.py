@@ -0,0 +1,307 @@
+# app/core/tweet_store.py
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import base64
+import json
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+# Kolom per tweet yang dikembalikan endpoint
+TWEET_COLUMNS = [
+    "id_str", "created_at", "created_ts", "username", "full_text",
+    "favorite_count", "retweet_count", "reply_count", "quote_count",
+    "engagement", "sentiment", "compound", "topic", "hashtags",
+]
+
+# sort -> kolom urutan (selalu DESC, id_str sebagai tie-breaker)
+SORT_KEYS = {"recent": "created_ts", "engagement": "engagement"}
+
+_HASHTAG_PATTERN = re.compile(r"#\w+")
+
+# Page cache SQLite per koneksi (MB)
+TWEET_STORE_CACHE_MB = int(os.getenv("TWEET_STORE_CACHE_MB", "64"))
+# Baris staging upload yang tidak pernah selesai (proses mati di tengah upload)
+# dibersihkan setelah umur ini
+TWEET_STAGING_TTL_SECONDS = int(os.getenv("TWEET_STAGING_TTL_SECONDS", str(24 * 3600)))
+
+
+def encode_cursor(sort_value: int, id_str: str) -> str:
+    raw = json.dumps([sort_value, id_str], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    ValueError kalau cursor rusak
+    """
+    try:
+        sort_value, id_str = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(sort_value), str(id_str)
+    except Exception:
+        raise ValueError("cursor tidak valid")
+
+
+class TweetStore:
+    """
+    Hasil analisis per tweet (engagement, sentiment, dominant topic, hashtag) di SQLite.
+    Aggregat di model .pkl tetap jadi sumber dashboard; tabel ini untuk drill-down
+    dengan filter + keyset pagination (WHERE (sort, id_str) < cursor, bukan OFFSET),
+    jadi halaman ke-N sama cepatnya dengan halaman pertama.
+    Chunk upload ditulis ke tabel staging per upload_id dan baru dipindah ke tabel
+    live di finish_upload (1 transaksi, setelah model di-save). Upload gagal ->
+    discard_upload; pembaca tidak pernah melihat tweet lama dan baru tercampur.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS tweets (
+                    brand_id TEXT NOT NULL,
+                    id_str TEXT NOT NULL,
+                    created_at TEXT,
+                    created_ts INTEGER NOT NULL,
+                    username TEXT,
+                    full_text TEXT,
+                    favorite_count INTEGER NOT NULL,
+                    retweet_count INTEGER NOT NULL,
+                    reply_count INTEGER NOT NULL,
+                    quote_count INTEGER NOT NULL,
+                    engagement INTEGER NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    compound REAL NOT NULL,
+                    topic INTEGER,
+                    hashtags TEXT NOT NULL,
+                    upload_id INTEGER NOT NULL,
+                    PRIMARY KEY (brand_id, id_str)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS staged_tweets (
+                    upload_id INTEGER NOT NULL,
+                    brand_id TEXT NOT NULL,
+                    id_str TEXT NOT NULL,
+                    created_at TEXT,
+                    created_ts INTEGER NOT NULL,
+                    username TEXT,
+                    full_text TEXT,
+                    favorite_count INTEGER NOT NULL,
+                    retweet_count INTEGER NOT NULL,
+                    reply_count INTEGER NOT NULL,
+                    quote_count INTEGER NOT NULL,
+                    engagement INTEGER NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    compound REAL NOT NULL,
+                    topic INTEGER,
+                    hashtags TEXT NOT NULL,
+                    PRIMARY KEY (upload_id, id_str)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_tweets_date ON tweets (brand_id, created_ts, id_str);
+                CREATE INDEX IF NOT EXISTS ix_tweets_engagement ON tweets (brand_id, engagement, id_str);
+                CREATE INDEX IF NOT EXISTS ix_tweets_sentiment ON tweets (brand_id, sentiment, created_ts, id_str);
+                CREATE INDEX IF NOT EXISTS ix_tweets_topic ON tweets (brand_id, topic, created_ts, id_str);
+                CREATE TABLE IF NOT EXISTS tweet_hashtags (
+                    brand_id TEXT NOT NULL,
+                    hashtag TEXT NOT NULL,
+                    created_ts INTEGER NOT NULL,
+                    id_str TEXT NOT NULL,
+                    PRIMARY KEY (brand_id, hashtag, created_ts, id_str)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS staged_tweet_hashtags (
+                    upload_id INTEGER NOT NULL,
+                    id_str TEXT NOT NULL,
+                    hashtag TEXT NOT NULL,
+                    created_ts INTEGER NOT NULL,
+                    PRIMARY KEY (upload_id, id_str, hashtag)
+                ) WITHOUT ROWID;
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        # Index acak (tanggal, engagement) -> cache besar supaya insert tidak bolak-balik ke disk
+        conn.execute(f"PRAGMA cache_size = -{TWEET_STORE_CACHE_MB * 1024}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def new_upload_id(self) -> int:
+        return time.time_ns()
+
+    def write_batch(
+        self,
+        brand_id: str,
+        upload_id: int,
+        batch,
+        created_ts: np.ndarray,
+        compound: np.ndarray,
+        topic_ids: Optional[np.ndarray],
+    ) -> None:
+        """
+        Stage hasil 1 chunk (urutan baris = urutan batch); belum terlihat pembaca sampai
+        finish_upload. Id yang muncul lagi di upload yang sama di-replace.
+        created_ts = epoch detik UTC, 0 kalau created_at tidak bisa di-parse.
+        """
+        compound = np.round(np.asarray(compound, dtype=np.float64), 4)
+        labels = np.where(compound >= 0.05, "positive", np.where(compound <= -0.05, "negative", "neutral"))
+        ids = batch.id_str.tolist()
+        ts = created_ts.tolist()
+        hashtags = [_HASHTAG_PATTERN.findall(text) for text in batch.full_text.tolist()]
+        topics = topic_ids.tolist() if topic_ids is not None else [None] * len(ids)
+
+        rows = zip(
+            ids, batch.created_at.tolist(), ts, batch.username.tolist(), batch.full_text.tolist(),
+            batch.favorite_count.tolist(), batch.retweet_count.tolist(),
+            batch.reply_count.tolist(), batch.quote_count.tolist(), batch.engagement.tolist(),
+            labels.tolist(), compound.tolist(), topics, (" ".join(tags) for tags in hashtags),
+        )
+        with self._connect() as conn:
+            # Hashtag staging milik id yang muncul lagi di upload ini ikut dihapus
+            conn.executemany(
+                "DELETE FROM staged_tweet_hashtags WHERE upload_id = ? AND id_str = ?",
+                ((upload_id, i) for i in ids),
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO staged_tweets (upload_id, brand_id, {', '.join(TWEET_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(TWEET_COLUMNS))})",
+                ((upload_id, brand_id, *row) for row in rows),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO staged_tweet_hashtags (upload_id, id_str, hashtag, created_ts) VALUES (?, ?, ?, ?)",
+                (
+                    (upload_id, id_str, tag.lower(), t)
+                    for id_str, t, tags in zip(ids, ts, hashtags)
+                    for tag in tags
+                ),
+            )
+
+    def finish_upload(self, brand_id: str, upload_id: int, replace: bool) -> None:
+        """
+        Pindahkan tweet staging upload ini ke tabel live dalam 1 transaksi.
+        replace=True (upload biasa) -> tweet brand dari upload sebelumnya dihapus;
+        replace=False (append) -> tweet dengan id yang sama di-replace.
+        """
+        with self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM tweet_hashtags WHERE brand_id = ?", (brand_id,))
+                conn.execute("DELETE FROM tweets WHERE brand_id = ?", (brand_id,))
+            else:
+                conn.execute(
+                    """
+                    DELETE FROM tweet_hashtags WHERE brand_id = ? AND id_str IN
+                      (SELECT id_str FROM staged_tweets WHERE upload_id = ?)
+                    """,
+                    (brand_id, upload_id),
+                )
+            conn.execute(
+                f"""
+                INSERT OR REPLACE INTO tweets (brand_id, upload_id, {', '.join(TWEET_COLUMNS)})
+                SELECT brand_id, upload_id, {', '.join(TWEET_COLUMNS)} FROM staged_tweets WHERE upload_id = ?
+                """,
+                (upload_id,),
+            )
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO tweet_hashtags (brand_id, hashtag, created_ts, id_str)
+                SELECT ?, hashtag, created_ts, id_str FROM staged_tweet_hashtags WHERE upload_id = ?
+                """,
+                (brand_id, upload_id),
+            )
+            self._drop_staged(conn, upload_id)
+
+    def discard_upload(self, upload_id: int) -> None:
+        """
+        Upload gagal -> buang tweet yang sudah di-stage (no-op setelah finish_upload)
+        """
+        with self._connect() as conn:
+            self._drop_staged(conn, upload_id)
+
+    @staticmethod
+    def _drop_staged(conn: sqlite3.Connection, upload_id: int) -> None:
+        # upload_id = time_ns -> staging upload yang lebih tua dari TTL ikut dibersihkan
+        expired = time.time_ns() - TWEET_STAGING_TTL_SECONDS * 1_000_000_000
+        for table in ("staged_tweets", "staged_tweet_hashtags"):
+            conn.execute(f"DELETE FROM {table} WHERE upload_id = ? OR upload_id < ?", (upload_id, expired))
+
+    def query(
+        self,
+        brand_id: str,
+        sentiment: Optional[str] = None,
+        topic: Optional[int] = None,
+        hashtag: Optional[str] = None,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        min_engagement: Optional[int] = None,
+        sort: str = "recent",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        1 halaman tweet (urut sort DESC, id_str DESC) + next_cursor untuk halaman berikutnya
+        """
+        sort_column = SORT_KEYS[sort]
+        where = ["t.brand_id = ?"]
+        order = "t"
+        params: List[Any] = [brand_id]
+        source = "tweets t"
+
+        if hashtag is not None:
+            # Hashtag lewat tabel index (brand, hashtag, waktu) lalu join ke tweets
+            source = "tweet_hashtags h JOIN tweets t ON t.brand_id = h.brand_id AND t.id_str = h.id_str"
+            where = ["h.brand_id = ?", "h.hashtag = ?"]
+            params = [brand_id, hashtag.lower() if hashtag.startswith("#") else f"#{hashtag.lower()}"]
+            if sort == "recent":
+                order = "h"
+        if sentiment is not None:
+            where.append("t.sentiment = ?")
+            params.append(sentiment)
+        if topic is not None:
+            where.append("t.topic = ?")
+            params.append(topic)
+        # Filter tanggal di tabel yang urutannya dipakai (range scan di index)
+        ts_alias = "h" if hashtag is not None else "t"
+        if start_ts is not None:
+            where.append(f"{ts_alias}.created_ts >= ?")
+            params.append(start_ts)
+        if end_ts is not None:
+            where.append(f"{ts_alias}.created_ts < ?")
+            params.append(end_ts)
+        if min_engagement is not None:
+            where.append("t.engagement >= ?")
+            params.append(min_engagement)
+        if cursor is not None:
+            sort_value, last_id = decode_cursor(cursor)
+            where.append(f"({order}.{sort_column}, {order}.id_str) < (?, ?)")
+            params.extend([sort_value, last_id])
+
+        sql = (
+            f"SELECT {', '.join('t.' + c for c in TWEET_COLUMNS)} FROM {source} "
+            f"WHERE {' AND '.join(where)} "
+            f"ORDER BY {order}.{sort_column} DESC, {order}.id_str DESC LIMIT ?"
+        )
+        params.append(limit + 1)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        items = [dict(zip(TWEET_COLUMNS, row)) for row in rows[:limit]]
+        for item in items:
+            item["hashtags"] = item["hashtags"].split() if item["hashtags"] else []
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last[sort_column], last["id_str"])
+        return {"items": items, "next_cursor": next_cursor}
+
+    def count(self, brand_id: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM tweets WHERE brand_id = ?", (brand_id,)).fetchone()[0]
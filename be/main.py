@@ -1,11 +1,16 @@
 # app/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
+from fastapi import HTTPException
+import logging
+import time
 
-from routers import upload, engagement, sentiment, topics, brands, hashtags
+from core.metrics import METRICS_REQUEST_TIMING, REQUEST_SECONDS
+from core.responses import FastJSONResponse
+from routers import upload, engagement, sentiment, topics, brands, hashtags, jobs, tweets, timeseries, metrics
 
-app = FastAPI(title="X Analytics API", version="3.0.0")
+app = FastAPI(title="X Analytics API", version="3.0.0", default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +21,40 @@ app.add_middleware(
 )
 
 
+if METRICS_REQUEST_TIMING:
+    @app.middleware("http")
+    async def time_requests(request: Request, call_next):
+        """
+        Latency per route template (/api/brands/{brand_id}/...), bukan per URL,
+        supaya jumlah label tetap kecil
+        """
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
+
+@app.on_event("startup")
+async def warm_start_topic_model():
+    """
+    Load global LDA sekali saat server start, supaya upload pertama tidak menunggu
+    """
+    try:
+        topics.topic_registry.get()
+    except HTTPException as e:
+        logging.getLogger(__name__).warning("Topic model belum tersedia: %s", e.detail)
+
+
 @app.get("/")
 async def root():
     return {
@@ -28,12 +67,23 @@ async def root():
             "/api/brands/{brand_id}",
             "/api/brands/{brand_id}/engagement",
             "/api/brands/{brand_id}/sentiment",
+            "/api/brands/{brand_id}/sentiment/analyze-batch",
             "/api/brands/{brand_id}/topics",
+            "/api/brands/{brand_id}/tweets",
+            "/api/brands/{brand_id}/timeseries",
             "/api/brands/{brand_id}/hashtags",            # <-- Tambahkan ini
             "/api/brands/{brand_id}/hashtags/trending",  # <-- Dan ini
+            "/api/brands/{brand_id}/hashtags/cooccurrence",
+            "/api/brands/{brand_id}/mentions",
             "/api/brands/comparison",
             "/api/list-models",
             "/api/load-model/{brand_id}/{model_type}",
+            "/api/model-cache",
+            "/api/sentiment-memo",
+            "/api/topic-model",
+            "/api/jobs",
+            "/api/jobs/{job_id}",
+            "/metrics",
         ],
     }
 
@@ -50,6 +100,10 @@ app.include_router(sentiment.router)
 app.include_router(topics.router)
 app.include_router(brands.router)
 app.include_router(hashtags.router)   # <-- WAJIB DITAMBAHKAN
+app.include_router(jobs.router)
+app.include_router(tweets.router)
+app.include_router(timeseries.router)
+app.include_router(metrics.router)
 
 
 if __name__ == "__main__":
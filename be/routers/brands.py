@@ -1,9 +1,11 @@
 # app/routers/brands.py
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
-import re
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, Optional
 
-from core.shared import MODELS_DIR, load_model
+from core.responses import HASHTAGS_PAGE_MAX, FastJSONResponse, paginate, parse_fields, select_fields
+from core.shared import brand_catalog, load_model, load_model_fields, model_cache, response_cache
+from routers.sentiment import sentiment_memo_stats
+from routers.topics import topic_registry
 
 router = APIRouter(prefix="/api", tags=["brands"])
 
@@ -17,50 +19,19 @@ DEFAULT_FOLLOWERS: Dict[str, int] = {
 @router.get("/brands")
 async def list_brands():
     """
-    List semua brand yang punya model (dilihat dari isi folder models/)
+    List semua brand yang punya model (dibaca dari manifest models/catalog.json)
     ✅ Dengan followers count
     """
-    brand_map: Dict[str, Dict[str, Any]] = {}
-
-    for model_file in MODELS_DIR.glob("*.pkl"):
-        name = model_file.name  # contoh: netflix_engagement_model.pkl
-        m = re.match(r"(.+?)_(engagement|sentiment|topic|hashtags)_model\.pkl", name)
-        if not m:
-            continue
-        brand_id, model_type = m.group(1), m.group(2)
-        try:
-            data = load_model(brand_id, model_type)
-        except HTTPException:
-            continue
-
-        brand_entry = brand_map.setdefault(
-            brand_id,
-            {
-                "brand_id": brand_id,
-                "brand_name": data.get("brand_name", brand_id.title()),
-                "followers": DEFAULT_FOLLOWERS.get(brand_id, 0),  # ✅ Tambah followers
-                "models": set(),
-            },
-        )
-        brand_entry["models"].add(model_type)
-
     brands = []
-    for b in brand_map.values():
-        # ✅ Get total tweets from engagement model
-        total_tweets = 0
-        try:
-            eng_data = load_model(b["brand_id"], "engagement")
-            total_tweets = eng_data.get("data", {}).get("total_tweets", 0)
-        except:
-            pass
-        
+    for brand_id, b in brand_catalog.brands().items():
         brands.append(
             {
-                "brand_id": b["brand_id"],
-                "brand_name": b["brand_name"],
-                "followers": b["followers"],
-                "total_tweets": total_tweets,
-                "available_models": sorted(list(b["models"])),
+                "brand_id": brand_id,
+                "brand_name": b.get("brand_name") or brand_id.title(),
+                "followers": DEFAULT_FOLLOWERS.get(brand_id, 0),  # ✅ Tambah followers
+                "total_tweets": b.get("total_tweets", 0),  # dari model engagement
+                "available_models": sorted(b["models"].keys()),
+                "created_at": b.get("created_at"),
             }
         )
 
@@ -89,9 +60,9 @@ async def get_brand_profile(brand_id: str):
         brand_profile.setdefault("brand_name", model.get("brand_name", brand_id.title()))
         engagement_data = model["data"]
         
-        # Ensure followers ada
+        # Ensure followers ada (copy, model dari cache dipakai bersama)
         if "followers" not in engagement_data:
-            engagement_data["followers"] = DEFAULT_FOLLOWERS.get(brand_id, 0)
+            engagement_data = {**engagement_data, "followers": DEFAULT_FOLLOWERS.get(brand_id, 0)}
         
         brand_profile["engagement"] = engagement_data
     except HTTPException as e:
@@ -168,42 +139,90 @@ async def get_brand_followers(brand_id: str):
 
 
 @router.get("/load-model/{brand_id}/{model_type}")
-async def load_model_endpoint(brand_id: str, model_type: str):
+async def load_model_endpoint(
+    brand_id: str,
+    model_type: str,
+    fields: Optional[str] = Query(None, description="Field model, mis. brand_name,data.top_tweets"),
+    limit: Optional[int] = Query(None, ge=1, le=HASHTAGS_PAGE_MAX, description="Per halaman, untuk data berupa list"),
+    cursor: Optional[str] = Query(None, description="next_cursor dari halaman sebelumnya"),
+):
     """
     Backward-compatible endpoint untuk load model mentah.
     model_type: 'engagement', 'sentiment', 'topics', 'hashtags'
+    fields= memilih sebagian model (backend sqlite hanya membaca part itu),
+    limit / cursor memaginasi "data" yang berupa list (model hashtags).
     """
     brand_id = brand_id.lower()
-    data = load_model(brand_id, model_type)
+    selected = parse_fields(fields)
+    if selected is None:
+        data = load_model(brand_id, model_type)
+    else:
+        # Model store kenal field s/d 2 tingkat ("data.x"), sisanya dipilih di memori
+        data = load_model_fields(brand_id, model_type, sorted({".".join(f.split(".")[:2]) for f in selected}))
     
     # ✅ Inject followers jika model_type = engagement
     if model_type == "engagement" and "followers" not in data.get("data", {}):
-        data["data"]["followers"] = DEFAULT_FOLLOWERS.get(brand_id, 0)
+        data = {**data, "data": {**data.get("data", {}), "followers": DEFAULT_FOLLOWERS.get(brand_id, 0)}}
     
-    return {
+    next_cursor = None
+    if isinstance(data.get("data"), list):
+        page, next_cursor = paginate(data["data"], limit, cursor, "hashtag")
+        data = {**data, "data": page}
+    elif limit is not None or cursor is not None:
+        raise HTTPException(status_code=400, detail=f"Model {model_type} tidak bisa dipaginasi (data bukan list)")
+
+    result = {
         "success": True,
         "brand_id": brand_id,
         "model_type": model_type,
-        "data": data,
+        "data": data if selected is None else select_fields(data, selected),
     }
+    if isinstance(data.get("data"), list):
+        result["next_cursor"] = next_cursor
+
+    # Langsung FastJSONResponse: model besar tidak lewat jsonable_encoder
+    return FastJSONResponse(result)
 
 
 @router.get("/list-models")
 async def list_models():
     """
-    List semua file model (.pkl) di folder models.
+    List semua model (file .pkl / entry sqlite) dari manifest.
     """
-    model_files = list(MODELS_DIR.glob("*.pkl"))
     models = []
-    for model_file in model_files:
-        file_size = model_file.stat().st_size
+    for filename, info in brand_catalog.model_files().items():
         models.append(
             {
-                "filename": model_file.name,
-                "path": str(model_file),
-                "size_bytes": file_size,
-                "size_kb": round(file_size / 1024, 2),
+                "filename": filename,
+                "path": info["path"],
+                "store": info["store"],
+                "size_bytes": info["size_bytes"],
+                "size_kb": round(info["size_bytes"] / 1024, 2),
             }
         )
 
-    return {"success": True, "total_models": len(models), "models": models}
\ No newline at end of file
+    return {"success": True, "total_models": len(models), "models": models}
+
+
+@router.get("/model-cache")
+async def get_model_cache_stats():
+    """
+    Statistik cache model (hit/miss, eviction, pemakaian memori) + cache body response
+    """
+    return {"success": True, "cache": model_cache.stats(), "response_cache": response_cache.stats()}
+
+
+@router.get("/sentiment-memo")
+async def get_sentiment_memo_stats():
+    """
+    Statistik memo skor VADER per teks (hit/miss) di proses server ini
+    """
+    return {"success": True, "memo": sentiment_memo_stats()}
+
+
+@router.get("/topic-model")
+async def get_topic_model_status():
+    """
+    Versi global LDA yang sedang dipakai (di-reload otomatis kalau file berubah)
+    """
+    return {"success": True, "topic_model": topic_registry.status()}
@@ -1,11 +1,19 @@
 # app/routers/engagement.py
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import List, Dict, Any, Optional
 from datetime import datetime
+import numpy as np
+import os
 import pandas as pd
 import re
 
-from core.shared import TweetData, MODELS_DIR, load_model
+from core.comparison import COMPARISON_METRICS, ComparisonIndex
+from core.responses import FastJSONResponse
+from core.shared import (
+    TweetsInput, MODELS_DIR, as_tweet_batch, brand_catalog, load_model, load_model_fields, model_response,
+    parse_created_at,
+)
+from core.sketches import KllSketch
 
 router = APIRouter(prefix="/api/brands", tags=["engagement"])
 
@@ -16,12 +24,180 @@ DEFAULT_FOLLOWERS: Dict[str, int] = {
 }
 
 
-def compute_engagement_analytics(brand_id: str, brand_name: str, tweets: List[TweetData]) -> Dict[str, Any]:
-    total_tweets = len(tweets)
-    
+# Ukuran KLL sketch persentil engagement: per brand, dan per tanggal / jam (lebih kecil, jumlahnya banyak)
+ENGAGEMENT_DIGEST_K = int(os.getenv("ENGAGEMENT_DIGEST_K", "200"))
+ENGAGEMENT_BUCKET_DIGEST_K = int(os.getenv("ENGAGEMENT_BUCKET_DIGEST_K", "64"))
+ENGAGEMENT_PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+# Tabel ringkasan semua brand untuk /comparison (dari catalog.json, bukan load model)
+comparison_index = ComparisonIndex(brand_catalog, load_model, DEFAULT_FOLLOWERS)
+
+
+def init_engagement_state() -> Dict[str, Any]:
+    """
+    State agregat engagement yang bisa diisi bertahap (per chunk CSV).
+    """
+    return {
+        "total_tweets": 0,
+        "total_engagement": 0,
+        "engagement_by_date": {},
+        "engagement_by_hour": [0] * 24,
+        "top_tweets": [],
+        **_init_digests(),
+    }
+
+
+def _init_digests() -> Dict[str, Any]:
+    return {
+        "digest": KllSketch(ENGAGEMENT_DIGEST_K),
+        "digest_by_date": {},
+        "digest_by_hour": [KllSketch(ENGAGEMENT_BUCKET_DIGEST_K) for _ in range(24)],
+    }
+
+
+def _split_by_bucket(values: np.ndarray, bucket_index: np.ndarray, n_buckets: int) -> List[np.ndarray]:
+    """
+    Nilai per bucket (1 argsort, tanpa loop per tweet)
+    """
+    order = np.argsort(bucket_index, kind="stable")
+    sizes = np.bincount(bucket_index, minlength=n_buckets)
+    return np.split(values[order], np.cumsum(sizes)[:-1])
+
+
+def _top_n_indices(values: np.ndarray, n: int) -> np.ndarray:
+    """
+    Index n nilai terbesar (DESC). Saat nilai sama, index lebih kecil menang,
+    sama seperti sorted(..., reverse=True) yang stabil.
+    """
+    if len(values) <= n:
+        candidates = np.arange(len(values))
+    else:
+        kth = np.partition(values, len(values) - n)[len(values) - n]
+        above = np.flatnonzero(values > kth)
+        ties = np.flatnonzero(values == kth)[: n - len(above)]
+        candidates = np.concatenate([above, ties])
+    order = np.lexsort((candidates, -values[candidates]))
+    return candidates[order]
+
+
+def update_engagement_state(state: Dict[str, Any], tweets: TweetsInput) -> Dict[str, Any]:
+    """
+    Tambahkan satu batch tweet ke state engagement (vectorized).
+    Hanya 10 top tweet yang disimpan, jadi memori tidak tumbuh dengan ukuran file.
+    """
+    batch = as_tweet_batch(tweets)
+    if len(batch) == 0:
+        return state
+
+    engagement = batch.engagement
+    state["total_engagement"] += int(engagement.sum())
+    state["digest"].update(engagement)
+
+    # Satu kali parse untuk seluruh kolom created_at
+    parsed = parse_created_at(batch.created_at)
+    valid = parsed.notna().to_numpy()
+    timestamps = parsed.to_numpy(dtype="datetime64[ns]")[valid]
+    valid_engagement = engagement[valid]
+
+    if len(timestamps):
+        days, day_index = np.unique(timestamps.astype("datetime64[D]"), return_inverse=True)
+        day_totals = np.bincount(day_index, weights=valid_engagement, minlength=len(days))
+        engagement_by_date: Dict[str, int] = state["engagement_by_date"]
+        date_keys = np.datetime_as_string(days, unit="D").tolist()
+        for date_key, total in zip(date_keys, day_totals.tolist()):
+            engagement_by_date[date_key] = engagement_by_date.get(date_key, 0) + int(total)
+
+        hours = timestamps.astype("datetime64[h]").astype(np.int64) % 24
+        hour_totals = np.bincount(hours, weights=valid_engagement, minlength=24)
+        state["engagement_by_hour"] = [
+            current + int(total) for current, total in zip(state["engagement_by_hour"], hour_totals.tolist())
+        ]
+
+        digest_by_date: Dict[str, KllSketch] = state["digest_by_date"]
+        for date_key, values in zip(date_keys, _split_by_bucket(valid_engagement, day_index, len(days))):
+            digest_by_date.setdefault(date_key, KllSketch(ENGAGEMENT_BUCKET_DIGEST_K)).update(values)
+        for digest, values in zip(state["digest_by_hour"], _split_by_bucket(valid_engagement, hours, 24)):
+            digest.update(values)
+
+    # Top-N: dict hanya dibuat untuk kandidat, bukan untuk setiap tweet
+    chunk_top = [
+        {
+            "id_str": batch.id_str[i],
+            "text": batch.full_text[i][:200],
+            "engagement": int(engagement[i]),
+            "favorite_count": int(batch.favorite_count[i]),
+            "retweet_count": int(batch.retweet_count[i]),
+            "created_at": batch.created_at[i],
+        }
+        for i in _top_n_indices(engagement, 10)
+    ]
+
+    state["total_tweets"] += len(batch)
+    # sorted() stabil -> tweet yang lebih awal tetap menang saat engagement sama
+    state["top_tweets"] = sorted(
+        state["top_tweets"] + chunk_top, key=lambda x: x["engagement"], reverse=True
+    )[:10]
+    return state
+
+
+def merge_engagement_states(state: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Gabungkan state shard berikutnya ke state (urutan shard harus sama dengan urutan tweet).
+    """
+    state["total_tweets"] += other["total_tweets"]
+    state["total_engagement"] += other["total_engagement"]
+
+    engagement_by_date: Dict[str, int] = state["engagement_by_date"]
+    for date_key, total in other["engagement_by_date"].items():
+        engagement_by_date[date_key] = engagement_by_date.get(date_key, 0) + total
+
+    state["engagement_by_hour"] = [a + b for a, b in zip(state["engagement_by_hour"], other["engagement_by_hour"])]
+    state["top_tweets"] = sorted(
+        state["top_tweets"] + other["top_tweets"], key=lambda x: x["engagement"], reverse=True
+    )[:10]
+
+    # State append dari sebelum ada digest -> persentil hanya mencakup tweet setelahnya
+    if "digest" not in state:
+        state.update(_init_digests())
+    if "digest" in other:
+        state["digest"].merge(other["digest"])
+        digest_by_date: Dict[str, KllSketch] = state["digest_by_date"]
+        for date_key, digest in other["digest_by_date"].items():
+            if date_key in digest_by_date:
+                digest_by_date[date_key].merge(digest)
+            else:
+                digest_by_date[date_key] = digest
+        for digest, other_digest in zip(state["digest_by_hour"], other["digest_by_hour"]):
+            digest.merge(other_digest)
+    return state
+
+
+def _percentiles(digest: KllSketch) -> Dict[str, Any]:
+    values = digest.quantiles(list(ENGAGEMENT_PERCENTILES.values()))
+    # Engagement selalu integer, item KLL adalah nilai asli
+    return {
+        "tweets": digest.n,
+        **{name: int(value) if value is not None else None for name, value in zip(ENGAGEMENT_PERCENTILES, values)},
+    }
+
+
+def _serialize_digests(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    KLL dalam bentuk list (bisa disimpan di store JSON), bisa dibangun ulang dengan KllSketch.from_dict
+    """
+    return {
+        "brand": state["digest"].to_dict(),
+        "by_date": {date_key: digest.to_dict() for date_key, digest in state["digest_by_date"].items()},
+        "by_hour": [digest.to_dict() for digest in state["digest_by_hour"]],
+    }
+
+
+def finalize_engagement_model(brand_id: str, brand_name: str, state: Dict[str, Any]) -> Dict[str, Any]:
+    total_tweets = state["total_tweets"]
+
     # ✅ Ambil followers count
     followers = DEFAULT_FOLLOWERS.get(brand_id, 0)
-    
+
     if total_tweets == 0:
         return {
             "brand_id": brand_id,
@@ -37,43 +213,15 @@ def compute_engagement_analytics(brand_id: str, brand_name: str, tweets: List[Tw
                 "trend": [],
                 "posting_hours": [],
                 "top_tweets": [],
+                "percentiles": {},
+                "percentiles_by_date": [],
+                "percentiles_by_hour": [],
             },
         }
 
-    total_engagement = 0
-    engagement_by_date: Dict[str, int] = {}
-    engagement_by_hour = [0] * 24
-    top_tweets: List[Dict[str, Any]] = []
-
-    for t in tweets:
-        engagement = (
-            t.favorite_count
-            + t.retweet_count
-            + (t.reply_count or 0)
-            + (t.quote_count or 0)
-        )
-        total_engagement += engagement
-
-        try:
-            dt = pd.to_datetime(t.created_at, errors="coerce", utc=True)
-        except Exception:
-            dt = None
-
-        if dt is not None and not pd.isna(dt):
-            date_key = dt.date().isoformat()
-            engagement_by_date[date_key] = engagement_by_date.get(date_key, 0) + engagement
-            engagement_by_hour[dt.hour] += engagement
-
-        top_tweets.append(
-            {
-                "id_str": t.id_str,
-                "text": t.full_text[:200],
-                "engagement": engagement,
-                "favorite_count": t.favorite_count,
-                "retweet_count": t.retweet_count,
-                "created_at": t.created_at,
-            }
-        )
+    total_engagement = state["total_engagement"]
+    engagement_by_date = state["engagement_by_date"]
+    engagement_by_hour = state["engagement_by_hour"]
 
     avg_engagement = total_engagement / total_tweets
     
@@ -87,7 +235,11 @@ def compute_engagement_analytics(brand_id: str, brand_name: str, tweets: List[Tw
 
     posting_hours = [{"hour": h, "engagement": engagement_by_hour[h]} for h in range(24)]
 
-    top_tweets_sorted = sorted(top_tweets, key=lambda x: x["engagement"], reverse=True)[:10]
+    if "digest" not in state:
+        state.update(_init_digests())
+    digest_by_date = state["digest_by_date"]
+    percentiles_by_date = [{"date": d, **_percentiles(digest_by_date[d])} for d in sorted(digest_by_date)]
+    percentiles_by_hour = [{"hour": h, **_percentiles(digest)} for h, digest in enumerate(state["digest_by_hour"])]
 
     return {
         "brand_id": brand_id,
@@ -102,41 +254,69 @@ def compute_engagement_analytics(brand_id: str, brand_name: str, tweets: List[Tw
             "followers": followers,  # ✅ Tambahkan followers
             "trend": trend,
             "posting_hours": posting_hours,
-            "top_tweets": top_tweets_sorted,
+            "top_tweets": list(state["top_tweets"]),
+            "percentiles": _percentiles(state["digest"]),
+            "percentiles_by_date": percentiles_by_date,
+            "percentiles_by_hour": percentiles_by_hour,
         },
+        # Sketch KLL mentah, tidak dikirim di response
+        "digests": _serialize_digests(state),
     }
 
 
+def compute_engagement_analytics(brand_id: str, brand_name: str, tweets: TweetsInput) -> Dict[str, Any]:
+    state = update_engagement_state(init_engagement_state(), tweets)
+    return finalize_engagement_model(brand_id, brand_name, state)
+
+
 @router.get("/{brand_id}/engagement")
-async def get_brand_engagement(brand_id: str):
+async def get_brand_engagement(brand_id: str, request: Request):
     """
     Ambil model engagement 1 brand (Netflix sendiri, Disney sendiri)
     """
     brand_id = brand_id.lower()
-    model = load_model(brand_id, "engagement")
-    
-    # ✅ Ensure followers ada di response
-    if "followers" not in model.get("data", {}):
-        followers = DEFAULT_FOLLOWERS.get(brand_id, 0)
-        model["data"]["followers"] = followers
-    
-    return {"success": True, **model}
+
+    def build():
+        model = load_model(brand_id, "engagement")
+        model = {key: value for key, value in model.items() if key != "digests"}
+
+        # ✅ Ensure followers ada di response (copy, model dari cache dipakai bersama)
+        if "followers" not in model.get("data", {}):
+            followers = DEFAULT_FOLLOWERS.get(brand_id, 0)
+            model = {**model, "data": {**model["data"], "followers": followers}}
+
+        return {"success": True, **model}
+
+    return model_response(request, brand_id, "engagement", build, "engagement")
+
+
+# Field yang dibaca summary (backend sqlite tidak perlu load trend/distribusi)
+ENGAGEMENT_SUMMARY_FIELDS = [
+    "data.total_tweets", "data.total_engagement", "data.avg_engagement",
+    "data.engagement_rate", "data.followers", "data.top_tweets", "data.percentiles",
+]
+ENGAGEMENT_BREAKDOWN_FIELDS = {"day": "data.percentiles_by_date", "hour": "data.percentiles_by_hour"}
 
 
 # ✅ ENGAGEMENT SUMMARY - Analytics tambahan
 @router.get("/{brand_id}/engagement/summary")
-async def get_engagement_summary(brand_id: str):
+async def get_engagement_summary(
+    brand_id: str,
+    breakdown: Optional[str] = Query(None, pattern="^(day|hour)$", description="Persentil per tanggal / jam (UTC)"),
+):
     """
     Ringkasan engagement analytics:
     - Total engagement
     - Average engagement per tweet
     - Engagement rate
+    - Persentil engagement p50 / p90 / p99 (KLL sketch)
     - Best performing tweet
     """
     brand_id = brand_id.lower()
     
     try:
-        model = load_model(brand_id, "engagement")
+        fields = ENGAGEMENT_SUMMARY_FIELDS + ([ENGAGEMENT_BREAKDOWN_FIELDS[breakdown]] if breakdown else [])
+        model = load_model_fields(brand_id, "engagement", fields)
         data = model.get("data", {})
         
         total_tweets = data.get("total_tweets", 0)
@@ -148,7 +328,7 @@ async def get_engagement_summary(brand_id: str):
         top_tweets = data.get("top_tweets", [])
         best_tweet = top_tweets[0] if top_tweets else None
         
-        return {
+        response = {
             "success": True,
             "brand_id": brand_id,
             "summary": {
@@ -157,6 +337,7 @@ async def get_engagement_summary(brand_id: str):
                 "avg_engagement_per_tweet": avg_engagement,
                 "engagement_rate": engagement_rate,
                 "followers": followers,
+                "percentiles": data.get("percentiles", {}),
                 "best_performing_tweet": {
                     "text": best_tweet.get("text", "") if best_tweet else "",
                     "engagement": best_tweet.get("engagement", 0) if best_tweet else 0,
@@ -165,20 +346,59 @@ async def get_engagement_summary(brand_id: str):
                 } if best_tweet else None
             }
         }
+        if breakdown:
+            key = ENGAGEMENT_BREAKDOWN_FIELDS[breakdown].split(".", 1)[1]
+            response[key] = data.get(key, [])
+        return response
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# ❌ HAPUS COMPARISON - Return 410 Gone
+def _split_param(value: Optional[str]) -> List[str]:
+    # "a, b,a" -> ["a", "b"] (urutan dipertahankan)
+    items = [item.strip().lower() for item in (value or "").split(",") if item.strip()]
+    return list(dict.fromkeys(items))
+
+
+# ✅ COMPARISON - banyak brand dalam 1 request
 @router.get("/comparison")
-async def compare_brands():
+async def compare_brands(
+    brands: Optional[str] = Query(None, description="brand_id dipisah koma, kosong = semua brand"),
+    metrics: Optional[str] = Query(None, description=f"Metric dipisah koma: {', '.join(COMPARISON_METRICS)}"),
+    baseline: Optional[str] = Query(None, description="brand_id acuan delta, kosong = rata-rata brand yang dibandingkan"),
+    sort: Optional[str] = Query(None, description="Urutkan brand berdasarkan rank metric ini"),
+    limit: Optional[int] = Query(None, ge=1, description="Hanya N brand pertama (setelah sort)"),
+):
     """
-    DEPRECATED: Comparison feature has been removed.
-    Use individual brand endpoints instead.
+    Bandingkan subset brand: followers, engagement rate, mix sentimen, top topik & hashtag,
+    dengan rank dan delta per metric. Dibaca dari ringkasan di catalog (tanpa load model).
     """
-    raise HTTPException(
-        status_code=410,
-        detail="Comparison feature has been removed. Please use GET /api/brands/{brand_id}/engagement for individual brand analytics."
-    )
\ No newline at end of file
+    table = comparison_index.table()
+    brand_ids = _split_param(brands) or table.brand_ids
+    metric_names = _split_param(metrics) or table.metric_names
+
+    unknown_brands = [brand_id for brand_id in brand_ids if brand_id not in table.index]
+    if unknown_brands:
+        raise HTTPException(status_code=404, detail=f"Brand tidak ditemukan: {', '.join(unknown_brands)}")
+    unknown_metrics = [name for name in metric_names if name not in COMPARISON_METRICS]
+    if unknown_metrics:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Metric tidak dikenal: {', '.join(unknown_metrics)} (pilih: {', '.join(COMPARISON_METRICS)})",
+        )
+    baseline = baseline.lower() if baseline else None
+    if baseline is not None and baseline not in brand_ids:
+        raise HTTPException(status_code=400, detail=f"baseline '{baseline}' harus termasuk brands yang dibandingkan")
+    if sort is not None and sort not in metric_names:
+        raise HTTPException(status_code=400, detail=f"sort '{sort}' harus termasuk metrics")
+
+    # Langsung FastJSONResponse: ratusan brand tidak lewat jsonable_encoder
+    return FastJSONResponse({
+        "success": True,
+        "total_brands": len(table.brand_ids),
+        "compared": len(brand_ids),
+        "metrics": metric_names,
+        **table.compare(brand_ids, metric_names, baseline, sort, limit),
+    })
\ No newline at end of file
@@ -1,32 +1,86 @@
 # app/routers/hashtags.py
-from fastapi import APIRouter, HTTPException
-from core.shared import load_model
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from collections import Counter
+from scipy import sparse
+import heapq
+import numpy as np
+import os
+import re
+
+from core.responses import HASHTAGS_PAGE_MAX, paginate, parse_fields, select_fields
+from core.shared import as_tweet_batch, load_model_fields, model_response, parse_created_at
+from core.sketches import SPACE_SAVING_ENTRY_BYTES, CountMinSketch, SpaceSaving
 
 router = APIRouter(prefix="/api", tags=["hashtags"])
 
+# Pola hashtag & mention, di-compile sekali untuk semua chunk
+HASHTAG_PATTERN = re.compile(r"#\w+")
+MENTION_PATTERN = re.compile(r"@\w+")
+
+# "exact" = dict per tag (default), "approx" = sketch dengan memori tetap untuk korpus besar
+HASHTAG_MODE = os.getenv("HASHTAG_MODE", "exact")
+# Budget memori sketch per brand (KB) dan error bound Count-Min (epsilon x total, peluang 1 - delta)
+HASHTAG_SKETCH_MEMORY_KB = int(os.getenv("HASHTAG_SKETCH_MEMORY_KB", "4096"))
+HASHTAG_SKETCH_EPSILON = float(os.getenv("HASHTAG_SKETCH_EPSILON", "0.0005"))
+HASHTAG_SKETCH_DELTA = float(os.getenv("HASHTAG_SKETCH_DELTA", "0.01"))
+# Jumlah mention teratas yang disimpan di model
+MENTION_TOP_K = 50
+
+# Trending: jumlah pemakaian TRENDING_WINDOW_DAYS hari terakhir vs jendela sebelumnya
+TRENDING_WINDOW_DAYS = int(os.getenv("HASHTAG_TRENDING_WINDOW_DAYS", "7"))
+# Minimal pemakaian di jendela terakhir supaya tag jarang tidak mendominasi growth rate
+TRENDING_MIN_COUNT = int(os.getenv("HASHTAG_TRENDING_MIN_COUNT", "3"))
+# Jumlah tag trending yang disimpan di model (endpoint tinggal slice)
+TRENDING_TOP_K = 50
+# Tetangga co-occurrence per tag yang disimpan (= limit maksimal endpoint)
+COOCCURRENCE_TOP_N = 100
+
+HASHTAG_LIST_FIELDS = ["data", "meta"]
+HASHTAG_TRENDING_FIELDS = ["meta", "trending"]
+HASHTAG_COOCCURRENCE_FIELDS = ["cooccurrence"]
+HASHTAG_MENTION_FIELDS = ["meta", "mentions"]
+
 
 # ============================================================
 # GET: Ambil semua hashtag hasil analisis
 # ============================================================
 
 @router.get("/brands/{brand_id}/hashtags")
-async def get_hashtag_stats(brand_id: str):
+async def get_hashtag_stats(
+    brand_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=HASHTAGS_PAGE_MAX, description="Kosong = semua hashtag"),
+    cursor: Optional[str] = Query(None, description="next_cursor dari halaman sebelumnya"),
+    fields: Optional[str] = Query(None, description="Field per hashtag, mis. hashtag,count"),
+):
     """
-    Mengambil hasil analisis hashtag setelah upload CSV.
+    Mengambil hasil analisis hashtag setelah upload CSV (urut count DESC),
+    opsional per halaman (limit + cursor) dan hanya field tertentu.
     """
-    try:
-        data = load_model(brand_id, "hashtags")
+    item_fields = parse_fields(fields)
+
+    def build():
+        data = load_model_fields(brand_id, "hashtags", HASHTAG_LIST_FIELDS)
 
         hashtags = data.get("data", [])
+        page, next_cursor = paginate(hashtags, limit, cursor, "hashtag")
 
         return {
             "brand_id": brand_id,
             "total_hashtags": len(hashtags),
-            "hashtags": hashtags,
-            "meta": data.get("meta", {})
+            "hashtags": page if item_fields is None else select_fields(page, item_fields),
+            "meta": data.get("meta", {}),
+            "next_cursor": next_cursor,
         }
 
-    except Exception:
+    try:
+        return model_response(request, brand_id, "hashtags", build, f"hashtags?{limit}&{cursor}&{fields}")
+
+    except Exception as e:
+        # cursor tidak valid tetap 400
+        if isinstance(e, HTTPException) and e.status_code == 400:
+            raise
         raise HTTPException(status_code=404, detail="Hashtag data not found")
 
 
@@ -35,24 +89,69 @@ async def get_hashtag_stats(brand_id: str):
 # ============================================================
 
 @router.get("/brands/{brand_id}/hashtags/trending")
-async def trending_hashtags(brand_id: str):
+async def trending_hashtags(brand_id: str, limit: int = Query(10, ge=1, le=TRENDING_TOP_K)):
     """
-    Mengambil 10 hashtag teratas berdasarkan jumlah tweet.
+    Hashtag dengan pertumbuhan tercepat (jendela terakhir vs sebelumnya).
+    Top-k sudah dihitung saat upload, endpoint hanya slice.
     """
     try:
-        data = load_model(brand_id, "hashtags")
-        hashtags = data.get("data", [])
+        data = load_model_fields(brand_id, "hashtags", HASHTAG_TRENDING_FIELDS)
+    except HTTPException:
+        raise HTTPException(status_code=404, detail="Trending hashtag not found")
 
-        # Sort list by count (DESC)
-        sorted_list = sorted(hashtags, key=lambda x: x["count"], reverse=True)
+    return {
+        "brand_id": brand_id,
+        "trending": data.get("trending", [])[:limit],
+        "window_days": data.get("meta", {}).get("trending_window_days"),
+    }
 
-        return {
-            "brand_id": brand_id,
-            "trending": sorted_list[:10]
-        }
 
-    except Exception:
-        raise HTTPException(status_code=404, detail="Trending hashtag not found")
+# ============================================================
+# GET: Hashtag yang sering muncul bersama 1 hashtag
+# ============================================================
+
+@router.get("/brands/{brand_id}/hashtags/cooccurrence")
+async def hashtag_cooccurrence(brand_id: str, tag: str, limit: int = Query(10, ge=1, le=COOCCURRENCE_TOP_N)):
+    """
+    Tag lain yang muncul di tweet yang sama dengan `tag` (jumlah tweet, DESC)
+    """
+    try:
+        data = load_model_fields(brand_id, "hashtags", HASHTAG_COOCCURRENCE_FIELDS)
+    except HTTPException:
+        raise HTTPException(status_code=404, detail="Hashtag data not found")
+
+    cooccurrence = data.get("cooccurrence") or {}
+    if "row" in cooccurrence:
+        # Model lama (matriks COO), format baru setelah upload berikutnya
+        tags = cooccurrence["tags"]
+        cooccurrence = _neighbour_lists(
+            (
+                ((tags[row], tags[col]), count)
+                for row, col, count in zip(cooccurrence["row"], cooccurrence["col"], cooccurrence["count"])
+            ),
+            tags,
+        )
+    tag = tag if tag.startswith("#") else f"#{tag}"
+    if tag not in cooccurrence:
+        raise HTTPException(status_code=404, detail=f"Hashtag {tag} tidak ditemukan")
+
+    # Tetangga sudah urut count DESC saat upload -> cukup slice
+    related = [{"hashtag": other, "count": count} for other, count in cooccurrence[tag][:limit]]
+    return {"brand_id": brand_id, "hashtag": tag, "related": related}
+
+
+# ============================================================
+# GET: Mention teratas (Space-Saving, count_error = batas atas selisih)
+# ============================================================
+
+@router.get("/brands/{brand_id}/mentions")
+async def top_mentions(brand_id: str, limit: int = Query(10, ge=1, le=MENTION_TOP_K)):
+    try:
+        data = load_model_fields(brand_id, "hashtags", HASHTAG_MENTION_FIELDS)
+    except HTTPException:
+        raise HTTPException(status_code=404, detail="Mention data not found")
+
+    return {"brand_id": brand_id, "mentions": data.get("mentions", [])[:limit]}
 
 
 # ============================================================
@@ -60,65 +159,466 @@ async def trending_hashtags(brand_id: str):
 # Dipanggil saat upload CSV
 # ============================================================
 
-def compute_hashtag_analysis(brand_id: str, brand_name: str, tweets):
+def _sketch_sizes():
     """
-    Menghitung statistik hashtag dari semua tweet yang di-upload.
+    Bagi HASHTAG_SKETCH_MEMORY_KB: maksimal separuh untuk 2 Count-Min (tag, mention),
+    sisanya kapasitas Space-Saving. Tag terlacak juga menyimpan jumlah per hari untuk
+    2 jendela trending, jadi 1 tag dihitung (1 + 2 x TRENDING_WINDOW_DAYS / 4) entry.
+    """
+    budget = HASHTAG_SKETCH_MEMORY_KB * 1024
+    cms = CountMinSketch.from_error(HASHTAG_SKETCH_EPSILON, HASHTAG_SKETCH_DELTA)
+    width = max(16, min(cms.width, budget // 2 // (2 * cms.depth * 8)))
+    entries = max(64, (budget - 2 * cms.depth * width * 8) // SPACE_SAVING_ENTRY_BYTES)
+    tag_cost = 1 + 2 * TRENDING_WINDOW_DAYS / 4
+    return {
+        "cms_width": width,
+        "cms_depth": cms.depth,
+        "hashtags": int(entries / 2 / tag_cost),
+        "pairs": entries // 4,
+        "mentions": entries // 4,
+    }
 
-    Format output konsisten:
-    {
-        "data": [ { "hashtag": "#xxx", "count": 5, ... }, ... ],
-        "meta": {...}
+
+def _init_mention_state():
+    sizes = _sketch_sizes()
+    return {
+        "mentions": SpaceSaving(sizes["mentions"]),
+        "mention_cms": CountMinSketch(sizes["cms_width"], sizes["cms_depth"]),
+    }
+
+
+def _init_approx_state():
+    sizes = _sketch_sizes()
+    return {
+        "mode": "approx",
+        "hashtags": SpaceSaving(sizes["hashtags"]),
+        "pairs": SpaceSaving(sizes["pairs"]),
+        "hashtag_cms": CountMinSketch(sizes["cms_width"], sizes["cms_depth"]),
+        # Pemakaian per hari, hanya tag yang terlacak di "hashtags" dan 2 jendela trending terakhir
+        "recent_days": {},
+        "last_day": None,
+        **_init_mention_state(),
     }
+
+
+def init_hashtag_state():
     """
-    import re
-    from collections import defaultdict
-
-    hashtag_stats = defaultdict(lambda: {
-        "count": 0,
-        "total_engagement": 0,
-        "avg_engagement": 0
-    })
-
-    for t in tweets:
-        text = t.full_text
-        engagement = (
-            t.favorite_count
-            + t.retweet_count
-            + t.reply_count
-            + t.quote_count
-        )
+    State agregat hashtag yang bisa diisi bertahap (per chunk CSV).
+    exact: statistik per tag, pemakaian per hari, dan jumlah pasangan tag dalam 1 tweet.
+    approx: Space-Saving + Count-Min dengan ukuran tetap (HASHTAG_SKETCH_MEMORY_KB).
+    Mention selalu lewat sketch.
+    """
+    if HASHTAG_MODE == "approx":
+        return _init_approx_state()
+    return {"hashtag_stats": {}, "daily_counts": {}, "pair_counts": Counter(), **_init_mention_state()}
+
+
+def _cooccurrence_pairs(tag_lists):
+    """
+    Matriks sparse tweet x tag (biner) -> A.T @ A = co-occurrence per chunk.
+    Return Counter (tag_a, tag_b) -> jumlah tweet, tag_a < tag_b.
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for i, tags in enumerate(tag_lists):
+        if len(tags) < 2:
+            continue
+        for tag in set(tags):
+            rows.append(i)
+            cols.append(vocabulary.setdefault(tag, len(vocabulary)))
+
+    pairs = Counter()
+    if not rows:
+        return pairs
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(len(tag_lists), len(vocabulary))
+    )
+    cooccurrence = sparse.triu(incidence.T @ incidence, k=1).tocoo()
+    names = list(vocabulary)
+    for row, col, count in zip(cooccurrence.row.tolist(), cooccurrence.col.tolist(), cooccurrence.data.tolist()):
+        a, b = names[row], names[col]
+        pairs[(a, b) if a < b else (b, a)] += count
+    return pairs
+
 
-        hashtags = re.findall(r"#\w+", text)
+def _update_mentions(state, texts):
+    mention_counts = Counter(mention for text in texts for mention in MENTION_PATTERN.findall(text))
+    if "mentions" not in state:
+        state.update(_init_mention_state())
+    state["mentions"].update(mention_counts)
+    state["mention_cms"].add(list(mention_counts), np.fromiter(mention_counts.values(), dtype=np.int64))
 
+
+def _merge_recent_days(state, other_days, other_last_day):
+    """
+    Tambahkan jumlah per hari lalu buang tag yang tidak terlacak lagi dan hari
+    di luar 2 jendela trending -> ukuran maksimal kapasitas x 2 x TRENDING_WINDOW_DAYS
+    """
+    if other_last_day is not None and (state["last_day"] is None or other_last_day > state["last_day"]):
+        state["last_day"] = other_last_day
+    if state["last_day"] is None:
+        return
+    cutoff, _ = _trending_windows(state["last_day"])
+    tracked = state["hashtags"].counts
+    recent_days = state["recent_days"]
+    for tag, per_day in other_days.items():
+        if tag not in tracked:
+            continue
+        current = recent_days.setdefault(tag, {})
+        for day, count in per_day.items():
+            if day >= cutoff:
+                current[day] = current.get(day, 0) + count
+    state["recent_days"] = {
+        tag: kept
+        for tag, per_day in recent_days.items()
+        if tag in tracked and (kept := {day: c for day, c in per_day.items() if day >= cutoff})
+    }
+
+
+def _update_approx_state(state, batch, tag_lists, days):
+    tag_counts = Counter()
+    tag_engagement = Counter()
+    for hashtags, engagement in zip(tag_lists, batch.engagement.tolist()):
+        for tag in hashtags:
+            tag_counts[tag] += 1
+            tag_engagement[tag] += engagement
+    state["hashtags"].update(tag_counts, tag_engagement)
+    state["hashtag_cms"].add(list(tag_counts), np.fromiter(tag_counts.values(), dtype=np.int64))
+
+    chunk_days = {}
+    for day, hashtags in zip(days, tag_lists):
+        if not isinstance(day, str):
+            continue
         for tag in hashtags:
-            stat = hashtag_stats[tag]
+            per_day = chunk_days.setdefault(tag, {})
+            per_day[day] = per_day.get(day, 0) + 1
+    _merge_recent_days(state, chunk_days, max((d for d in days if isinstance(d, str)), default=None))
+
+    state["pairs"].update({f"{a} {b}": count for (a, b), count in _cooccurrence_pairs(tag_lists).items()})
+
+
+def update_hashtag_state(state, tweets):
+    batch = as_tweet_batch(tweets)
+    if len(batch) == 0:
+        return state
+
+    texts = batch.full_text.tolist()
+    tag_lists = [HASHTAG_PATTERN.findall(text) for text in texts]
+    # Pemakaian per hari (UTC); tweet dengan created_at tidak valid tidak ikut
+    days = parse_created_at(batch.created_at).dt.strftime("%Y-%m-%d").tolist()
+    _update_mentions(state, texts)
+
+    if state.get("mode") == "approx":
+        _update_approx_state(state, batch, tag_lists, days)
+        return state
+
+    hashtag_stats = state["hashtag_stats"]
+    for hashtags, engagement in zip(tag_lists, batch.engagement.tolist()):
+        for tag in hashtags:
+            stat = hashtag_stats.get(tag)
+            if stat is None:
+                stat = hashtag_stats[tag] = {"count": 0, "total_engagement": 0}
             stat["count"] += 1
             stat["total_engagement"] += engagement
 
-    # Hitung rata-rata engagement
-    for tag, stat in hashtag_stats.items():
-        if stat["count"] > 0:
-            stat["avg_engagement"] = stat["total_engagement"] / stat["count"]
+    daily_counts = state.setdefault("daily_counts", {})
+    for day, hashtags in zip(days, tag_lists):
+        if not hashtags or not isinstance(day, str):
+            continue
+        for tag in hashtags:
+            per_day = daily_counts.setdefault(tag, {})
+            per_day[day] = per_day.get(day, 0) + 1
+
+    state.setdefault("pair_counts", Counter()).update(_cooccurrence_pairs(tag_lists))
+    return state
+
+
+def _to_approx_state(state):
+    """
+    State exact -> approx (mis. histori brand exact, upload baru dengan HASHTAG_MODE=approx)
+    """
+    approx = _init_approx_state()
+    hashtag_stats = state["hashtag_stats"]
+    approx["hashtags"].update(
+        {tag: stat["count"] for tag, stat in hashtag_stats.items()},
+        {tag: stat["total_engagement"] for tag, stat in hashtag_stats.items()},
+    )
+    approx["hashtag_cms"].add(list(hashtag_stats), np.array([s["count"] for s in hashtag_stats.values()], dtype=np.int64))
+    daily_counts = state.get("daily_counts", {})
+    last_day = max((day for per_day in daily_counts.values() for day in per_day), default=None)
+    _merge_recent_days(approx, daily_counts, last_day)
+    approx["pairs"].update({f"{a} {b}": count for (a, b), count in state.get("pair_counts", {}).items()})
+    if "mentions" in state:
+        approx["mentions"], approx["mention_cms"] = state["mentions"], state["mention_cms"]
+    return approx
+
+
+def _merge_approx_states(state, other):
+    for key in ("hashtags", "pairs", "hashtag_cms"):
+        state[key].merge(other[key])
+    _merge_recent_days(state, other["recent_days"], other["last_day"])
+    return state
+
+
+def merge_hashtag_states(state, other):
+    if "mentions" in other:
+        if "mentions" in state:
+            state["mentions"].merge(other["mentions"])
+            state["mention_cms"].merge(other["mention_cms"])
+        else:
+            state["mentions"], state["mention_cms"] = other["mentions"], other["mention_cms"]
+
+    # Mode berbeda -> yang exact diubah jadi approx dulu (state diubah in-place)
+    if state.get("mode") == "approx" or other.get("mode") == "approx":
+        if state.get("mode") != "approx":
+            converted = _to_approx_state(state)
+            state.clear()
+            state.update(converted)
+        return _merge_approx_states(state, other if other.get("mode") == "approx" else _to_approx_state(other))
+
+    hashtag_stats = state["hashtag_stats"]
+    for tag, other_stat in other["hashtag_stats"].items():
+        stat = hashtag_stats.get(tag)
+        if stat is None:
+            stat = hashtag_stats[tag] = {"count": 0, "total_engagement": 0}
+        stat["count"] += other_stat["count"]
+        stat["total_engagement"] += other_stat["total_engagement"]
+
+    # State lama (sebelum ada daily/pair) -> mulai dari kosong
+    daily_counts = state.setdefault("daily_counts", {})
+    for tag, other_days in other.get("daily_counts", {}).items():
+        per_day = daily_counts.setdefault(tag, {})
+        for day, count in other_days.items():
+            per_day[day] = per_day.get(day, 0) + count
+    state.setdefault("pair_counts", Counter()).update(other.get("pair_counts", {}))
+    return state
+
+
+def _trending_windows(last_day):
+    """
+    (awal jendela sebelumnya, awal jendela terakhir), mundur dari hari terakhir di data brand
+    """
+    last = np.datetime64(last_day)
+    recent_start = str(last - np.timedelta64(TRENDING_WINDOW_DAYS - 1, "D"))
+    previous_start = str(last - np.timedelta64(2 * TRENDING_WINDOW_DAYS - 1, "D"))
+    return previous_start, recent_start
+
+
+def _trending_row(tag, count, total_engagement, recent, previous):
+    return {
+        "hashtag": tag,
+        "count": count,
+        "total_engagement": total_engagement,
+        "avg_engagement": total_engagement / count if count > 0 else 0,
+        "recent_count": recent,
+        "previous_count": previous,
+        # Growth rate = (jendela terakhir - jendela sebelumnya) / max(jendela sebelumnya, 1)
+        "growth_rate": round((recent - previous) / max(previous, 1), 4),
+    }
+
+
+def _top_trending(rows):
+    # Top-k tanpa sort seluruh list
+    return heapq.nsmallest(
+        TRENDING_TOP_K, rows, key=lambda r: (-r["growth_rate"], -r["recent_count"], r["hashtag"])
+    )
+
+
+def _trending(hashtag_stats, daily_counts):
+    last_day = max((day for per_day in daily_counts.values() for day in per_day), default=None)
+    if last_day is None:
+        return []
+    previous_start, recent_start = _trending_windows(last_day)
+
+    rows = []
+    for tag, per_day in daily_counts.items():
+        recent = sum(count for day, count in per_day.items() if day >= recent_start)
+        if recent < TRENDING_MIN_COUNT:
+            continue
+        previous = sum(count for day, count in per_day.items() if previous_start <= day < recent_start)
+        stat = hashtag_stats[tag]
+        rows.append(_trending_row(tag, stat["count"], stat["total_engagement"], recent, previous))
+    return _top_trending(rows)
+
+
+def _neighbour_lists(pairs, tags=()):
+    """
+    ((a, b), count) -> tag: [[tag lain, count], ...] urut count DESC, maksimal
+    COOCCURRENCE_TOP_N per tag (endpoint co-occurrence tinggal lookup + slice).
+    tags = tag yang dikenal walau tanpa pasangan (list kosong, bukan 404)
+    """
+    neighbours = {tag: [] for tag in tags}
+    for (a, b), count in pairs:
+        neighbours.setdefault(a, []).append((b, count))
+        neighbours.setdefault(b, []).append((a, count))
+    return {
+        tag: [[other, count] for other, count in heapq.nsmallest(COOCCURRENCE_TOP_N, items, key=lambda e: (-e[1], e[0]))]
+        for tag, items in neighbours.items()
+    }
+
+
+def _window_daily_counts(hashtag_list, per_day_counts, last_day):
+    """
+    Jumlah per hari yang disimpan di model: 2 jendela trending, top TRENDING_TOP_K tag
+    """
+    if last_day is None:
+        return {}
+    previous_start, _ = _trending_windows(last_day)
+    return {
+        row["hashtag"]: {
+            day: count for day, count in per_day_counts.get(row["hashtag"], {}).items() if day >= previous_start
+        }
+        for row in hashtag_list[:TRENDING_TOP_K]
+    }
+
+
+def _tightened(entries, cms):
+    """
+    Space-Saving dan Count-Min sama-sama batas atas -> pakai yang lebih kecil,
+    batas bawah (count - error) tetap
+    """
+    if not entries:
+        return entries
+    estimates = cms.estimate([item for item, *_ in entries]).tolist()
+    tightened = []
+    for (item, count, error, weight), estimate in zip(entries, estimates):
+        lower = count - error
+        count = min(count, estimate)
+        tightened.append((item, count, max(0, count - lower), weight))
+    return sorted(tightened, key=lambda e: (-e[1], e[0]))
 
-    # Ubah dict menjadi LIST
+
+def _mention_list(state):
+    if "mentions" not in state:
+        return []
+    entries = _tightened(state["mentions"].top(), state["mention_cms"])
+    return [
+        {"mention": mention, "count": count, "count_error": error}
+        for mention, count, error, _ in entries[:MENTION_TOP_K]
+    ]
+
+
+def _sketch_meta(state):
+    meta = {
+        "mention_capacity": state["mentions"].capacity,
+        "mention_error_bound": round(state["mentions"].error_bound(), 2),
+    } if "mentions" in state else {}
+    if state.get("mode") == "approx":
+        cms = state["hashtag_cms"]
+        meta.update({
+            "memory_kb": HASHTAG_SKETCH_MEMORY_KB,
+            "hashtag_capacity": state["hashtags"].capacity,
+            "hashtag_error_bound": round(state["hashtags"].error_bound(), 2),
+            "pair_capacity": state["pairs"].capacity,
+            "count_min": {"width": cms.width, "depth": cms.depth, "epsilon": round(cms.epsilon, 6), "delta": HASHTAG_SKETCH_DELTA},
+        })
+    return meta
+
+
+def _finalize_approx(brand_id: str, brand_name: str, state):
+    """
+    Hashtag list = item Space-Saving (count bisa lebih besar dari asli, maksimal count_error);
+    trending dan daily_counts dari jumlah per hari tag yang terlacak (2 jendela terakhir);
+    trending hanya tag dengan count_error 0, yang jumlah per harinya exact.
+    """
+    entries = _tightened(state["hashtags"].top(), state["hashtag_cms"])
+    hashtag_list = [
+        {
+            "hashtag": tag,
+            "count": count,
+            "total_engagement": engagement,
+            "avg_engagement": engagement / count if count > 0 else 0,
+            "count_error": error,
+        }
+        for tag, count, error, engagement in entries
+    ]
+
+    trending = []
+    recent_days = state["recent_days"]
+    if state["last_day"] is not None:
+        _, recent_start = _trending_windows(state["last_day"])
+        for tag, count, error, engagement in entries:
+            # error > 0 -> tag pernah terbuang dari ringkasan, riwayat per harinya tidak lengkap
+            if error:
+                continue
+            per_day = recent_days.get(tag, {})
+            recent = sum(c for day, c in per_day.items() if day >= recent_start)
+            if recent < TRENDING_MIN_COUNT:
+                continue
+            previous = sum(c for day, c in per_day.items() if day < recent_start)
+            trending.append(_trending_row(tag, count, engagement, recent, previous))
+        trending = _top_trending(trending)
+
+    return {
+        "data": hashtag_list,
+        "trending": trending,
+        "daily_counts": _window_daily_counts(hashtag_list, recent_days, state["last_day"]),
+        "cooccurrence": _neighbour_lists(
+            ((tuple(pair.split(" ")), count) for pair, count, _, _ in state["pairs"].top()),
+            (row["hashtag"] for row in hashtag_list),
+        ),
+        "mentions": _mention_list(state),
+        "meta": {
+            "brand_id": brand_id,
+            "brand_name": brand_name,
+            "unique_hashtags": len(hashtag_list),
+            "trending_window_days": TRENDING_WINDOW_DAYS,
+            "mode": "approx",
+            "sketch": _sketch_meta(state),
+        }
+    }
+
+
+def finalize_hashtag_analysis(brand_id: str, brand_name: str, state):
+    if state.get("mode") == "approx":
+        return _finalize_approx(brand_id, brand_name, state)
+
+    hashtag_stats = state["hashtag_stats"]
+    daily_counts = state.get("daily_counts", {})
+    pair_counts = state.get("pair_counts", Counter())
+
+    # Ubah dict menjadi LIST + hitung rata-rata engagement
     hashtag_list = [
         {
             "hashtag": tag,
             "count": stat["count"],
             "total_engagement": stat["total_engagement"],
-            "avg_engagement": stat["avg_engagement"]
+            "avg_engagement": stat["total_engagement"] / stat["count"] if stat["count"] > 0 else 0
         }
         for tag, stat in hashtag_stats.items()
     ]
 
     # ✅ Tambahan sesuai permintaan (sort by count DESC)
     hashtag_list = sorted(hashtag_list, key=lambda x: x["count"], reverse=True)
+    last_day = max((day for per_day in daily_counts.values() for day in per_day), default=None)
 
+    # Model hanya menyimpan yang dibaca endpoint (state lengkap tetap di brand_state untuk append)
     return {
         "data": hashtag_list,
+        "trending": _trending(hashtag_stats, daily_counts),
+        "daily_counts": _window_daily_counts(hashtag_list, daily_counts, last_day),
+        "cooccurrence": _neighbour_lists(pair_counts.items(), (row["hashtag"] for row in hashtag_list)),
+        "mentions": _mention_list(state),
         "meta": {
             "brand_id": brand_id,
             "brand_name": brand_name,
             "unique_hashtags": len(hashtag_list),
+            "trending_window_days": TRENDING_WINDOW_DAYS,
+            "mode": "exact",
+            "sketch": _sketch_meta(state),
         }
     }
+
+
+def compute_hashtag_analysis(brand_id: str, brand_name: str, tweets):
+    """
+    Menghitung statistik hashtag dari semua tweet yang di-upload.
+
+    Format output konsisten:
+    {
+        "data": [ { "hashtag": "#xxx", "count": 5, ... }, ... ],
+        "meta": {...}
+    }
+    """
+    state = update_hashtag_state(init_hashtag_state(), tweets)
+    return finalize_hashtag_analysis(brand_id, brand_name, state)
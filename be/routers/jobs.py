@@ -0,0 +1,23 @@
+# app/routers/jobs.py
+from fastapi import APIRouter
+
+from core.jobs import get_job, list_jobs
+
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+
+@router.get("/jobs")
+async def list_all_jobs():
+    """
+    Daftar job background (terbaru dulu), tanpa payload result
+    """
+    jobs = [{k: v for k, v in job.items() if k != "result"} for job in list_jobs()]
+    return {"success": True, "total_jobs": len(jobs), "jobs": jobs}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Status 1 job: state (queued/running/done/failed), progress, timing per stage
+    """
+    return {"success": True, "job": get_job(job_id)}
@@ -0,0 +1,19 @@
+# app/routers/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+
+# ============================================================
+# GET: Metric Prometheus (stage upload, model store, cache, latency)
+# ============================================================
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Format teks Prometheus 0.0.4, untuk di-scrape (per proses server)
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,11 +1,28 @@
 # app/routers/sentiment.py
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
 from datetime import datetime
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
 import re
 import string
+import threading
+import weakref
+import numpy as np
 
-from core.shared import TweetData, load_model
+from core.metrics import registry
+from core.sentiment_engine import VectorizedVader
+from core.shared import TweetsInput, as_tweet_batch, load_model_fields, model_response, tweet_store
+from routers.tweets import TWEETS_PAGE_MAX
 
 # NLTK imports
 import nltk
@@ -26,26 +43,101 @@ sia = SentimentIntensityAnalyzer()
 # ============================
 # TEXT CLEANING
 # ============================
+# Satu regex untuk semua substitusi clean_text versi lama (URL, &amp, @mention,
+# #hashtag, angka). Hasilnya sama dengan menjalankannya berurutan:
+# - mention/hashtag ikut menelan "&amp" (versi lama: &amp -> "and" dulu, lalu
+#   "@and..." terhapus), tapi berhenti sebelum URL (versi lama: URL dihapus dulu)
+_CLEAN_RE = re.compile(
+    r"http\S+|www\S+|[@#](?:(?!http\S|www\S)(?:\w|&amp))+|&amp|\d+"
+)
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+
+def _clean_match(match: "re.Match[str]") -> str:
+    return "and" if match.group() == "&amp" else ""
+
+
 def clean_text(text: str) -> str:
-    text = text.lower()
-    text = re.sub(r"http\S+|www\S+", "", text)
-    text = re.sub(r"&amp", "and", text)
-    text = re.sub(r"@\w+", "", text)
-    text = re.sub(r"#\w+", "", text)
-    text = re.sub(r"\d+", "", text)
+    text = _CLEAN_RE.sub(_clean_match, text.lower())
     text = text.encode('ascii', 'ignore').decode('ascii')
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    text = text.translate(_PUNCTUATION_TABLE)
+    return " ".join(text.split())
 
 
 # ============================
 # SENTIMENT PROCESSING
 # ============================
-def get_sentiment_vader(text: str) -> tuple[str, float]:
-    cleaned = clean_text(text)
-    score = sia.polarity_scores(cleaned)
-    compound = score["compound"]
+# Jumlah teks bersih yang hasil VADER-nya diingat (retweet / copy-paste kampanye
+# sering berulang persis). Per proses; 0 = tanpa memo.
+SENTIMENT_MEMO_SIZE = int(os.environ.get("SENTIMENT_MEMO_SIZE", 100_000))
+
+
+class _ScoreMemo:
+    """
+    LRU kecil: digest blake2b 8 byte teks bersih -> (label, compound).
+    Key ukuran tetap (seperti core/sketches.py), bukan teks utuh -> memori per entry
+    tidak ikut panjang tweet. Tabrakan 64-bit di 100k entry praktis nol.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: bytes) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: Tuple[str, float]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+score_memo = _ScoreMemo(SENTIMENT_MEMO_SIZE)
+
+
+def score_cleaned(cleaned: str) -> Tuple[str, float]:
+    """
+    (label, compound) untuk teks yang sudah di-clean_text, di-memo per digest teks
+    """
+    key = hashlib.blake2b(cleaned.encode("utf-8"), digest_size=8).digest()
+    result = score_memo.get(key)
+    if result is None:
+        result = _score_vader(cleaned)
+        score_memo.put(key, result)
+    return result
+
+
+def _score_vader(cleaned: str) -> Tuple[str, float]:
+    compound = sia.polarity_scores(cleaned)["compound"]
 
     if compound >= 0.05:
         sentiment = "positive"
@@ -57,87 +149,154 @@ def get_sentiment_vader(text: str) -> tuple[str, float]:
     return sentiment, compound
 
 
+def get_sentiment_vader(text: str) -> tuple[str, float]:
+    return score_cleaned(clean_text(text))
+
+
+def sentiment_memo_stats() -> Dict[str, Any]:
+    return score_memo.stats()
+
+
+def _sentiment_memo_metrics():
+    stats = sentiment_memo_stats()
+    return [
+        ("xinsight_sentiment_memo_hits_total", "counter", "Skor VADER dari memo per teks", [({}, stats["hits"])]),
+        ("xinsight_sentiment_memo_misses_total", "counter", "Skor VADER yang dihitung ulang", [({}, stats["misses"])]),
+        ("xinsight_sentiment_memo_entries", "gauge", "Jumlah teks di memo", [({}, stats["entries"])]),
+    ]
+
+
+registry.register_collector(_sentiment_memo_metrics)
+
+
+# Engine scoring: "vader" = polarity_scores per teks (+ memo),
+# "vectorized" = seluruh batch sekaligus lewat matriks sparse (core/sentiment_engine.py)
+SENTIMENT_ENGINES = ("vader", "vectorized")
+SENTIMENT_ENGINE_PATTERN = "^(vader|vectorized)$"
+vectorized_vader = VectorizedVader(sia)
+
+ANALYSIS_METHODS = {
+    "vader": "VADER (Valence Aware Dictionary and sEntiment Reasoner)",
+    "vectorized": "VADER lexicon, vectorized batch scoring",
+}
+
+
+def score_texts(texts: List[str], engine: str = "vader") -> List[Tuple[str, float]]:
+    """
+    (sentiment, compound) untuk banyak teks sekaligus. Top-level supaya bisa
+    dijalankan di worker proses.
+    """
+    if engine == "vectorized":
+        return vectorized_vader.score([clean_text(text) for text in texts])
+    return [get_sentiment_vader(text) for text in texts]
+
+
 # ============================
 # MAIN BRAND SENTIMENT MODEL
 # ============================
-def compute_sentiment_model(brand_id: str, brand_name: str, tweets: List[TweetData]) -> Dict[str, Any]:
-    sentiment_results = {
+def init_sentiment_state(keep_scores: bool = False) -> Dict[str, Any]:
+    """
+    State agregat sentiment yang bisa diisi bertahap (per chunk CSV).
+    keep_scores=True -> simpan juga compound per tweet (float64, urut sesuai input).
+    """
+    return {
         "positive": 0,
         "neutral": 0,
         "negative": 0,
-        "total_tweets": len(tweets),
+        "total_tweets": 0,
+        # compound VADER dibulatkan 4 desimal -> dijumlah sebagai integer (x10000)
+        # supaya hasil merge shard sama persis dengan proses serial
+        "compound_sum_e4": 0,
         "positive_examples": [],
         "negative_examples": [],
         "neutral_examples": [],
-        "average_compound_score": 0.0,
+        "compound_scores": [] if keep_scores else None,
     }
 
-    total_compound = 0.0
 
-    for tweet in tweets:
-        sentiment, compound_score = get_sentiment_vader(tweet.full_text)
-        total_compound += compound_score
-        engagement = tweet.favorite_count + tweet.retweet_count
+def update_sentiment_state(state: Dict[str, Any], tweets: TweetsInput, engine: str = "vader") -> Dict[str, Any]:
+    batch = as_tweet_batch(tweets)
+    full_texts = batch.full_text.tolist()
+    scores = score_texts(full_texts, engine)
+    if state.get("compound_scores") is not None:
+        state["compound_scores"].append(np.array([compound for _, compound in scores], dtype=np.float64))
+
+    for i, (full_text, (sentiment, compound_score)) in enumerate(zip(full_texts, scores)):
+        state["compound_sum_e4"] += int(round(compound_score * 10000))
+        state[sentiment] += 1
 
         # ✅ Simpan minimal 2 contoh per sentimen (max 5 untuk diversitas)
-        if sentiment == "positive":
-            sentiment_results["positive"] += 1
-            if len(sentiment_results["positive_examples"]) < 5:
-                sentiment_results["positive_examples"].append({
-                    "id_str": tweet.id_str,
-                    "text": tweet.full_text,
-                    "text_preview": tweet.full_text[:150] + "..." if len(tweet.full_text) > 150 else tweet.full_text,
-                    "engagement": engagement,
-                    "favorite_count": tweet.favorite_count,
-                    "retweet_count": tweet.retweet_count,
-                    "score": round(compound_score, 3),
-                    "created_at": tweet.created_at,
-                })
+        examples = state[f"{sentiment}_examples"]
+        if len(examples) < 5:
+            favorite_count = int(batch.favorite_count[i])
+            retweet_count = int(batch.retweet_count[i])
+            examples.append({
+                "id_str": batch.id_str[i],
+                "text": full_text,
+                "text_preview": full_text[:150] + "..." if len(full_text) > 150 else full_text,
+                "engagement": favorite_count + retweet_count,
+                "favorite_count": favorite_count,
+                "retweet_count": retweet_count,
+                "score": round(compound_score, 3),
+                "created_at": batch.created_at[i],
+            })
+
+    state["total_tweets"] += len(batch)
+    return state
+
+
+def merge_sentiment_states(state: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Gabungkan state shard berikutnya ke state (urutan shard harus sama dengan urutan tweet).
+    """
+    for key in ("positive", "neutral", "negative", "total_tweets", "compound_sum_e4"):
+        state[key] += other[key]
 
-        elif sentiment == "negative":
-            sentiment_results["negative"] += 1
-            if len(sentiment_results["negative_examples"]) < 5:
-                sentiment_results["negative_examples"].append({
-                    "id_str": tweet.id_str,
-                    "text": tweet.full_text,
-                    "text_preview": tweet.full_text[:150] + "..." if len(tweet.full_text) > 150 else tweet.full_text,
-                    "engagement": engagement,
-                    "favorite_count": tweet.favorite_count,
-                    "retweet_count": tweet.retweet_count,
-                    "score": round(compound_score, 3),
-                    "created_at": tweet.created_at,
-                })
+    for label in ("positive", "neutral", "negative"):
+        examples = state[f"{label}_examples"]
+        examples.extend(other[f"{label}_examples"][: max(0, 5 - len(examples))])
+    if state.get("compound_scores") is not None and other.get("compound_scores") is not None:
+        state["compound_scores"].extend(other["compound_scores"])
+    return state
 
-        else:
-            sentiment_results["neutral"] += 1
-            if len(sentiment_results["neutral_examples"]) < 5:
-                sentiment_results["neutral_examples"].append({
-                    "id_str": tweet.id_str,
-                    "text": tweet.full_text,
-                    "text_preview": tweet.full_text[:150] + "..." if len(tweet.full_text) > 150 else tweet.full_text,
-                    "engagement": engagement,
-                    "favorite_count": tweet.favorite_count,
-                    "retweet_count": tweet.retweet_count,
-                    "score": round(compound_score, 3),
-                    "created_at": tweet.created_at,
-                })
-
-    total = len(tweets) or 1
+
+def finalize_sentiment_model(
+    brand_id: str, brand_name: str, state: Dict[str, Any], engine: str = "vader"
+) -> Dict[str, Any]:
+    sentiment_results = {
+        "positive": state["positive"],
+        "neutral": state["neutral"],
+        "negative": state["negative"],
+        "total_tweets": state["total_tweets"],
+        "positive_examples": list(state["positive_examples"]),
+        "negative_examples": list(state["negative_examples"]),
+        "neutral_examples": list(state["neutral_examples"]),
+        "average_compound_score": 0.0,
+    }
+
+    total = state["total_tweets"] or 1
     sentiment_results["positive_pct"] = round((sentiment_results["positive"] / total) * 100, 2)
     sentiment_results["neutral_pct"] = round((sentiment_results["neutral"] / total) * 100, 2)
     sentiment_results["negative_pct"] = round((sentiment_results["negative"] / total) * 100, 2)
-    sentiment_results["average_compound_score"] = round(total_compound / total, 3)
+    sentiment_results["average_compound_score"] = round(state["compound_sum_e4"] / 10000 / total, 3)
 
     return {
         "brand_id": brand_id,
         "brand_name": brand_name,
         "model_type": "sentiment",
-        "analysis_method": "VADER (Valence Aware Dictionary and sEntiment Reasoner)",
+        "analysis_method": ANALYSIS_METHODS[engine],
         "created_at": datetime.now().isoformat(),
         "data": sentiment_results,
     }
 
 
+def compute_sentiment_model(
+    brand_id: str, brand_name: str, tweets: TweetsInput, engine: str = "vader"
+) -> Dict[str, Any]:
+    state = update_sentiment_state(init_sentiment_state(), tweets, engine)
+    return finalize_sentiment_model(brand_id, brand_name, state, engine)
+
+
 # ============================
 # REQUIRED BY upload.py
 # ANALYZE SENTIMENT FOR DATAFRAME
@@ -156,7 +315,8 @@ def analyze_sentiment_df(df):
 
     for _, row in df.iterrows():
         text = str(row["full_text"])
-        sentiment, compound = get_sentiment_vader(text)
+        cleaned = clean_text(text)
+        sentiment, compound = score_cleaned(cleaned)
         total_compound += compound
 
         # aggregate
@@ -169,7 +329,7 @@ def analyze_sentiment_df(df):
 
         results.append({
             "text": text,
-            "cleaned_text": clean_text(text),
+            "cleaned_text": cleaned,
             "sentiment": sentiment,
             "compound": round(compound, 3),
         })
@@ -195,53 +355,96 @@ def analyze_sentiment_df(df):
 # ============================
 # ROUTES
 # ============================
+# Field model yang dibaca tiap endpoint (backend sqlite hanya membaca part ini)
+SENTIMENT_EXAMPLE_FIELDS = ["data.positive_examples", "data.neutral_examples", "data.negative_examples"]
+SENTIMENT_VIEW_FIELDS = [
+    "brand_id", "brand_name", "model_type", "analysis_method", "created_at",
+    "data.positive", "data.neutral", "data.negative",
+    "data.positive_pct", "data.neutral_pct", "data.negative_pct",
+    "data.average_compound_score",
+    *SENTIMENT_EXAMPLE_FIELDS,
+]
+
 @router.get("/{brand_id}/sentiment")
-async def get_brand_sentiment(brand_id: str):
+async def get_brand_sentiment(brand_id: str, request: Request):
     """
     Ambil sentiment analysis dengan minimal 2 contoh per sentimen
     """
     brand_id = brand_id.lower()
-    model = load_model(brand_id, "sentiment")
-    
-    # ✅ Ensure minimal 2 examples per sentiment (slice dari 5 yang disimpan)
-    data = model.get("data", {})
-    
-    return {
-        "success": True,
-        "brand_id": model.get("brand_id"),
-        "brand_name": model.get("brand_name"),
-        "sentiment_distribution": {
-            "positive": data.get("positive", 0),
-            "neutral": data.get("neutral", 0),
-            "negative": data.get("negative", 0),
-            "positive_pct": data.get("positive_pct", 0),
-            "neutral_pct": data.get("neutral_pct", 0),
-            "negative_pct": data.get("negative_pct", 0),
-            "average_compound_score": data.get("average_compound_score", 0),
-        },
-        "sentiment_examples": {
-            "positive": data.get("positive_examples", [])[:2],  # ✅ Min 2 examples
-            "neutral": data.get("neutral_examples", [])[:2],
-            "negative": data.get("negative_examples", [])[:2],
-        },
-        "meta": {
-            "model_type": model.get("model_type"),
-            "analysis_method": model.get("analysis_method"),
-            "created_at": model.get("created_at"),
+
+    def build():
+        model = load_model_fields(brand_id, "sentiment", SENTIMENT_VIEW_FIELDS)
+
+        # ✅ Ensure minimal 2 examples per sentiment (slice dari 5 yang disimpan)
+        data = model.get("data", {})
+
+        return {
+            "success": True,
+            "brand_id": model.get("brand_id"),
+            "brand_name": model.get("brand_name"),
+            "sentiment_distribution": {
+                "positive": data.get("positive", 0),
+                "neutral": data.get("neutral", 0),
+                "negative": data.get("negative", 0),
+                "positive_pct": data.get("positive_pct", 0),
+                "neutral_pct": data.get("neutral_pct", 0),
+                "negative_pct": data.get("negative_pct", 0),
+                "average_compound_score": data.get("average_compound_score", 0),
+            },
+            "sentiment_examples": {
+                "positive": data.get("positive_examples", [])[:2],  # ✅ Min 2 examples
+                "neutral": data.get("neutral_examples", [])[:2],
+                "negative": data.get("negative_examples", [])[:2],
+            },
+            "meta": {
+                "model_type": model.get("model_type"),
+                "analysis_method": model.get("analysis_method"),
+                "created_at": model.get("created_at"),
+            }
         }
-    }
+
+    return model_response(request, brand_id, "sentiment", build, "sentiment")
+
+
+def _stored_examples(brand_id: str, label: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Baris tweet_store dalam format yang sama dengan *_examples di model
+    """
+    page = tweet_store.query(brand_id, sentiment=label, sort="engagement", limit=limit)
+    return [
+        {
+            "id_str": row["id_str"],
+            "text": row["full_text"],
+            "text_preview": row["full_text"][:150] + "..." if len(row["full_text"]) > 150 else row["full_text"],
+            "engagement": row["favorite_count"] + row["retweet_count"],
+            "favorite_count": row["favorite_count"],
+            "retweet_count": row["retweet_count"],
+            "score": round(row["compound"], 3),
+            "created_at": row["created_at"],
+        }
+        for row in page["items"]
+    ]
 
 
 # ✅ GET ALL EXAMPLES (untuk debugging atau analisis lebih dalam)
 @router.get("/{brand_id}/sentiment/examples")
 async def get_all_sentiment_examples(brand_id: str, limit: int = 5):
     """
-    Ambil semua contoh tweets per sentimen (max 5 per kategori)
+    Ambil contoh tweets per sentimen. Model menyimpan 5 per kategori; limit > 5
+    diambil dari tweet_store (engagement tertinggi dulu, max TWEETS_PAGE_MAX).
     """
     brand_id = brand_id.lower()
-    model = load_model(brand_id, "sentiment")
+    model = load_model_fields(brand_id, "sentiment", SENTIMENT_EXAMPLE_FIELDS)
     data = model.get("data", {})
-    
+
+    if limit > 5:
+        stored = {
+            label: await run_in_threadpool(_stored_examples, brand_id, label, min(limit, TWEETS_PAGE_MAX))
+            for label in ("positive", "neutral", "negative")
+        }
+        if any(stored.values()):
+            data = {f"{label}_examples": examples for label, examples in stored.items()}
+
     return {
         "success": True,
         "brand_id": brand_id,
@@ -273,4 +476,220 @@ async def analyze_sentiment_realtime(brand_id: str, text: str):
             "neutral": -0.05 < compound < 0.05,
             "negative": compound <= -0.05
         }
+    }
+
+
+# ============================
+# BATCH SCORING
+# ============================
+# Maksimal teks per request batch
+SENTIMENT_BATCH_MAX = int(os.environ.get("SENTIMENT_BATCH_MAX", 10_000))
+# Teks per potongan yang dikirim ke worker
+SENTIMENT_BATCH_SHARD = 500
+# >1 -> scoring di process pool, selain itu di threadpool
+SENTIMENT_BATCH_WORKERS = int(os.environ.get("SENTIMENT_BATCH_WORKERS", os.cpu_count() or 1))
+# Batch yang boleh diproses bersamaan; sisanya langsung ditolak 429 (backpressure)
+SENTIMENT_BATCH_INFLIGHT = int(os.environ.get("SENTIMENT_BATCH_INFLIGHT", 4))
+
+_batch_slots = threading.BoundedSemaphore(SENTIMENT_BATCH_INFLIGHT)
+_scoring_pool: Optional[ProcessPoolExecutor] = None
+_scoring_pool_lock = threading.Lock()
+
+
+def _get_scoring_pool() -> ProcessPoolExecutor:
+    global _scoring_pool
+    with _scoring_pool_lock:
+        if _scoring_pool is None:
+            _scoring_pool = ProcessPoolExecutor(
+                max_workers=SENTIMENT_BATCH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _scoring_pool
+
+
+async def _score_shard(texts: List[str], engine: str) -> List[Tuple[str, float]]:
+    global _scoring_pool
+    if SENTIMENT_BATCH_WORKERS <= 1:
+        return await run_in_threadpool(score_texts, texts, engine)
+    pool = _get_scoring_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, score_texts, texts, engine)
+    except BrokenProcessPool:
+        # Worker mati -> pool dibuat ulang di request berikutnya
+        with _scoring_pool_lock:
+            if _scoring_pool is pool:
+                _scoring_pool = None
+        raise
+
+
+def _batch_item(raw: Any) -> Dict[str, Any]:
+    """
+    Item batch: string, atau object {"text": ..., "id": ...}
+    """
+    if isinstance(raw, str):
+        return {"text": raw}
+    if isinstance(raw, dict) and isinstance(raw.get("text"), str):
+        item = {"text": raw["text"]}
+        if "id" in raw:
+            item["id"] = raw["id"]
+        return item
+    raise HTTPException(status_code=422, detail="Each item must be a string or an object with a 'text' field")
+
+
+def _check_batch_size(count: int) -> None:
+    if count > SENTIMENT_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: max {SENTIMENT_BATCH_MAX} texts per request",
+        )
+
+
+async def _read_batch(request: Request, on_shard: Callable[[int, List[Dict[str, Any]]], None]) -> bool:
+    """
+    Body: JSON array / {"texts": [...]}, atau NDJSON (1 item per baris).
+    on_shard(start, items) dipanggil tiap SENTIMENT_BATCH_SHARD item; NDJSON langsung
+    saat baris masuk, jadi scoring sudah jalan selagi sisa body dibaca. Return ndjson?
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        count = 0
+        pending: List[Dict[str, Any]] = []
+        buffer = b""
+
+        def add(line: bytes) -> None:
+            nonlocal count, pending
+            pending.append(_batch_item(json.loads(line)))
+            count += 1
+            _check_batch_size(count)
+            if len(pending) == SENTIMENT_BATCH_SHARD:
+                on_shard(count - len(pending), pending)
+                pending = []
+
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    add(line)
+        if buffer.strip():
+            add(buffer)
+        if pending:
+            on_shard(count - len(pending), pending)
+        return True
+
+    body = await request.json()
+    if isinstance(body, dict):
+        body = body.get("texts")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=422, detail="Body must be a JSON array or an object with 'texts'")
+    _check_batch_size(len(body))
+    items = [_batch_item(raw) for raw in body]
+    for start in range(0, len(items), SENTIMENT_BATCH_SHARD):
+        on_shard(start, items[start:start + SENTIMENT_BATCH_SHARD])
+    return False
+
+
+class _BatchSlot:
+    """
+    1 slot _batch_slots milik 1 request. release() boleh dipanggil berkali-kali
+    (generator stream, background task, finalizer) tapi hanya melepas slot sekali.
+    """
+
+    def __init__(self):
+        if not _batch_slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=429,
+                detail="Too many batch requests in progress, retry later",
+                headers={"Retry-After": "1"},
+            )
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        _batch_slots.release()
+
+
+@router.post("/{brand_id}/sentiment/analyze-batch")
+async def analyze_sentiment_batch(
+    brand_id: str,
+    request: Request,
+    include_text: bool = Query(False, description="True -> sertakan cleaned_text per item"),
+    engine: str = Query("vader", pattern=SENTIMENT_ENGINE_PATTERN, description="vader / vectorized"),
+):
+    """
+    Analisis sentiment banyak teks dalam 1 request (JSON array atau NDJSON).
+    Input NDJSON -> output NDJSON yang di-stream per potongan, urutan sama dengan input.
+    """
+    slot = _BatchSlot()
+    shards: List[Tuple[int, List[Dict[str, Any]]]] = []
+    tasks: List[asyncio.Future] = []
+
+    def submit(start: int, shard: List[Dict[str, Any]]) -> None:
+        shards.append((start, shard))
+        tasks.append(asyncio.ensure_future(_score_shard([item["text"] for item in shard], engine)))
+
+    def abandon() -> None:
+        for task in tasks:
+            task.cancel()
+        slot.release()
+
+    try:
+        ndjson = await _read_batch(request, submit)
+    except json.JSONDecodeError:
+        abandon()
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    except BaseException:
+        abandon()
+        raise
+
+    async def score_shards():
+        # Hasil potongan diambil berurutan (semua sudah disubmit saat body dibaca)
+        try:
+            for (start, shard), task in zip(shards, tasks):
+                scores = await task
+                results = []
+                for offset, (item, (sentiment, compound)) in enumerate(zip(shard, scores)):
+                    result = {"index": start + offset}
+                    if "id" in item:
+                        result["id"] = item["id"]
+                    result["sentiment"] = sentiment
+                    result["compound_score"] = round(compound, 3)
+                    if include_text:
+                        result["cleaned_text"] = clean_text(item["text"])
+                    results.append(result)
+                yield results
+        finally:
+            abandon()
+
+    if ndjson:
+        async def ndjson_lines():
+            async for results in score_shards():
+                yield "".join(json.dumps(result) + "\n" for result in results)
+
+        stream = ndjson_lines()
+        # Client putus sebelum chunk pertama / response dibuang -> generator tidak pernah
+        # jalan dan finally-nya tidak terpanggil; slot tetap dilepas lewat 2 jalur ini
+        weakref.finalize(stream, abandon)
+        return StreamingResponse(stream, media_type="application/x-ndjson", background=BackgroundTask(abandon))
+
+    results: List[Dict[str, Any]] = []
+    try:
+        async for shard_results in score_shards():
+            results.extend(shard_results)
+    finally:
+        abandon()
+
+    summary = {"positive": 0, "neutral": 0, "negative": 0}
+    for result in results:
+        summary[result["sentiment"]] += 1
+
+    return {
+        "success": True,
+        "brand_id": brand_id,
+        "total": len(results),
+        "summary": summary,
+        "results": results,
     }
\ No newline at end of file
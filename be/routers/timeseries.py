@@ -0,0 +1,53 @@
+# app/routers/timeseries.py
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+
+from core.rollups import GRANULARITIES, ROLLUP_DIMENSIONS
+from core.shared import rollup_store
+from routers.tweets import _to_epoch
+
+router = APIRouter(prefix="/api/brands", tags=["timeseries"])
+
+
+# ============================================================
+# GET: Deret waktu dari rollup cube (tanpa scan tweet)
+# ============================================================
+
+@router.get("/{brand_id}/timeseries")
+async def get_brand_timeseries(
+    brand_id: str,
+    start: Optional[str] = Query(None, description="Awal rentang (inklusif), mis. 2023-03-01 atau 2023-03-01T06:00"),
+    end: Optional[str] = Query(None, description="Akhir rentang (eksklusif)"),
+    granularity: str = Query("day", pattern=f"^({'|'.join(GRANULARITIES)})$"),
+    dimensions: Optional[str] = Query(None, description="Dipisah koma: sentiment, topic"),
+):
+    """
+    Jumlah tweet + engagement (+ rata-rata compound) per bucket waktu UTC,
+    opsional dipecah per sentiment dan/atau topic. Contoh: 7 hari terakhir per jam,
+    atau per minggu untuk 1 kuartal.
+    """
+    brand_id = brand_id.lower()
+    dims = [d.strip() for d in dimensions.split(",") if d.strip()] if dimensions else []
+    unknown = [d for d in dims if d not in ROLLUP_DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dimensi tidak dikenal: {', '.join(unknown)} (pilihan: {', '.join(ROLLUP_DIMENSIONS)})",
+        )
+
+    series = await run_in_threadpool(
+        rollup_store.query,
+        brand_id,
+        _to_epoch(start, "start"),
+        _to_epoch(end, "end"),
+        granularity,
+        list(dict.fromkeys(dims)),
+    )
+    return {
+        "success": True,
+        "brand_id": brand_id,
+        "granularity": granularity,
+        "dimensions": dims,
+        "series": series,
+    }
@@ -1,19 +1,42 @@
 # app/routers/topics.py
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Request
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
 from datetime import datetime
 from collections import Counter
+import copy
+import json
+import os
+import shutil
 import re
 import pickle
+import threading
 import numpy as np
 from pathlib import Path
+from scipy import sparse
 
-from core.shared import TweetData, load_model
+from core.model_store import atomic_write
+from core.shared import TweetsInput, as_tweet_batch, load_model, model_response
 
 router = APIRouter(prefix="/api/brands", tags=["topics"])
 
 # Lokasi global LDA model
 GLOBAL_TOPIC_MODEL_PATH = Path("models/global_topic_model.pkl")
+# Riwayat update online (versi, perplexity) + salinan tiap versi model
+GLOBAL_TOPIC_HISTORY_PATH = Path("models/global_topic_model.history.json")
+GLOBAL_TOPIC_VERSIONS_DIR = Path("models/topic_versions")
+
+# Online learning: upload ikut meng-update global LDA lewat partial_fit (default mati)
+TOPIC_ONLINE_LEARNING = os.getenv("TOPIC_ONLINE_LEARNING", "0") == "1"
+# Jumlah salinan versi lama yang disimpan di GLOBAL_TOPIC_VERSIONS_DIR
+TOPIC_MODEL_KEEP_VERSIONS = int(os.getenv("TOPIC_MODEL_KEEP_VERSIONS", "5"))
+# Jumlah entry riwayat update yang disimpan di history.json (entry yang salinan
+# modelnya sudah dihapus tetap dicatat dengan path = null)
+TOPIC_MODEL_HISTORY_SIZE = max(TOPIC_MODEL_KEEP_VERSIONS, int(os.getenv("TOPIC_MODEL_HISTORY_SIZE", "100")))
+# Sampel held-out untuk perplexity sebelum/sesudah update: tiap dokumen ke-N upload
+# (tidak ikut partial_fit), maksimal TOPIC_HELDOUT_MAX dokumen
+TOPIC_HELDOUT_EVERY = int(os.getenv("TOPIC_HELDOUT_EVERY", "10"))
+TOPIC_HELDOUT_MAX = int(os.getenv("TOPIC_HELDOUT_MAX", "2000"))
 
 
 def preprocess_text(text: str) -> str:
@@ -27,69 +50,344 @@ def preprocess_text(text: str) -> str:
     return text
 
 
-def compute_topic_model(
-    brand_id: str, brand_name: str, tweets: List[TweetData], num_topics: int = 10
-) -> Dict[str, Any]:
+# Jumlah keyword per topik yang disimpan di model brand
+TOPIC_KEYWORDS = 10
 
-    # --------------------------------------
-    # 1. Load global LDA model
-    # --------------------------------------
-    if not GLOBAL_TOPIC_MODEL_PATH.exists():
-        raise HTTPException(
-            status_code=500,
-            detail="Global topic model not found. Upload missing: models/global_topic_model.pkl",
+
+@dataclass(frozen=True)
+class TopicModelSnapshot:
+    """
+    1 versi pipeline LDA global + hasil hitung yang tidak berubah per upload
+    (vocabulary dan top keyword per topik).
+    """
+    pipeline: Any
+    vectorizer: Any
+    lda: Any
+    vocabulary: np.ndarray
+    top_keywords: List[List[str]]
+    top_weights: List[List[float]]
+    version: int
+    file_version: Tuple[int, int, int]
+    loaded_at: str
+
+    @classmethod
+    def from_pipeline(cls, pipeline, version: int, file_version: Tuple[int, int, int]) -> "TopicModelSnapshot":
+        vectorizer = pipeline.named_steps["vectorizer"]
+        lda = pipeline.named_steps["lda"]
+        vocabulary = vectorizer.get_feature_names_out()
+
+        top_keywords, top_weights = [], []
+        for component in lda.components_:
+            top_indices = component.argsort()[::-1][:TOPIC_KEYWORDS]
+            top_keywords.append(vocabulary[top_indices].tolist())
+            top_weights.append([float(component[i]) for i in top_indices])
+
+        return cls(
+            pipeline=pipeline,
+            vectorizer=vectorizer,
+            lda=lda,
+            vocabulary=vocabulary,
+            top_keywords=top_keywords,
+            top_weights=top_weights,
+            version=version,
+            file_version=file_version,
+            loaded_at=datetime.now().isoformat(),
         )
 
-    with open(GLOBAL_TOPIC_MODEL_PATH, "rb") as f:
-        pipeline = pickle.load(f)
 
-    vectorizer = pipeline.named_steps["vectorizer"]
-    lda = pipeline.named_steps["lda"]
+class TopicModelRegistry:
+    """
+    Pipeline LDA global di-load sekali dan dipakai bersama semua upload.
+    Kalau file .pkl berubah (mtime/size/inode), versi baru di-load lalu di-swap
+    secara atomik; upload yang sedang jalan tetap memakai snapshot lamanya.
+    """
 
-    # --------------------------------------
-    # 2. Preprocess tweets
-    # --------------------------------------
-    clean_texts = [preprocess_text(t.full_text) for t in tweets]
+    def __init__(self, path: Path):
+        self.path = path
+        self._current: Optional[TopicModelSnapshot] = None
+        self._lock = threading.Lock()
+        self._version = 0
 
-    # Vectorize
-    X = vectorizer.transform(clean_texts)
+    def _file_version(self) -> Tuple[int, int, int]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=500,
+                detail="Global topic model not found. Upload missing: models/global_topic_model.pkl",
+            )
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
 
-    # --------------------------------------
-    # 3. Topic distribution per tweet
-    # --------------------------------------
-    topic_distributions = lda.transform(X)
+    def get(self) -> TopicModelSnapshot:
+        file_version = self._file_version()
+        current = self._current
+        if current is not None and current.file_version == file_version:
+            return current
+
+        with self._lock:
+            # Cek ulang: thread lain mungkin sudah reload selagi menunggu lock
+            current = self._current
+            if current is not None and current.file_version == file_version:
+                return current
+
+            with open(self.path, "rb") as f:
+                pipeline = pickle.load(f)
+            self._version += 1
+            snapshot = TopicModelSnapshot.from_pipeline(pipeline, self._version, file_version)
+            self._current = snapshot
+            return snapshot
+
+    def history(self) -> Dict[str, Any]:
+        try:
+            with open(GLOBAL_TOPIC_HISTORY_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"model_version": 0, "updates": []}
+
+    def learner(self) -> "TopicModelLearner":
+        return TopicModelLearner(self, self.get())
+
+    def publish(self, learner: "TopicModelLearner") -> Dict[str, Any]:
+        """
+        Tulis pipeline hasil partial_fit secara atomik (tmp + os.replace) dan
+        catat versi baru. Ditolak kalau file sudah berubah sejak learner dibuat
+        (upload lain publish lebih dulu) -> update ini dilewati, bukan menimpa.
+        """
+        with self._lock:
+            if self._file_version() != learner.base.file_version:
+                return {"published": False, "reason": "global topic model berubah selama upload"}
+
+            history = self.history()
+            model_version = history["model_version"] + 1
+            GLOBAL_TOPIC_VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+            version_path = GLOBAL_TOPIC_VERSIONS_DIR / f"{self.path.stem}.v{model_version}.pkl"
+            atomic_write(version_path, lambda f: pickle.dump(learner.pipeline, f, protocol=pickle.HIGHEST_PROTOCOL))
+            tmp_path = self.path.with_suffix(".pkl.tmp")
+            shutil.copyfile(version_path, tmp_path)
+            os.replace(tmp_path, self.path)
+
+            update = {
+                "model_version": model_version,
+                "updated_at": datetime.now().isoformat(),
+                "path": str(version_path),
+                **learner.stats(),
+            }
+            history["model_version"] = model_version
+            history["updates"].append(update)
+
+            # Salinan versi lama di luar TOPIC_MODEL_KEEP_VERSIONS dihapus (path -> null),
+            # riwayat dipotong ke TOPIC_MODEL_HISTORY_SIZE -> ukuran file tidak ikut jumlah upload
+            pruned = []
+            for old in history["updates"][:-TOPIC_MODEL_KEEP_VERSIONS]:
+                if old.get("path"):
+                    pruned.append(old["path"])
+                    old["path"] = None
+            history["updates"] = history["updates"][-TOPIC_MODEL_HISTORY_SIZE:]
+            atomic_write(
+                GLOBAL_TOPIC_HISTORY_PATH,
+                lambda f: f.write(json.dumps(history, indent=2).encode("utf-8")),
+            )
+            for path in pruned:
+                Path(path).unlink(missing_ok=True)
+        # Snapshot baru di-load di get() berikutnya (file_version berubah)
+        return {"published": True, **update}
+
+    def status(self) -> Dict[str, Any]:
+        current = self._current
+        if current is None:
+            return {"loaded": False, "path": str(self.path)}
+        history = self.history()
+        return {
+            "loaded": True,
+            "path": str(self.path),
+            "version": current.version,
+            "loaded_at": current.loaded_at,
+            "n_topics": int(current.lda.n_components),
+            "vocabulary_size": int(len(current.vocabulary)),
+            "model_version": history["model_version"],
+            "last_update": history["updates"][-1] if history["updates"] else None,
+        }
+
+
+class TopicModelLearner:
+    """
+    Update online global LDA dari tweet 1 upload. Pipeline di-copy dari snapshot,
+    jadi inferensi upload lain tetap memakai model lama sampai publish().
+    Vocabulary vectorizer tetap (kata baru di luar vocabulary diabaikan); yang
+    belajar distribusi kata per topik. Biaya ikut jumlah tweet baru saja.
+    Perplexity before/after = sampel held-out yang sama, dihitung 1x terhadap model
+    lama (self.base) dan 1x terhadap model hasil update.
+    """
+
+    def __init__(self, registry: TopicModelRegistry, base: TopicModelSnapshot):
+        self.registry = registry
+        self.base = base
+        self.pipeline = copy.deepcopy(base.pipeline)
+        self.vectorizer = self.pipeline.named_steps["vectorizer"]
+        self.lda = self.pipeline.named_steps["lda"]
+        self.n_documents = 0
+        self.n_words = 0
+        # Posisi dokumen (non-kosong) di seluruh upload -> sampel sama berapa pun ukuran chunk
+        self._position = 0
+        self._heldout: List[Any] = []
+        self.n_heldout = 0
+        self._perplexity: Optional[Tuple[Optional[float], Optional[float]]] = None
+
+    def update(self, texts: List[str]) -> None:
+        for start in range(0, len(texts), TOPIC_INFERENCE_CHUNK):
+            X = self.vectorizer.transform([preprocess_text(t) for t in texts[start:start + TOPIC_INFERENCE_CHUNK]])
+            X = X[X.getnnz(axis=1) > 0]
+            if X.shape[0] == 0:
+                continue
+
+            positions = np.arange(self._position, self._position + X.shape[0])
+            self._position += X.shape[0]
+            heldout = positions % TOPIC_HELDOUT_EVERY == 0
+            heldout &= np.cumsum(heldout) <= TOPIC_HELDOUT_MAX - self.n_heldout
+            if heldout.any():
+                self._heldout.append(X[heldout])
+                self.n_heldout += int(heldout.sum())
+                X = X[~heldout]
+            if X.shape[0] == 0:
+                continue
+
+            self.lda.partial_fit(X)
+            self._perplexity = None
+            self.n_documents += X.shape[0]
+            self.n_words += int(X.sum())
+
+    def heldout_perplexity(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        (sebelum, sesudah) update pada sampel held-out; None kalau sampel kosong
+        """
+        if self._perplexity is None:
+            if self.n_heldout:
+                X = sparse.vstack(self._heldout).tocsr()
+                self._perplexity = (
+                    round(float(self.base.lda.perplexity(X)), 4),
+                    round(float(self.lda.perplexity(X)), 4),
+                )
+            else:
+                self._perplexity = (None, None)
+        return self._perplexity
 
-    # Dominant topic ID per tweet
-    dominant_topics = np.argmax(topic_distributions, axis=1)
-    topic_counts = Counter(dominant_topics)
+    def stats(self) -> Dict[str, Any]:
+        before, after = self.heldout_perplexity()
+        return {
+            "n_documents": self.n_documents,
+            "n_words": self.n_words,
+            "heldout_documents": self.n_heldout,
+            "perplexity_before": before,
+            "perplexity_after": after,
+        }
+
+    def publish(self) -> Dict[str, Any]:
+        if self.n_documents == 0:
+            return {"published": False, "reason": "tidak ada dokumen dengan kata di vocabulary", **self.stats()}
+        return self.registry.publish(self)
+
+
+topic_registry = TopicModelRegistry(GLOBAL_TOPIC_MODEL_PATH)
+
+
+# Dokumen per potongan inferensi LDA -> matriks dokumen-topik yang hidup di memori
+# maksimal TOPIC_INFERENCE_CHUNK x n_topics, berapa pun ukuran upload
+TOPIC_INFERENCE_CHUNK = 5_000
+
+
+def init_topic_state(keep_topic_ids: bool = False) -> Dict[str, Any]:
+    """
+    State agregat topic: hanya jumlah dominant topic, bukan matriks dokumen-topik.
+    keep_topic_ids=True -> simpan juga dominant topic per tweet (int16, urut sesuai input).
+    """
+    return {"topic_counts": Counter(), "total_tweets": 0, "topic_ids": [] if keep_topic_ids else None}
+
+
+def infer_dominant_topics(texts: List[str], topic_model: TopicModelSnapshot) -> np.ndarray:
+    """
+    Dominant topic per teks untuk 1 potongan.
+    """
+    clean_texts = [preprocess_text(text) for text in texts]
+    X = topic_model.vectorizer.transform(clean_texts)
+    return np.argmax(topic_model.lda.transform(X), axis=1).astype(np.int16)
+
+
+def _add_topic_counts(state: Dict[str, Any], dominant_topics: np.ndarray) -> None:
+    # Counter diisi sesuai urutan kemunculan pertama -> most_common() sama dengan update per tweet
+    topics, first_index, counts = np.unique(dominant_topics, return_index=True, return_counts=True)
+    topic_counts: Counter = state["topic_counts"]
+    for order in np.argsort(first_index):
+        topic_counts[int(topics[order])] += int(counts[order])
+    if state.get("topic_ids") is not None:
+        state["topic_ids"].append(dominant_topics)
+
+
+def update_topic_state(
+    state: Dict[str, Any], tweets: TweetsInput, topic_model: TopicModelSnapshot
+) -> Dict[str, Any]:
+    """
+    Inferensi LDA per potongan TOPIC_INFERENCE_CHUNK dokumen.
+    Paralelisme ada di level shard upload (workers di upload-csv), bukan di sini.
+    """
+    batch = as_tweet_batch(tweets)
+    if len(batch) == 0:
+        return state
+
+    texts = batch.full_text.tolist()
+    for start in range(0, len(texts), TOPIC_INFERENCE_CHUNK):
+        _add_topic_counts(state, infer_dominant_topics(texts[start:start + TOPIC_INFERENCE_CHUNK], topic_model))
+
+    state["total_tweets"] += len(batch)
+    return state
+
+
+def merge_topic_states(state: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    # Counter.update menjaga urutan kemunculan pertama -> most_common() tetap sama
+    state["topic_counts"].update(other["topic_counts"])
+    state["total_tweets"] += other["total_tweets"]
+    if state.get("topic_ids") is not None and other.get("topic_ids") is not None:
+        state["topic_ids"].extend(other["topic_ids"])
+    return state
+
+
+def topic_ids(state: Dict[str, Any]) -> Optional[np.ndarray]:
+    """
+    Dominant topic per tweet (urutan input) kalau state dibuat dengan keep_topic_ids=True
+    """
+    if state.get("topic_ids") is None:
+        return None
+    if not state["topic_ids"]:
+        return np.zeros(0, dtype=np.int16)
+    return np.concatenate(state["topic_ids"])
+
+
+def finalize_topic_model(
+    brand_id: str, brand_name: str, state: Dict[str, Any], topic_model: TopicModelSnapshot, num_topics: int = 10
+) -> Dict[str, Any]:
+    topic_counts: Counter = state["topic_counts"]
 
     # --------------------------------------
-    # 4. Extract keywords per topic
+    # 1. Keywords per topic (sudah dihitung sekali di registry)
     # --------------------------------------
-    words = vectorizer.get_feature_names_out()
     topics_output = []
 
-    available_topics = min(num_topics, lda.n_components)
+    available_topics = min(num_topics, topic_model.lda.n_components)
 
     for topic_idx in range(available_topics):
-        component = lda.components_[topic_idx]
-        top_indices = component.argsort()[::-1][:10]
-
-        keywords = [words[i] for i in top_indices]
-        weights = [float(component[i]) for i in top_indices]
+        keywords = topic_model.top_keywords[topic_idx]
 
         topics_output.append(
             {
                 "id": topic_idx,
                 "label": f"Topic {topic_idx + 1}: {' + '.join(keywords[:3])}",
-                "keywords": keywords,
-                "weights": weights,
+                "keywords": list(keywords),
+                "weights": list(topic_model.top_weights[topic_idx]),
                 "tweet_count": topic_counts.get(topic_idx, 0),
             }
         )
 
     # --------------------------------------
-    # 5. Filter 5 topik terbesar
+    # 2. Filter 5 topik terbesar
     # (TIDAK diurutkan, urutan original LDA dipertahankan)
     # --------------------------------------
     top_5_ids = {topic_id for topic_id, _ in topic_counts.most_common(5)}
@@ -99,11 +397,11 @@ def compute_topic_model(
     ]
 
     # --------------------------------------
-    # 6. Final result
+    # 3. Final result
     # --------------------------------------
     topic_results = {
         "topics": topics_output_filtered,
-        "total_tweets": len(tweets),
+        "total_tweets": state["total_tweets"],
         "unique_topics_found": len(topic_counts),
     }
 
@@ -116,10 +414,17 @@ def compute_topic_model(
     }
 
 
+def compute_topic_model(
+    brand_id: str, brand_name: str, tweets: TweetsInput, num_topics: int = 10
+) -> Dict[str, Any]:
+    topic_model = topic_registry.get()
+    state = update_topic_state(init_topic_state(), tweets, topic_model)
+    return finalize_topic_model(brand_id, brand_name, state, topic_model, num_topics)
+
+
 @router.get("/{brand_id}/topics")
-async def get_brand_topics(brand_id: str):
+async def get_brand_topics(brand_id: str, request: Request):
     """
     Ambil model topik 1 brand (hasil analisis sebelumnya)
     """
-    model = load_model(brand_id, "topic")
-    return {"success": True, **model}
+    return model_response(request, brand_id, "topic", lambda: {"success": True, **load_model(brand_id, "topic")}, "topics")
@@ -0,0 +1,75 @@
+# app/routers/tweets.py
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import pandas as pd
+
+from core.shared import tweet_store
+
+router = APIRouter(prefix="/api/brands", tags=["tweets"])
+
+# Maksimal tweet per halaman
+TWEETS_PAGE_MAX = 500
+
+
+def _to_epoch(value: Optional[str], name: str) -> Optional[int]:
+    """
+    "2023-03-01" / ISO8601 -> epoch detik UTC
+    """
+    if value is None:
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Format {name} tidak valid: {value}")
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp())
+
+
+# ============================================================
+# GET: Drill-down hasil analisis per tweet
+# ============================================================
+
+@router.get("/{brand_id}/tweets")
+async def list_brand_tweets(
+    brand_id: str,
+    sentiment: Optional[str] = Query(None, pattern="^(positive|neutral|negative)$"),
+    topic: Optional[int] = Query(None, ge=0, description="Dominant topic id"),
+    hashtag: Optional[str] = Query(None, description="Dengan atau tanpa #, tidak case-sensitive"),
+    start: Optional[str] = Query(None, description="Tanggal awal (inklusif), mis. 2023-03-01"),
+    end: Optional[str] = Query(None, description="Tanggal akhir (eksklusif)"),
+    min_engagement: Optional[int] = Query(None, ge=0),
+    sort: str = Query("recent", pattern="^(recent|engagement)$"),
+    limit: int = Query(50, ge=1, le=TWEETS_PAGE_MAX),
+    cursor: Optional[str] = Query(None, description="next_cursor dari halaman sebelumnya"),
+):
+    """
+    Tweet per brand hasil upload (sentiment, dominant topic, hashtag, engagement),
+    difilter lalu dipaginasi dengan cursor (keyset), urut terbaru / engagement tertinggi.
+    """
+    brand_id = brand_id.lower()
+    try:
+        page = await run_in_threadpool(
+            tweet_store.query,
+            brand_id,
+            sentiment=sentiment,
+            topic=topic,
+            hashtag=hashtag,
+            start_ts=_to_epoch(start, "start"),
+            end_ts=_to_epoch(end, "end"),
+            min_engagement=min_engagement,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "success": True,
+        "brand_id": brand_id,
+        "count": len(page["items"]),
+        "tweets": page["items"],
+        "next_cursor": page["next_cursor"],
+    }
@@ -1,89 +1,590 @@
 # app/routers/upload.py
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any, BinaryIO, Dict, Optional, Set
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import multiprocessing
+import numpy as np
+import os
 import pandas as pd
-import io
+import shutil
+import tempfile
+import threading
+import time
 
-from core.shared import TweetData, extract_brand_from_filename, save_model
-from routers.engagement import compute_engagement_analytics
-from routers.sentiment import compute_sentiment_model
-from routers.topics import compute_topic_model
-from routers.hashtags import compute_hashtag_analysis
+from core.jobs import create_job, submit_job, track_stage, record_stage, complete_stage, set_progress
+from core.metrics import STAGE_SECONDS, UPLOAD_BYTES, UPLOAD_ROWS, UPLOAD_SECONDS, UPLOADS
+from core.responses import HASHTAGS_PAGE_MAX, FastJSONResponse, paginate, parse_fields, select_fields
+from core.rollups import init_rollup, update_rollup
+from core.shared import (
+    TweetBatch,
+    brand_state,
+    extract_brand_from_filename,
+    model_store,
+    parse_created_at,
+    rollup_store,
+    save_model,
+    tweet_store,
+)
+from routers.engagement import (
+    init_engagement_state,
+    update_engagement_state,
+    merge_engagement_states,
+    finalize_engagement_model,
+)
+from routers.sentiment import (
+    init_sentiment_state,
+    update_sentiment_state,
+    merge_sentiment_states,
+    finalize_sentiment_model,
+    SENTIMENT_ENGINE_PATTERN,
+)
+from routers.topics import (
+    TopicModelSnapshot,
+    topic_registry,
+    TOPIC_ONLINE_LEARNING,
+    init_topic_state,
+    update_topic_state,
+    merge_topic_states,
+    finalize_topic_model,
+    topic_ids,
+)
+from routers.hashtags import (
+    init_hashtag_state,
+    update_hashtag_state,
+    merge_hashtag_states,
+    finalize_hashtag_analysis,
+)
 
 router = APIRouter(prefix="/api", tags=["upload"])
 
+# Jumlah baris CSV yang diproses per chunk -> peak memory ikut chunk, bukan ukuran file
+UPLOAD_CHUNK_SIZE = 50_000
 
-@router.post("/upload-csv")
-async def upload_csv(file: UploadFile = File(...)):
-    try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-
-        required_columns = ["id_str", "full_text", "created_at"]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Missing required columns: {', '.join(missing_columns)}",
-            )
+REQUIRED_COLUMNS = ["id_str", "full_text", "created_at"]
+NUMERIC_COLUMNS = ["favorite_count", "retweet_count", "reply_count", "quote_count"]
+
+UPLOAD_STAGES = ["parse", "engagement", "sentiment", "topic", "hashtags", "save"]
+
+# Mode paralel: maksimal proses analyzer per upload, dan ukuran shard minimal
+# (chunk lebih kecil dari ini tidak dipecah lagi)
+MAX_ANALYZER_WORKERS = os.cpu_count() or 1
+MIN_SHARD_ROWS = 5_000
+
+# Simpan hasil per tweet ke core/tweet_store.py (drill-down /tweets); 0 -> hanya agregat
+TWEET_STORE_ENABLED = os.getenv("TWEET_STORE_ENABLED", "1") == "1"
+
+ANALYZER_NAMES = ["engagement", "sentiment", "topic", "hashtags"]
+_INIT_STATE = {
+    "engagement": init_engagement_state,
+    "sentiment": init_sentiment_state,
+    "topic": init_topic_state,
+    "hashtags": init_hashtag_state,
+}
+_MERGE_STATE = {
+    "engagement": merge_engagement_states,
+    "sentiment": merge_sentiment_states,
+    "topic": merge_topic_states,
+    "hashtags": merge_hashtag_states,
+}
+
+# Analyzer yang bisa menyimpan hasil per tweet di state (compound, dominant topic)
+_KEEP_TWEET_RESULTS = {"sentiment": "compound_scores", "topic": "topic_ids"}
+
+_process_pools: Dict[int, ProcessPoolExecutor] = {}
+_process_pools_lock = threading.Lock()
 
-        numeric_cols = ["favorite_count", "retweet_count", "reply_count", "quote_count"]
-        for col in numeric_cols:
-            if col not in df.columns:
-                df[col] = 0
+
+def _init_state(name: str, keep_tweet_results: bool = False) -> Dict[str, Any]:
+    if keep_tweet_results and name in _KEEP_TWEET_RESULTS:
+        return _INIT_STATE[name](True)
+    return _INIT_STATE[name]()
+
+
+def _collect_tweet_results(
+    brand_id: str,
+    upload_id: int,
+    batch: TweetBatch,
+    states: Dict[str, Dict[str, Any]],
+    rollup: Dict[Any, Any],
+) -> None:
+    """
+    Hasil per tweet chunk ini -> rollup cube (+ tweet_store kalau aktif), lalu
+    list-nya dikosongkan lagi (state yang disimpan di brand_state tetap agregat saja)
+    """
+    sentiment_state = states["sentiment"]
+    compound = np.concatenate(sentiment_state["compound_scores"] or [np.zeros(0)])
+    dominant_topics = topic_ids(states["topic"])
+    sentiment_state["compound_scores"] = []
+    states["topic"]["topic_ids"] = []
+
+    parsed = parse_created_at(batch.created_at)
+    created_ts = ((parsed - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).fillna(0).to_numpy(np.int64)
+    update_rollup(rollup, batch, created_ts, compound, dominant_topics)
+    if TWEET_STORE_ENABLED:
+        tweet_store.write_batch(brand_id, upload_id, batch, created_ts, compound, dominant_topics)
+
+
+def _prepare_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validasi kolom wajib + paksa kolom numerik jadi int untuk 1 chunk
+    """
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing required columns: {', '.join(missing_columns)}",
+        )
+
+    for col in NUMERIC_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0
+        try:
             df[col] = df[col].fillna(0).astype(int)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Column '{col}' must be numeric")
+    return df
+
+
+def _dedupe_batch(brand_id: str, batch: TweetBatch, upload_key: str) -> TweetBatch:
+    """
+    Mode append: buang tweet yang id_str-nya sudah pernah dianalisis
+    (di upload sebelumnya atau di chunk/baris sebelumnya dalam upload ini).
+    Id yang lolos di-stage ke brand_state (memori hanya sebesar 1 chunk).
+    """
+    ids = batch.id_str.tolist()
+    seen = brand_state.seen_ids(brand_id, ids, upload_key)
+    keep = []
+    chunk_ids: Set[str] = set()
+    for idx, id_str in enumerate(ids):
+        if id_str in seen or id_str in chunk_ids:
+            continue
+        chunk_ids.add(id_str)
+        keep.append(idx)
+    brand_state.stage_ids(upload_key, chunk_ids)
+    if len(keep) == len(ids):
+        return batch
+    return batch.take(np.array(keep, dtype=np.int64))
+
+
+def _check_appendable(brand_id: str) -> None:
+    """
+    Append butuh state tersimpan. Brand yang di-upload sebelum ada brand_state
+    (model ada, state tidak) -> 409; kalau diteruskan, model hanya berisi delta
+    dan histori lama hilang.
+    """
+    if brand_state.has_state(brand_id):
+        return
+    for model_type in ANALYZER_NAMES:
+        try:
+            model_store.version(brand_id, model_type)
+        except FileNotFoundError:
+            continue
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"Brand '{brand_id}' belum punya state untuk append (di-upload dengan versi lama). "
+                "Upload ulang CSV lengkap tanpa ?append=true sekali, setelah itu append bisa dipakai."
+            ),
+        )
+
+
+def _run_analyzer(
+    name: str,
+    state: Dict[str, Any],
+    batch: TweetBatch,
+    topic_snapshot: Optional[TopicModelSnapshot],
+    sentiment_engine: str = "vader",
+) -> Dict[str, Any]:
+    if name == "engagement":
+        return update_engagement_state(state, batch)
+    if name == "sentiment":
+        return update_sentiment_state(state, batch, sentiment_engine)
+    if name == "topic":
+        return update_topic_state(state, batch, topic_snapshot)
+    return update_hashtag_state(state, batch)
+
+
+def _analyze_shard(
+    name: str,
+    batch: TweetBatch,
+    topic_snapshot: Optional[TopicModelSnapshot] = None,
+    sentiment_engine: str = "vader",
+    keep_tweet_results: bool = False,
+):
+    """
+    Dijalankan di worker proses: state parsial 1 analyzer untuk 1 shard + durasinya
+    """
+    start = time.perf_counter()
+    state = _run_analyzer(name, _init_state(name, keep_tweet_results), batch, topic_snapshot, sentiment_engine)
+    return state, time.perf_counter() - start
 
-        brand_meta = extract_brand_from_filename(file.filename)
-        brand_name = brand_meta["brand_name"]
-        brand_id = brand_meta["brand_id"]
 
-        tweets: List[TweetData] = []
-        for _, row in df.iterrows():
-            tweets.append(
-                TweetData(
-                    id_str=str(row["id_str"]),
-                    full_text=str(row["full_text"]),
-                    created_at=str(row["created_at"]),
-                    username=str(row.get("username", brand_name)),
-                    favorite_count=int(row.get("favorite_count", 0)),
-                    retweet_count=int(row.get("retweet_count", 0)),
-                    reply_count=int(row.get("reply_count", 0)),
-                    quote_count=int(row.get("quote_count", 0)),
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn, bukan fork: proses server punya banyak thread (uvicorn, job worker)
+    with _process_pools_lock:
+        pool = _process_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _process_pools[workers] = pool
+        return pool
+
+
+def _analyze_parallel(
+    workers: int,
+    states: Dict[str, Dict[str, Any]],
+    batch: TweetBatch,
+    topic_snapshot: TopicModelSnapshot,
+    job_id: Optional[str],
+    sentiment_engine: str = "vader",
+    keep_tweet_results: bool = False,
+) -> None:
+    """
+    Semua analyzer x semua shard jalan bersamaan di process pool, lalu state parsial
+    di-merge sesuai urutan shard -> hasil identik dengan mode serial.
+    """
+    pool = _get_process_pool(workers)
+    shards = batch.split(min(workers, max(1, len(batch) // MIN_SHARD_ROWS)))
+    try:
+        futures = {
+            name: [
+                pool.submit(
+                    _analyze_shard, name, shard, topic_snapshot if name == "topic" else None, sentiment_engine,
+                    keep_tweet_results,
                 )
+                for shard in shards
+            ]
+            for name in ANALYZER_NAMES
+        }
+        for name, shard_futures in futures.items():
+            for shard, future in zip(shards, shard_futures):
+                shard_state, elapsed = future.result()
+                _MERGE_STATE[name](states[name], shard_state)
+                record_stage(job_id, name, len(shard), elapsed)
+    except BrokenProcessPool:
+        with _process_pools_lock:
+            _process_pools.pop(workers, None)
+        raise
+
+
+def process_csv_upload(
+    source: BinaryIO,
+    brand_id: str,
+    brand_name: str,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    workers: int = 0,
+    job_id: Optional[str] = None,
+    append: bool = False,
+    sentiment_engine: str = "vader",
+    learn_topics: bool = False,
+) -> Dict[str, Any]:
+    """
+    Pipeline upload lengkap: baca CSV per chunk -> 4 analyzer -> save_model.
+    Blocking, jadi harus dipanggil dari thread (bukan langsung di event loop).
+    workers > 1 -> analyzer jalan paralel di process pool (output sama dengan serial).
+    job_id diisi kalau berjalan sebagai background job (progress + timing per stage).
+    append=True -> hanya tweet dengan id_str baru yang dianalisis, lalu di-merge
+    ke state brand yang tersimpan (model lama tidak ditimpa dari nol).
+    sentiment_engine: "vader" (per tweet) atau "vectorized" (batch, lihat core/sentiment_engine.py).
+    learn_topics=True -> tweet baru juga dipakai partial_fit global LDA (berlaku untuk upload berikutnya).
+    """
+    mode = "append" if append else "full"
+    status = "error"
+    # Id tweet (brand_state) dan hasil per tweet (tweet_store) upload ini di-stage
+    # per chunk, baru dipindah ke data live saat commit
+    upload_key = brand_state.new_upload_key()
+    upload_id = tweet_store.new_upload_id()
+    try:
+        with UPLOAD_SECONDS.time(mode=mode), brand_state.lock(brand_id):
+            result = _process_csv_upload(
+                source, brand_id, brand_name, chunk_size, workers, job_id, append, sentiment_engine, learn_topics,
+                upload_key, upload_id,
             )
+        status = "ok"
+        return result
+    finally:
+        if status != "ok":
+            brand_state.discard(upload_key)
+            if TWEET_STORE_ENABLED:
+                tweet_store.discard_upload(upload_id)
+        UPLOADS.inc(mode=mode, status=status)
+
 
-        # === Jalankan analitik: Engagement, Sentiment, Topic, Hashtag ===
-        engagement_model = compute_engagement_analytics(brand_id, brand_name, tweets)
-        sentiment_model = compute_sentiment_model(brand_id, brand_name, tweets)
-        topic_model = compute_topic_model(brand_id, brand_name, tweets)
-        hashtag_model = compute_hashtag_analysis(brand_id, brand_name, tweets)
+def _process_csv_upload(
+    source: BinaryIO,
+    brand_id: str,
+    brand_name: str,
+    chunk_size: int,
+    workers: int,
+    job_id: Optional[str],
+    append: bool,
+    sentiment_engine: str,
+    learn_topics: bool,
+    upload_key: str,
+    upload_id: int,
+) -> Dict[str, Any]:
+    topic_snapshot = topic_registry.get()
+    topic_learner = topic_registry.learner() if learn_topics else None
+    workers = min(workers, MAX_ANALYZER_WORKERS)
 
+    states = {name: _init_state(name, keep_tweet_results=True) for name in ANALYZER_NAMES}
+    rollup = init_rollup()
+    # Delta upload: state hasil upload ini saja, di-merge ke state lama di akhir
+    if append:
+        # Dicek lagi di dalam lock brand (bisa berubah sejak request diterima)
+        _check_appendable(brand_id)
+    previous_states = brand_state.load_states(brand_id) if append else None
+    total_rows = 0
+    total_tweets = 0
+
+    # Ukuran file untuk progress (posisi baca / total byte)
+    source.seek(0, 2)
+    total_bytes = source.tell() or 1
+    source.seek(0)
+
+    reader = pd.read_csv(source, chunksize=chunk_size, dtype={"id_str": str})
+    chunks = iter(reader)
+
+    # === Jalankan analitik per chunk: Engagement, Sentiment, Topic, Hashtag ===
+    while True:
+        with track_stage(job_id, "parse") as counters:
+            with STAGE_SECONDS.time(stage="parse_read_csv"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            with STAGE_SECONDS.time(stage="parse_build_batch"):
+                chunk = _prepare_chunk(chunk)
+                batch = TweetBatch.from_dataframe(chunk, default_username=brand_name)
+            total_rows += len(batch)
+            if append:
+                batch = _dedupe_batch(brand_id, batch, upload_key)
+            else:
+                brand_state.stage_ids(upload_key, batch.id_str.tolist())
+            counters["rows"] = len(batch)
+
+        if not len(batch):
+            # Seluruh chunk duplikat (append) -> hanya progress
+            set_progress(job_id, 0.95 * source.tell() / total_bytes)
+            continue
+
+        if workers > 1:
+            _analyze_parallel(workers, states, batch, topic_snapshot, job_id, sentiment_engine, keep_tweet_results=True)
+        else:
+            for name in ANALYZER_NAMES:
+                with track_stage(job_id, name, len(batch)):
+                    _run_analyzer(name, states[name], batch, topic_snapshot, sentiment_engine)
+
+        with track_stage(job_id, "tweet_results", len(batch)):
+            _collect_tweet_results(brand_id, upload_id, batch, states, rollup)
+
+        if topic_learner is not None:
+            with track_stage(job_id, "topic_learning", len(batch)):
+                topic_learner.update(batch.full_text.tolist())
+
+        total_tweets += len(batch)
+        set_progress(job_id, 0.95 * source.tell() / total_bytes)
+
+    complete_stage(job_id, "parse")
+    UPLOAD_BYTES.inc(source.tell())
+    UPLOAD_ROWS.inc(total_rows)
+    for name, key in _KEEP_TWEET_RESULTS.items():
+        states[name][key] = None
+
+    new_tweets = total_tweets
+    if previous_states is not None:
+        # Histori dulu baru delta -> sama seperti kalau semua tweet di-upload sekaligus
+        for name in ANALYZER_NAMES:
+            states[name] = _MERGE_STATE[name](previous_states.get(name, _INIT_STATE[name]()), states[name])
+        total_tweets = states["engagement"]["total_tweets"]
+
+    with track_stage(job_id, "engagement", metric_stage="engagement_finalize"):
+        engagement_model = finalize_engagement_model(brand_id, brand_name, states["engagement"])
+    complete_stage(job_id, "engagement")
+    with track_stage(job_id, "sentiment", metric_stage="sentiment_finalize"):
+        sentiment_model = finalize_sentiment_model(brand_id, brand_name, states["sentiment"], sentiment_engine)
+    complete_stage(job_id, "sentiment")
+    with track_stage(job_id, "topic", metric_stage="topic_finalize"):
+        topic_model = finalize_topic_model(brand_id, brand_name, states["topic"], topic_snapshot)
+    complete_stage(job_id, "topic")
+    with track_stage(job_id, "hashtags", metric_stage="hashtags_finalize"):
+        hashtag_model = finalize_hashtag_analysis(brand_id, brand_name, states["hashtags"])
+    complete_stage(job_id, "hashtags")
+
+    with track_stage(job_id, "save"):
         eng_path = save_model(brand_id, "engagement", engagement_model)
         sent_path = save_model(brand_id, "sentiment", sentiment_model)
         topic_path = save_model(brand_id, "topic", topic_model)
         hashtag_path = save_model(brand_id, "hashtags", hashtag_model)
+        brand_state.commit(brand_id, states, upload_key, replace=not append)
+        rollup_store.commit(brand_id, rollup, replace=not append)
+        if TWEET_STORE_ENABLED:
+            tweet_store.finish_upload(brand_id, upload_id, replace=not append)
+    complete_stage(job_id, "save")
 
-        return {
-            "success": True,
-            "brand": {
-                "id": brand_id,
-                "name": brand_name,
-                "total_tweets": len(tweets),
-            },
-            "analytics": {
-                "engagement": engagement_model["data"],
-                "sentiment": sentiment_model["data"],
-                "topics": topic_model["data"],
-                "hashtags": hashtag_model["data"],
-            },
-            "models_saved": {
-                "engagement": str(eng_path),
-                "sentiment": str(sent_path),
-                "topic": str(topic_path),
-                "hashtags": str(hashtag_path),
-            },
-            "message": f"Analisis lengkap untuk brand '{brand_name}' ({len(tweets)} tweets) berhasil diproses",
+    topic_learning = None
+    if topic_learner is not None:
+        with track_stage(job_id, "topic_learning"):
+            topic_learning = topic_learner.publish()
+        complete_stage(job_id, "topic_learning")
+
+    result = {
+        "success": True,
+        "brand": {
+            "id": brand_id,
+            "name": brand_name,
+            "total_tweets": total_tweets,
+        },
+        "analytics": {
+            "engagement": engagement_model["data"],
+            "sentiment": sentiment_model["data"],
+            "topics": topic_model["data"],
+            "hashtags": hashtag_model["data"],
+        },
+        "models_saved": {
+            "engagement": str(eng_path),
+            "sentiment": str(sent_path),
+            "topic": str(topic_path),
+            "hashtags": str(hashtag_path),
+        },
+        "message": f"Analisis lengkap untuk brand '{brand_name}' ({total_tweets} tweets) berhasil diproses",
+    }
+    if append:
+        result["append"] = {
+            "rows_uploaded": total_rows,
+            "new_tweets": new_tweets,
+            "duplicates_skipped": total_rows - new_tweets,
         }
+    if topic_learning is not None:
+        result["topic_learning"] = topic_learning
+        result["message"] = (
+            f"{new_tweets} tweet baru ditambahkan ke brand '{brand_name}' (total {total_tweets} tweets)"
+        )
+    return result
+
+
+def _spool_to_disk(source: BinaryIO) -> Path:
+    """
+    UploadFile ditutup setelah request selesai -> salin ke file sementara untuk job
+    """
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="upload_", suffix=".csv", delete=False) as tmp:
+        shutil.copyfileobj(source, tmp, length=1024 * 1024)
+    return Path(tmp.name)
+
+
+def _run_upload_job(
+    csv_path: Path,
+    brand_id: str,
+    brand_name: str,
+    chunk_size: int,
+    workers: int,
+    append: bool,
+    sentiment_engine: str,
+    learn_topics: bool,
+    job_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    try:
+        with open(csv_path, "rb") as f:
+            result = process_csv_upload(
+                f, brand_id, brand_name, chunk_size, workers,
+                job_id=job_id, append=append, sentiment_engine=sentiment_engine, learn_topics=learn_topics,
+            )
+    finally:
+        csv_path.unlink(missing_ok=True)
+
+    # Payload analytics lengkap tidak disimpan di job -> ambil lewat endpoint brand
+    result.pop("analytics", None)
+    return result
+
+
+def _shape_upload_result(
+    result: Dict[str, Any], fields: Optional[str], hashtags_limit: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Echo analytics sesuai permintaan client: hanya field tertentu (relatif ke "analytics",
+    mis. engagement.total_tweets,sentiment) dan/atau halaman pertama hashtag. Halaman
+    berikutnya lewat GET /api/brands/{id}/hashtags?cursor=hashtags_next_cursor.
+    """
+    analytics = result["analytics"]
+    if hashtags_limit is not None:
+        page, next_cursor = paginate(analytics["hashtags"], hashtags_limit, None, "hashtag")
+        analytics = {**analytics, "hashtags": page}
+        result = {**result, "hashtags_total": len(result["analytics"]["hashtags"]), "hashtags_next_cursor": next_cursor}
+    selected = parse_fields(fields)
+    if selected is not None:
+        analytics = select_fields(analytics, selected)
+    return {**result, "analytics": analytics}
+
+
+@router.post("/upload-csv")
+async def upload_csv(
+    file: UploadFile = File(...),
+    chunk_size: int = Query(UPLOAD_CHUNK_SIZE, ge=1, description="Jumlah baris CSV per chunk"),
+    background: bool = Query(False, description="True -> langsung balikan job_id, analisis jalan di worker pool"),
+    workers: int = Query(0, ge=0, description="0/1 = serial, >1 = jumlah proses analyzer paralel"),
+    append: bool = Query(False, description="True -> tambahkan tweet baru (dedup id_str) ke model brand yang sudah ada"),
+    sentiment_engine: str = Query(
+        "vader", pattern=SENTIMENT_ENGINE_PATTERN, description="vader = per tweet, vectorized = batch sparse"
+    ),
+    learn_topics: bool = Query(
+        TOPIC_ONLINE_LEARNING, description="True -> tweet baru meng-update global LDA (partial_fit)"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Field analytics yang dikembalikan, mis. engagement,sentiment.positive_pct (kosong = tidak ada)"
+    ),
+    hashtags_limit: Optional[int] = Query(
+        None, ge=1, le=HASHTAGS_PAGE_MAX, description="Hanya N hashtag pertama + hashtags_next_cursor"
+    ),
+):
+    try:
+        brand_meta = extract_brand_from_filename(file.filename)
+        brand_name = brand_meta["brand_name"]
+        brand_id = brand_meta["brand_id"]
+
+        if append:
+            await run_in_threadpool(_check_appendable, brand_id)
+
+        if background:
+            csv_path = await run_in_threadpool(_spool_to_disk, file.file)
+            job_id = create_job(
+                "upload-csv",
+                UPLOAD_STAGES,
+                meta={
+                    "brand_id": brand_id,
+                    "brand_name": brand_name,
+                    "filename": file.filename,
+                    "append": append,
+                    "sentiment_engine": sentiment_engine,
+                    "learn_topics": learn_topics,
+                },
+            )
+            submit_job(
+                job_id, _run_upload_job, csv_path, brand_id, brand_name, chunk_size, workers, append,
+                sentiment_engine, learn_topics,
+            )
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "success": True,
+                    "job_id": job_id,
+                    "status_url": f"/api/jobs/{job_id}",
+                    "brand": {"id": brand_id, "name": brand_name},
+                    "message": f"Upload '{file.filename}' masuk antrian analisis",
+                },
+            )
+
+        # Mode sinkron (default): tetap di thread supaya event loop tidak terblokir
+        result = await run_in_threadpool(
+            process_csv_upload, file.file, brand_id, brand_name, chunk_size, workers,
+            append=append, sentiment_engine=sentiment_engine, learn_topics=learn_topics,
+        )
+        # Langsung FastJSONResponse: payload analytics tidak lewat jsonable_encoder
+        return FastJSONResponse(_shape_upload_result(result, fields, hashtags_limit))
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
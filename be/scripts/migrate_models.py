@@ -0,0 +1,65 @@
+# app/scripts/migrate_models.py
+"""
+Pindahkan model brand dari file .pkl ke SQLite model store (models/models.db).
+
+Jalankan dari folder be/:
+    python -m scripts.migrate_models --dry-run
+    python -m scripts.migrate_models --delete
+
+Setelah migrasi, jalankan server dengan MODEL_STORE_BACKEND=sqlite.
+File selain model brand (mis. global_topic_model.pkl) tidak disentuh.
+"""
+import argparse
+import pickle
+from pathlib import Path
+
+from core.catalog import MODEL_FILE_PATTERN, BrandCatalog
+from core.model_store import SQLiteModelStore
+
+
+def migrate(models_dir: Path, delete: bool = False, dry_run: bool = False) -> int:
+    store = None if dry_run else SQLiteModelStore(models_dir / "models.db")
+    catalog = BrandCatalog(models_dir / "catalog.json", lambda p: None)
+    migrated = 0
+
+    for path in sorted(models_dir.glob("*.pkl")):
+        match = MODEL_FILE_PATTERN.fullmatch(path.name)
+        if not match:
+            print(f"skip   {path.name} (bukan model brand)")
+            continue
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if not isinstance(data, dict):
+            print(f"skip   {path.name} (isi bukan dict)")
+            continue
+
+        brand_id, model_type = match.group(1), match.group(2)
+        if dry_run:
+            print(f"would  {path.name} -> {brand_id}/{model_type}")
+            migrated += 1
+            continue
+
+        _, size_bytes = store.save(brand_id, model_type, data)
+        cache_key, _, _ = store.version(brand_id, model_type)
+        catalog.record(brand_id, model_type, data, cache_key, size_bytes, store.name)
+        if delete:
+            path.unlink()
+        print(f"ok     {path.name} -> {brand_id}/{model_type} ({size_bytes} bytes)")
+        migrated += 1
+
+    return migrated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrasi model .pkl ke SQLite model store")
+    parser.add_argument("--models-dir", type=Path, default=Path("models"))
+    parser.add_argument("--delete", action="store_true", help="hapus file .pkl setelah berhasil dimigrasi")
+    parser.add_argument("--dry-run", action="store_true", help="hanya tampilkan file yang akan dimigrasi")
+    args = parser.parse_args()
+
+    migrated = migrate(args.models_dir, delete=args.delete, dry_run=args.dry_run)
+    print(f"{migrated} model {'akan ' if args.dry_run else ''}dimigrasi")
+
+
+if __name__ == "__main__":
+    main()